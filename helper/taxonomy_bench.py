@@ -0,0 +1,186 @@
+#!/usr/bin/env python
+"""
+Benchmark of the taxonomy normalization engines.
+
+Usage:
+    helper/taxonomy_bench.py [<corpus_file> ...]
+
+Each line of the corpus files (lines starting with '#' are skipped) is
+normalized to all the output types with each engine, results are checked
+against the simulated-dom engine and the per-engine timings are printed.
+By default the corpora of openquakeplatform_taxtweb3/test/data are used.
+
+For the simulated-dom engines the validator and build calls per item are
+printed to show the calls avoided by the quiet mode.
+
+The startup cost (module import and prototype creation) and the cost of
+getting a new simulated-dom engine (constructor, clone of the prototype
+and reset of an used engine) are printed too, with the deep memory
+footprint of a simulated-dom engine.
+
+The micro-benchmark of taxonomy_short2full (the first step of each
+process()) prints its best time per item and per element.
+"""
+import os
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+from openquake.taxonomy3.taxonomy import taxonomy_short2full  # noqa: E402
+
+from openquake.taxonomy3.taxtweb_eng import (  # noqa: E402
+    Taxonomy, taxonomy_new, taxonomy_engine, taxonomy_footprint,
+    ENGINE_SIMDOM, ENGINE_QUIET, ENGINE_FAST)
+
+DATA_PATH = os.path.join(os.path.dirname(__file__), os.pardir,
+                         'openquakeplatform_taxtweb3', 'test', 'data')
+CORPORA = [os.path.join(DATA_PATH, 'taxonomies.txt'),
+           os.path.join(DATA_PATH, 'distinct-gem-taxonomy_mod.csv')]
+INSTANCES = 100
+REPEAT = 5
+
+STARTUP_SCRIPT = '''
+import time
+t_start = time.time()
+from openquake.taxonomy3 import taxtweb_eng
+t_import = time.time()
+taxtweb_eng.taxonomy_prototype()
+print(t_import - t_start, time.time() - t_import)
+'''
+
+
+def corpus_load(filenames):
+    corpus = []
+    for filename in filenames:
+        with open(filename) as f:
+            for line in f:
+                line = line.strip()
+                if line == '' or line[0] == '#':
+                    continue
+                corpus.append(line)
+    return corpus
+
+
+def engine_run(engine, corpus):
+    taxonomy = taxonomy_engine('taxonomy', engine)
+    results = []
+    t_start = time.time()
+    for type_out in range(0, 3):
+        for taxt_in in corpus:
+            results.append(taxonomy.process(taxt_in, type_out))
+    return time.time() - t_start, results, getattr(taxonomy, 'calls', None)
+
+
+def best_time(func, items, repeat=REPEAT):
+    t_best = None
+    for _ in range(repeat):
+        t_start = time.time()
+        for item in items:
+            func(item)
+        t_run = time.time() - t_start
+        if t_best is None or t_run < t_best:
+            t_best = t_run
+    return t_best
+
+
+def short2full_run(corpus):
+    n_elements = sum(taxt_in.count('/') + 1 for taxt_in in corpus)
+    return best_time(taxonomy_short2full, corpus), n_elements
+
+
+def calls_split(calls):
+    validators = sum(v for k, v in calls.items()
+                     if k.startswith('taxt_Validate'))
+    return validators, calls['taxt_BuildTaxonomyNow']
+
+
+def startup_run():
+    # measured in a new interpreter to have a cold import
+    out = subprocess.check_output(
+        [sys.executable, '-c', STARTUP_SCRIPT],
+        cwd=os.path.join(os.path.dirname(__file__), os.pardir))
+    t_import, t_proto = [float(x) for x in out.split()]
+    return t_import, t_proto
+
+
+def instance_run(n_instances):
+    timings = []
+    for new in [lambda: Taxonomy('taxonomy', True),
+                lambda: taxonomy_new('taxonomy')]:
+        t_start = time.time()
+        for _ in range(n_instances):
+            new()
+        timings.append(time.time() - t_start)
+
+    taxonomy = taxonomy_new('taxonomy')
+    t_reset = 0.0
+    for _ in range(n_instances):
+        taxonomy.process('CR/LFM+CDM/HBET:3,1', 0)
+        t_start = time.time()
+        taxonomy.reset()
+        t_reset += time.time() - t_start
+    timings.append(t_reset)
+
+    return timings
+
+
+def main(filenames):
+    t_import, t_proto = startup_run()
+    print("startup: import %8.1f ms  prototype %8.1f ms" % (
+        t_import * 1000.0, t_proto * 1000.0))
+
+    t_ctor, t_clone, t_reset = instance_run(INSTANCES)
+    print("new engine: constructor %8.1f us  clone %8.1f us  "
+          "reset %8.1f us  (%d instances)" % tuple(
+              [t * 1000000.0 / INSTANCES for t in (t_ctor, t_clone, t_reset)] +
+              [INSTANCES]))
+
+    taxonomy = taxonomy_new('taxonomy')
+    taxonomy.process('CR/LFM+CDM/HBET:3,1', 0)
+    print("engine footprint: %8d bytes  (%d bytes with the shared labels)" % (
+        taxonomy_footprint(taxonomy), taxonomy_footprint(taxonomy, True)))
+
+    corpus = corpus_load(filenames)
+    n_items = len(corpus) * 3
+
+    t_s2f, n_elements = short2full_run(corpus)
+    print("short2full: %8.1f us/item  %8.3f us/element  (%d elements)" % (
+        t_s2f * 1000000.0 / len(corpus), t_s2f * 1000000.0 / n_elements,
+        n_elements))
+
+    t_ref, results_ref, calls_ref = engine_run(ENGINE_SIMDOM, corpus)
+    print("%-8s %8.3f s  %10.1f us/item" % (
+        ENGINE_SIMDOM, t_ref, t_ref * 1000000.0 / n_items))
+
+    ret = 0
+    calls_all = [(ENGINE_SIMDOM, calls_ref)]
+    for engine in [ENGINE_QUIET, ENGINE_FAST]:
+        t_eng, results, calls = engine_run(engine, corpus)
+        if calls is not None:
+            calls_all.append((engine, calls))
+        mismatches = sum(1 for a, b in zip(results_ref, results) if a != b)
+        print("%-8s %8.3f s  %10.1f us/item  speedup x%.1f  mismatches: %d" % (
+            engine, t_eng, t_eng * 1000000.0 / n_items, t_ref / t_eng,
+            mismatches))
+        if mismatches:
+            ret = 1
+
+    validators_ref, builds_ref = calls_split(calls_ref)
+    for engine, calls in calls_all:
+        validators, builds = calls_split(calls)
+        print("%-8s calls/item: validators %6.1f (avoided %6.1f)  "
+              "builds %6.1f (avoided %6.1f)" % (
+                  engine, float(validators) / n_items,
+                  float(validators_ref - validators) / n_items,
+                  float(builds) / n_items,
+                  float(builds_ref - builds) / n_items))
+
+    print("items: %d (%d taxonomies x 3 output types)" % (
+        n_items, len(corpus)))
+    return ret
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:] if len(sys.argv) > 1 else CORPORA))
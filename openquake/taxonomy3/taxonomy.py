@@ -1,3 +1,5 @@
+import re
+from types import MappingProxyType
 from .taxonomy_map import taxonomy_map
 
 
@@ -7,119 +9,134 @@ class Ret(object):
         self.s = s
 
 
-def taxonomy_short2full(t_short):
+# default (all unknown) value of each block of the full form, never changed
+# (a list, an out of range empty element raises the same IndexError of the
+# original implementation)
+_TFULL_DEFAULT = [
+    'DX+D99', 'MAT99', 'L99', 'DY+D99', 'MAT99', 'L99', 'H99', 'Y99',
+    'OC99', 'BP99', 'PLF99', 'IR99', 'EW99', 'RSH99+RMT99+R99+RWC99',
+    'F99+FWC99', 'FOS99']
+
+# prefix -> position in the full form, the keys of taxonomy_map are plain
+# prefixes (without '+', ':' or ',' characters) and only 'DX' and 'DY'
+# have the positions of the directions (0 and 3)
+PREFIX_POS = MappingProxyType(dict(taxonomy_map))
+
+# the prefix is all what is before the first '+' or ':' or ',' character,
+# found with a single scan of the element
+_prefix_match = re.compile(r'[^+:,]*').match
+
+
+def taxonomy_prefix(t_el):
+    """return the prefix of a taxonomy element (the part before the first
+'+', ':' or ',' character)"""
+    return _prefix_match(t_el)[0]
+
 
-    # tfull_arr, tfull_arr_orig,
+# position of each default block
+_TFULL_DEFAULT_POS = tuple(PREFIX_POS[taxonomy_prefix(t_el)]
+                           for t_el in _TFULL_DEFAULT)
+
+# revert from hided DX and DY to explicit unknown values (with their
+# positions)
+_DIRECTION_HIDED = MappingProxyType({
+    'DX': ('DX+D99', 0), 'PF': ('DX+PF', 0),
+    'DY': ('DY+D99', 3), 'PO': ('DY+PO', 3)})
+
+
+def taxonomy_short2full(t_short):
     max_pos = 0
     t_parent = ""
     t_paridx = 0
     t_parnum = 0
 
-    # console.log('T_SHORT: ' + t_short)
-
-    tfull_arr = [
-        'DX+D99', 'MAT99', 'L99', 'DY+D99', 'MAT99', 'L99', 'H99', 'Y99',
-        'OC99', 'BP99', 'PLF99', 'IR99', 'EW99', 'RSH99+RMT99+R99+RWC99',
-        'F99+FWC99', 'FOS99']
-
-    tfull_arr_orig = tfull_arr[:]
+    tfull_arr = _TFULL_DEFAULT[:]
 
     # split the incoming taxonomy
     if t_short[-1] == '/':
         t_short = t_short[0:-1]
 
-    t_arr = t_short.split('/')
-    for i in range(0, len(t_arr)):
-        t_el = t_arr[i]
-        # console.log('T_EL: ' + t_el)
-        # revert from hided DX and DY to explicit unknown values
-        if t_el == 'DX':
-            t_el = 'DX+D99'
-        elif t_el == 'PF':
-            t_el = 'DX+PF'
-
-        if t_el == 'DY':
-            t_el = 'DY+D99'
-        elif t_el == 'PO':
-            t_el = 'DY+PO'
-
-        if t_el.startswith('DX'):
-            t_parent = "DX"
-            t_paridx = i
-            t_parnum += 1
-        elif t_el.startswith('DY'):
-            t_parent = "DY"
-            t_paridx = i
-            t_parnum += 1
-
+    prefix_pos = PREFIX_POS.get
+    direction_hided = _DIRECTION_HIDED.get
+    for i, t_el in enumerate(t_short.split('/')):
         if t_el == '':
+            # empty elements are the default of their position
             if i <= t_paridx + 2:
                 id = i - t_paridx if t_parent == "DX" else i - t_paridx + 3
-                t_el = tfull_arr_orig[id]
+                t_el = _TFULL_DEFAULT[id]
                 if max_pos < id:
                     max_pos = id
             else:
-                t_el = tfull_arr_orig[max_pos]
+                id = max_pos
+                t_el = _TFULL_DEFAULT[id]
                 max_pos += 1
-
-        # find the prefix (all what is before '+' or ':' or ',' character
-        prefix = t_el.replace('+', ',').replace(':', ',').split(',')[0]
-        # print "DEBUG PREFIX: %s" % prefix
-        # if prefix is identified
-        if prefix in taxonomy_map:
-            cur_pos = taxonomy_map[prefix]
-            # console.log("FOUND: " + cur_pos + " THE VAL: " + t_el)
+            cur_pos = _TFULL_DEFAULT_POS[id]
+        else:
+            hided = direction_hided(t_el)
+            if hided is not None:
+                t_el, cur_pos = hided
+            else:
+                # most of the elements are a bare prefix, the others
+                # are scanned
+                cur_pos = prefix_pos(t_el)
+                if cur_pos is None:
+                    cur_pos = prefix_pos(_prefix_match(t_el)[0])
+                    if cur_pos is None:
+                        return (Ret(result=None,
+                                    s="Unknown item '" + t_el + "'"))
+
+            # a known element starts with 'DX' or 'DY' only if it is a
+            # direction
             if cur_pos == 0:
-                # manage special case for coupled DX,DY cell
-                if t_el == 'DX+D99':
-                    tfull_arr[0] = t_el
-                    tfull_arr[3] = 'DY+D99'
-
-                elif t_el == 'DX+PF':
-                    tfull_arr[0] = t_el
-                    tfull_arr[3] = 'DY+OF'
-
+                t_parent = "DX"
+                t_paridx = i
+                t_parnum += 1
             elif cur_pos == 3:
-                # manage special case for coupled DX,DY cell
-                if t_el == 'DY+D99':
-                    tfull_arr[0] = 'DX+D99'
-                    tfull_arr[3] = t_el
-
-                elif t_el == 'DY+OF':
-                    tfull_arr[0] = 'DX+PF'
-                    tfull_arr[3] = t_el
-
-            else:
-                # if no parent set (t_parnum == 0)
-                # or parent set for the first time (t_parnum == 1)
-                # set DirX and DirY values
-                # print "  DEBUG ELSE %d" % cur_pos
-                if cur_pos == 1 or cur_pos == 2:
-                    if t_parent == 'DY':
-                        cur_pos += 3
-
-                    # manage special case paired direction Y cells for
-                    # 'Material' or 'Lateral load-resisting system'
-                    if t_parnum <= 1:
-                        # console.log("T_PARNUM <= 1")
-                        if t_parent == '' or t_parent == 'DX':
-                            # console.log('DX parent')
-                            # console.log("ASSIGN TO " + (cur_pos + 3) + " THE VAL: " + t_el)
-                            tfull_arr[cur_pos+3] = t_el
-
-                        elif t_parent == 'DY':
-                            # console.log('DY parent')
-                            # console.log("ASSIGN TO " + (cur_pos - 3) + " THE VAL: " + t_el)
-                            tfull_arr[cur_pos-3] = t_el
-
-                # console.log("ASSIGN TO " + cur_pos + " THE VAL: " + t_el)
-                tfull_arr[cur_pos] = t_el
-                cur_pos += 1
-
-            if max_pos < cur_pos:
-                max_pos = cur_pos
+                t_parent = "DY"
+                t_paridx = i
+                t_parnum += 1
+
+        if cur_pos == 0:
+            # manage special case for coupled DX,DY cell
+            if t_el == 'DX+D99':
+                tfull_arr[0] = t_el
+                tfull_arr[3] = 'DY+D99'
+
+            elif t_el == 'DX+PF':
+                tfull_arr[0] = t_el
+                tfull_arr[3] = 'DY+OF'
+
+        elif cur_pos == 3:
+            # manage special case for coupled DX,DY cell
+            if t_el == 'DY+D99':
+                tfull_arr[0] = 'DX+D99'
+                tfull_arr[3] = t_el
+
+            elif t_el == 'DY+OF':
+                tfull_arr[0] = 'DX+PF'
+                tfull_arr[3] = t_el
 
         else:
-            return (Ret(result=None, s="Unknown item '" + t_el + "'"))
+            # if no parent set (t_parnum == 0)
+            # or parent set for the first time (t_parnum == 1)
+            # set DirX and DirY values
+            if cur_pos == 1 or cur_pos == 2:
+                if t_parent == 'DY':
+                    cur_pos += 3
+
+                # manage special case paired direction Y cells for
+                # 'Material' or 'Lateral load-resisting system'
+                if t_parnum <= 1:
+                    if t_parent == '' or t_parent == 'DX':
+                        tfull_arr[cur_pos+3] = t_el
+
+                    elif t_parent == 'DY':
+                        tfull_arr[cur_pos-3] = t_el
+
+            tfull_arr[cur_pos] = t_el
+            cur_pos += 1
+
+        if max_pos < cur_pos:
+            max_pos = cur_pos
 
     return (Ret(result='/'.join(tfull_arr), s=None))
@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 import sys
-from openquake.taxonomy3.taxtweb_eng import Taxonomy
+from openquake.taxonomy3.taxtweb_eng import Taxonomy, taxonomy_new
+from openquake.taxonomy3.taxonomy_record import taxonomy_block, taxonomy_parse
 from openquake.taxonomy3.taxtweb_maps import (
     material, mat_tech_grp, mat_prop_grp, mat_tead_grp,
     llrs_type_grp, llrs_duct_grp,
@@ -34,8 +35,8 @@ def smart_concat(s_out, new_out, cur_sep, next_sep):
 
 
 def dx2human(blk, no_unknown=False):
-    atoms = blk.split('+')
-    if len(atoms) == 2 and atoms[1] == 'PF':
+    atoms = taxonomy_block(blk)
+    if len(atoms) == 2 and atoms[1].text == 'PF':
         return 'X direction parallel to the street'
     elif no_unknown is False:
         return 'X direction unspecified to the street'
@@ -54,12 +55,12 @@ def arrdicts_flatten(arrs):
 def llrs2human(blk, no_unknown=False):
     blk_out = ""
     blk_err = ""
-    atoms = blk.split('+')
 
     llrs_types = arrdicts_flatten(llrs_type_grp)
     llrs_ducts = arrdicts_flatten(llrs_duct_grp)
 
-    for atom in atoms:
+    for blk_atom in taxonomy_block(blk):
+        atom = blk_atom.text
         if atom in Taxonomy.UNKNOWN_ATOMS and no_unknown:
             continue
 
@@ -81,14 +82,14 @@ def llrs2human(blk, no_unknown=False):
 def lmat2human(blk, no_unknown=False):
     blk_out = ""
     blk_err = ""
-    atoms = blk.split('+')
 
     mat_erials = arrdicts_flatten([material])
     mat_techs = arrdicts_flatten(mat_tech_grp)
     mat_props = arrdicts_flatten(mat_prop_grp)
     mat_teads = arrdicts_flatten(mat_tead_grp)
 
-    for atom in atoms:
+    for blk_atom in taxonomy_block(blk):
+        atom = blk_atom.text
         if atom in Taxonomy.UNKNOWN_ATOMS and no_unknown:
             continue
 
@@ -118,16 +119,14 @@ def lmat2human(blk, no_unknown=False):
 def height2human(blk, no_unknown=False):
     blk_out = ""
     blk_err = ""
-    subblks = blk.split('+')
 
     hei_aboveground = arrdicts_flatten([h_aboveground])
     hei_belowground = arrdicts_flatten([h_belowground])
     hei_abovegrade = arrdicts_flatten([h_abovegrade])
     hei_slope = arrdicts_flatten([h_slope])
 
-    for subblk in subblks:
-        atoms = subblk.split(':')
-        atom = atoms[0]
+    for blk_atom in taxonomy_block(blk):
+        atom = blk_atom.name
         if atom in Taxonomy.UNKNOWN_ATOMS and no_unknown:
             continue
 
@@ -156,12 +155,12 @@ def height2human(blk, no_unknown=False):
         if blk_out:
             blk_out += '; '
         if atom in Taxonomy.ATOM_TYPE_RANGE:
-            pars = atoms[1].split(',')
+            pars = blk_atom.params
             blk_out += (pfx + ' - ' + desc + ': between ' +
                         pars[0] + ' and ' + pars[1] + sfx)
         elif atom in Taxonomy.ATOM_TYPE_VALUE:
             blk_out += (pfx + ' - ' + desc + ': ' +
-                        atoms[1] + sfx)
+                        blk_atom.params[0] + sfx)
         else:
             blk_out += (pfx + ' - ' + desc + sfx)
 
@@ -171,13 +170,11 @@ def height2human(blk, no_unknown=False):
 def date2human(blk, no_unknown=False):
     blk_out = ""
     blk_err = ""
-    subblks = blk.split('+')
 
     dt_type = arrdicts_flatten([date_type])
 
-    for subblk in subblks:
-        atoms = subblk.split(':')
-        atom = atoms[0]
+    for blk_atom in taxonomy_block(blk):
+        atom = blk_atom.name
         if atom in Taxonomy.UNKNOWN_ATOMS and no_unknown:
             continue
 
@@ -194,12 +191,12 @@ def date2human(blk, no_unknown=False):
         if blk_out:
             blk_out += '; '
         if atom in Taxonomy.ATOM_TYPE_RANGE:
-            pars = atoms[1].split(',')
+            pars = blk_atom.params
             blk_out += (pfx + ' - ' + desc + ': between ' +
                         pars[0] + ' and ' + pars[1] + sfx)
         elif atom in Taxonomy.ATOM_TYPE_VALUE:
             blk_out += (pfx + ' - ' + desc + ': ' +
-                        atoms[1] + sfx)
+                        blk_atom.params[0] + sfx)
         else:
             blk_out += (pfx + ' - ' + desc + sfx)
 
@@ -209,12 +206,12 @@ def date2human(blk, no_unknown=False):
 def occupancy2human(blk, no_unknown=False):
     blk_out = ""
     blk_err = ""
-    atoms = blk.split('+')
 
     occ_types = arrdicts_flatten([occu_type])
     occ_specs = arrdicts_flatten(occu_spec_grp)
 
-    for atom in atoms:
+    for blk_atom in taxonomy_block(blk):
+        atom = blk_atom.text
         if atom in Taxonomy.UNKNOWN_ATOMS and no_unknown:
             continue
 
@@ -240,7 +237,8 @@ def position2human(blk, no_unknown=False):
 
     bupo_types = arrdicts_flatten([bupo_type])
 
-    for atom in [blk]:
+    for blk_atom in taxonomy_block(blk):
+        atom = blk_atom.text
         if atom in Taxonomy.UNKNOWN_ATOMS and no_unknown:
             continue
 
@@ -261,7 +259,8 @@ def plan2human(blk, no_unknown=False):
 
     plsh_types = arrdicts_flatten([plsh_type])
 
-    for atom in [blk]:
+    for blk_atom in taxonomy_block(blk):
+        atom = blk_atom.text
         if atom in Taxonomy.UNKNOWN_ATOMS and no_unknown:
             continue
 
@@ -290,9 +289,9 @@ def irreg2human(blk, no_unknown=False):
     vert_irres = arrdicts_flatten([vert_irre])
     vert_secos = arrdicts_flatten([vert_seco])
 
-    atoms = blk.split('+')
 
-    for atom in atoms:
+    for blk_atom in taxonomy_block(blk):
+        atom = blk_atom.text
         if atom in Taxonomy.UNKNOWN_ATOMS and no_unknown:
             continue
 
@@ -331,7 +330,8 @@ def extwall2human(blk, no_unknown=False):
 
     wall_types = arrdicts_flatten([wall_type])
 
-    for atom in [blk]:
+    for blk_atom in taxonomy_block(blk):
+        atom = blk_atom.text
         if atom in Taxonomy.UNKNOWN_ATOMS and no_unknown:
             continue
 
@@ -349,7 +349,6 @@ def extwall2human(blk, no_unknown=False):
 def roof2human(blk, no_unknown=False):
     blk_out = ""
     blk_err = ""
-    atoms = blk.split('+')
 
     roof_shaps = arrdicts_flatten([roof_shap])
     roof_coves = arrdicts_flatten([roof_cove])
@@ -357,7 +356,8 @@ def roof2human(blk, no_unknown=False):
     roof_syses = arrdicts_flatten(roof_sys_grp)
     roof_conns = arrdicts_flatten([roof_conn])
 
-    for atom in atoms:
+    for blk_atom in taxonomy_block(blk):
+        atom = blk_atom.text
         if atom in Taxonomy.UNKNOWN_ATOMS and no_unknown:
             continue
 
@@ -390,13 +390,13 @@ def roof2human(blk, no_unknown=False):
 def floor2human(blk, no_unknown=False):
     blk_out = ""
     blk_err = ""
-    atoms = blk.split('+')
 
     floo_symas = arrdicts_flatten([floo_syma])
     floo_sytys = arrdicts_flatten([floo_syty])
     floo_conns = arrdicts_flatten(floo_conn_grp)
 
-    for atom in atoms:
+    for blk_atom in taxonomy_block(blk):
+        atom = blk_atom.text
         if atom in Taxonomy.UNKNOWN_ATOMS and no_unknown:
             continue
 
@@ -424,7 +424,8 @@ def foundation2human(blk, no_unknown=False):
 
     foun_types = arrdicts_flatten([foun_type])
 
-    for atom in [blk]:
+    for blk_atom in taxonomy_block(blk):
+        atom = blk_atom.text
         if atom in Taxonomy.UNKNOWN_ATOMS and no_unknown:
             continue
 
@@ -440,7 +441,7 @@ def foundation2human(blk, no_unknown=False):
 
 
 def full_text2human(full_text, no_unknown=False):
-    atoms = full_text.split('/')
+    atoms = taxonomy_parse(full_text)
 
     # Direction specification
     s_out = dx2human(atoms[Taxonomy.POS_DX], no_unknown=no_unknown)
@@ -572,7 +573,7 @@ def full_text2human(full_text, no_unknown=False):
 
 
 def taxonomy2human(s, no_unknown=True):
-    t = Taxonomy('Taxonomy', True)
+    t = taxonomy_new('Taxonomy')
 
     full_text, full_res = t.process(s, 0)
 
@@ -0,0 +1,336 @@
+#!/usr/bin/env python3
+"""
+Bulk normalization of taxonomies on multiple cores.
+
+The input is split in chunks that are processed by a pool of worker
+processes with taxonomy_process_many (each worker builds the prototype
+of its engines once) and results are returned in the same order of the
+input.
+
+taxonomy_process_distinct() normalizes just the distinct inputs (usually
+a small fraction of the rows of an exposure) and maps each row to its
+result with an index array.
+
+With the gate option the taxonomies rejected by the syntactic check of
+taxonomy_gate (taxonomy_validate) are not processed by the engine, their
+error is the message of the gate (see taxonomy_process_many).
+
+taxonomy_expand_many() and taxonomy_expand_rows() stream the expansion of
+short taxonomies to the 16 blocks of the full form (taxonomy_short2full,
+without the engine) of text lines or of a column of delimited rows.
+"""
+import os
+import sys
+import csv
+import time
+import array
+import argparse
+import collections
+from concurrent.futures import ProcessPoolExecutor
+from openquake.taxonomy3.taxonomy import taxonomy_short2full
+from openquake.taxonomy3.taxtweb_eng import (
+    taxonomy_prototype, taxonomy_process_many, ENGINE_SIMDOM, ENGINE_QUIET,
+    ENGINE_FAST)
+
+CHUNKSIZE_DEFAULT = 1000
+
+DistinctStats = collections.namedtuple(
+    'DistinctStats', ['rows', 'distinct', 'ratio', 'seconds', 'saved'])
+
+# per-worker engine type, set by the pool initializer
+_worker_engine_type = None
+
+
+def _worker_init(engine):
+    global _worker_engine_type
+
+    _worker_engine_type = engine
+    # the engines of the chunks are cloned from the prototype
+    taxonomy_prototype()
+
+
+def _worker_process(taxts_in, type_out, gate=False):
+    return [(taxt_out, error) for _, taxt_out, error in taxonomy_process_many(
+        taxts_in, type_out, _worker_engine_type, gate)]
+
+
+def _chunks(taxts_in, chunksize):
+    chunk = []
+    for taxt_in in taxts_in:
+        chunk.append(taxt_in)
+        if len(chunk) == chunksize:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def taxonomy_process_parallel(taxts_in, type_out, jobs=None,
+                              chunksize=CHUNKSIZE_DEFAULT,
+                              engine=ENGINE_SIMDOM, gate=False):
+    """
+generator that converts each input taxonomy to a normalized form using a
+pool of processes, results are yielded in the same order of the input.
+    taxts_in:  iterable of taxonomy input strings
+    type_out:  type of taxonomy output
+               0, "full", 1: "without unknown", 2: "short"
+    jobs:      number of worker processes (None: number of cpus,
+               1: no pool, the current process is used)
+    chunksize: number of taxonomies sent to a worker for each task
+    engine:    ENGINE_SIMDOM (default), ENGINE_QUIET or ENGINE_FAST
+    gate:      if True taxonomy_gate is run in front of the engine
+YIELD:
+(taxt_in, taxonomy_out, error_str) for each input taxonomy
+    taxonomy_out: a taxonomy if success else None
+    error_str: None if success else a string with the error description
+"""
+    if chunksize < 1:
+        raise ValueError("chunksize must be a positive integer")
+
+    if jobs == 1:
+        for ret in taxonomy_process_many(taxts_in, type_out, engine, gate):
+            yield ret
+        return
+
+    if jobs is None:
+        jobs = os.cpu_count() or 1
+
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_worker_init,
+                             initargs=(engine,)) as executor:
+        # the number of chunks in flight is bounded to keep memory flat
+        pending = collections.deque()
+
+        for chunk in _chunks(taxts_in, chunksize):
+            pending.append((chunk, executor.submit(
+                _worker_process, chunk, type_out, gate)))
+            if len(pending) >= jobs * 2:
+                chunk, future = pending.popleft()
+                for taxt_in, ret in zip(chunk, future.result()):
+                    yield (taxt_in,) + ret
+
+        while pending:
+            chunk, future = pending.popleft()
+            for taxt_in, ret in zip(chunk, future.result()):
+                yield (taxt_in,) + ret
+
+
+def taxonomy_process_distinct(taxts_in, type_out, jobs=1,
+                              chunksize=CHUNKSIZE_DEFAULT,
+                              engine=ENGINE_SIMDOM, gate=False):
+    """
+normalize each distinct input taxonomy once and broadcast the results to
+all the rows.
+    taxts_in:  iterable of taxonomy input strings
+    type_out:  type of taxonomy output
+               0, "full", 1: "without unknown", 2: "short"
+    jobs, chunksize, engine, gate: as in taxonomy_process_parallel
+               (jobs=None: number of cpus)
+RETURN:
+(index, results, stats)
+    index:     array with, for each row, the position of its result
+    results:   list of (taxt_in, taxonomy_out, error_str) for each distinct
+               input, in order of first appearance
+    stats:     DistinctStats with the number of rows and of distinct
+               inputs, their ratio, the seconds spent in the normalization
+               and the estimated seconds saved by the deduplication
+"""
+    codes = {}
+    index = array.array('l')
+    for taxt_in in taxts_in:
+        code = codes.get(taxt_in)
+        if code is None:
+            code = codes[taxt_in] = len(codes)
+        index.append(code)
+
+    start = time.perf_counter()
+    results = list(taxonomy_process_parallel(
+        codes, type_out, jobs=jobs, chunksize=chunksize, engine=engine,
+        gate=gate))
+    seconds = time.perf_counter() - start
+
+    rows = len(index)
+    distinct = len(results)
+    stats = DistinctStats(
+        rows, distinct, float(distinct) / rows if rows else 1.0, seconds,
+        seconds / distinct * (rows - distinct) if distinct else 0.0)
+    return (index, results, stats)
+
+
+def taxonomy_expand(taxt_in):
+    """
+expand a taxonomy to the 16 blocks of the full form, the atoms are not
+validated (as the first step of the engine processing)
+    taxt_in:   taxonomy input string
+RETURN:
+(taxonomy_full, error_str)
+    taxonomy_full: the expanded taxonomy if success else None
+    error_str: None if success else a string with the error description
+"""
+    try:
+        ret = taxonomy_short2full(taxt_in)
+    except Exception as ex:
+        return (None, "EXCEPTION: " + str(ex))
+    return (ret.result, ret.s)
+
+
+def taxonomy_expand_many(taxts_in):
+    """
+generator that expands each input taxonomy with taxonomy_expand, the
+input is consumed lazily
+    taxts_in:  iterable of taxonomy input strings
+YIELD:
+(taxt_in, taxonomy_full, error_str) for each input taxonomy
+"""
+    for taxt_in in taxts_in:
+        yield (taxt_in,) + taxonomy_expand(taxt_in)
+
+
+def taxonomy_expand_rows(rows, column, header=False):
+    """
+generator that expands the taxonomy of a column of delimited rows (as
+read by csv.reader), the input is consumed lazily
+    rows:      iterable of lists of fields
+    column:    index of the taxonomy field (0 based)
+    header:    if True the first row is a header, 'error' is appended
+YIELD:
+each row with the taxonomy replaced by its full form and the error
+appended ('' if success, the input taxonomy is kept if failure, a row
+without the taxonomy field is padded with empty fields)
+"""
+    rows = iter(rows)
+    if header:
+        for row in rows:
+            yield list(row) + ['error']
+            break
+
+    for row in rows:
+        row = list(row)
+        if column >= len(row):
+            # the missing fields are added empty, the error is in the
+            # appended field as for the other rows
+            row.extend([''] * (column + 1 - len(row)))
+            yield row + ["Missing column %d" % column]
+            continue
+        taxt_full, error = taxonomy_expand(row[column])
+        if error is None:
+            row[column] = taxt_full
+        yield row + [error or '']
+
+
+def taxonomy_expand_cmd(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Expand GEM taxonomies to the 16 blocks of the full '
+        'form without validating the atoms, one for each input line. '
+        'For each line the input taxonomy, the expanded taxonomy and '
+        'the error are written separated by tabs; with --column the '
+        'input is a delimited file and each row is written with the '
+        'taxonomy replaced and the error appended.')
+    parser.add_argument('filename', nargs='?', default='-',
+                        help="input file ('-' for standard input)")
+    parser.add_argument('-k', '--column', type=int, default=None,
+                        help='index of the taxonomy column of a '
+                        'delimited input (0 based)')
+    parser.add_argument('-s', '--delimiter', default=',',
+                        help='field delimiter of a delimited input '
+                        '(default: %(default)s)')
+    parser.add_argument('-H', '--header', action='store_true',
+                        help='the first row of a delimited input is a '
+                        'header')
+    args = parser.parse_args(argv)
+
+    if args.column is not None and args.column < 0:
+        parser.error('column must be a not negative integer')
+
+    f = (sys.stdin if args.filename == '-' else
+         open(args.filename, newline=''))
+    try:
+        if args.column is None:
+            for taxt_in, taxt_full, error in taxonomy_expand_many(
+                    line.rstrip('\r\n') for line in f):
+                sys.stdout.write('%s\t%s\t%s\n' % (
+                    taxt_in, taxt_full or '', error or ''))
+        else:
+            writer = csv.writer(sys.stdout, delimiter=args.delimiter,
+                                lineterminator='\n')
+            for row in taxonomy_expand_rows(
+                    csv.reader(f, delimiter=args.delimiter),
+                    args.column, args.header):
+                writer.writerow(row)
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+
+def _positive_int(s):
+    try:
+        value = int(s)
+    except ValueError:
+        value = 0
+    if value < 1:
+        raise argparse.ArgumentTypeError(
+            "invalid positive integer value: '%s'" % s)
+    return value
+
+
+def taxonomy_process_cmd(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Normalize GEM taxonomies, one for each input line. '
+        'For each line the input taxonomy, the normalized taxonomy and '
+        'the error are written separated by tabs.')
+    parser.add_argument('filename', nargs='?', default='-',
+                        help="input file ('-' for standard input)")
+    parser.add_argument('-t', '--type-out', type=int, default=0,
+                        choices=[0, 1, 2],
+                        help='output type: 0 full, 1 without unknown, '
+                        '2 short (default: %(default)s)')
+    parser.add_argument('-j', '--jobs', type=_positive_int, default=None,
+                        help='number of worker processes '
+                        '(default: number of cpus)')
+    parser.add_argument('-c', '--chunksize', type=_positive_int,
+                        default=CHUNKSIZE_DEFAULT,
+                        help='taxonomies sent to a worker for each task '
+                        '(default: %(default)s)')
+    parser.add_argument('-e', '--engine', default=ENGINE_SIMDOM,
+                        choices=[ENGINE_SIMDOM, ENGINE_QUIET, ENGINE_FAST],
+                        help='normalization engine (default: %(default)s)')
+    parser.add_argument('-d', '--distinct', action='store_true',
+                        help='read the whole input and normalize each '
+                        'distinct taxonomy once, the statistics are written '
+                        'to standard error')
+    parser.add_argument('-g', '--gate', action='store_true',
+                        help='reject the malformed taxonomies with a '
+                        'syntactic check before the engine (the error is '
+                        'the one of the check)')
+    args = parser.parse_args(argv)
+
+    f = sys.stdin if args.filename == '-' else open(args.filename)
+    try:
+        taxts_in = (line.rstrip('\r\n') for line in f)
+        if args.distinct:
+            index, results, stats = taxonomy_process_distinct(
+                taxts_in, args.type_out, jobs=args.jobs,
+                chunksize=args.chunksize, engine=args.engine,
+                gate=args.gate)
+            rows = (results[code] for code in index)
+        else:
+            rows = taxonomy_process_parallel(
+                taxts_in, args.type_out, jobs=args.jobs,
+                chunksize=args.chunksize, engine=args.engine,
+                gate=args.gate)
+        for taxt_in, taxt_out, error in rows:
+            sys.stdout.write('%s\t%s\t%s\n' % (
+                taxt_in, taxt_out or '', error or ''))
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+    if args.distinct:
+        sys.stderr.write(
+            '%d rows, %d distinct (%.2f%%), %.3fs to normalize, '
+            '%.3fs saved\n' % (stats.rows, stats.distinct,
+                                stats.ratio * 100, stats.seconds,
+                                stats.saved))
+
+
+if __name__ == '__main__':
+    taxonomy_process_cmd()
@@ -0,0 +1,158 @@
+#!/usr/bin/env python
+"""
+Integer-coded categorical columns of the taxonomy attributes.
+
+taxonomy_categorical() normalizes a sequence of taxonomies (each distinct
+string once) and returns one column per attribute with the code of the
+atom used by every row (-1 if the row is not valid or if the attribute
+is not present) plus the code -> atom dictionaries:
+
+    columns, atoms = taxonomy_categorical(taxonomies)
+    columns['material_x']   ->  array of codes, one per taxonomy
+    atoms['material_x']     ->  {0: 'MAT99', 1: 'C99', 2: 'CU', ...}
+
+Height and date attributes are coded by the kind of atom (the numeric
+parameters are extracted by taxonomy_numeric). Columns are NumPy arrays
+if NumPy is available, stdlib arrays otherwise.
+"""
+import array
+import collections
+from openquake.taxonomy3.taxtweb_eng import (
+    Taxonomy, taxonomy_process_many, ENGINE_SIMDOM)
+from openquake.taxonomy3.taxtweb_maps import (
+    material, mat_tech_grp, mat_prop_grp, mat_tead_grp,
+    llrs_type_grp, llrs_duct_grp,
+    h_aboveground, h_belowground, h_abovegrade, h_slope,
+    date_type, occu_type, occu_spec_grp, bupo_type, plsh_type,
+    stir_type, plan_irre, plan_seco, vert_irre, vert_seco, wall_type,
+    roof_shap, roof_cove, roof_mate, roof_sys_grp, roof_conn,
+    floo_syma, floo_conn_grp, floo_syty, foun_type)
+from openquake.taxonomy3.taxonomy_record import taxonomy_block
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+def _ids(*grps):
+    """return the tuple of the distinct ids of lists of map items"""
+    ids = []
+    for grp in grps:
+        for item in grp:
+            if item['id'] not in ids:
+                ids.append(item['id'])
+    return tuple(ids)
+
+
+def _grp_ids(grp):
+    return _ids(*[items for items in grp if items])
+
+
+# attribute -> (block position, atoms), the code of an atom is its index
+CATEGORICAL_ATTRIBUTES = collections.OrderedDict([
+    ('material_x', (Taxonomy.POS_DX_LMAT, _ids(material))),
+    ('material_technology_x', (Taxonomy.POS_DX_LMAT,
+                               _grp_ids(mat_tech_grp))),
+    ('material_properties_x', (Taxonomy.POS_DX_LMAT,
+                               _grp_ids(mat_prop_grp))),
+    ('material_technology_add_x', (Taxonomy.POS_DX_LMAT,
+                                   _grp_ids(mat_tead_grp))),
+    ('llrs_x', (Taxonomy.POS_DX_LLRS, _grp_ids(llrs_type_grp))),
+    ('llrs_ductility_x', (Taxonomy.POS_DX_LLRS, _grp_ids(llrs_duct_grp))),
+    ('material_y', (Taxonomy.POS_DY_LMAT, _ids(material))),
+    ('material_technology_y', (Taxonomy.POS_DY_LMAT,
+                               _grp_ids(mat_tech_grp))),
+    ('material_properties_y', (Taxonomy.POS_DY_LMAT,
+                               _grp_ids(mat_prop_grp))),
+    ('material_technology_add_y', (Taxonomy.POS_DY_LMAT,
+                                   _grp_ids(mat_tead_grp))),
+    ('llrs_y', (Taxonomy.POS_DY_LLRS, _grp_ids(llrs_type_grp))),
+    ('llrs_ductility_y', (Taxonomy.POS_DY_LLRS, _grp_ids(llrs_duct_grp))),
+    ('storeys_above', (Taxonomy.POS_HEIGHT, _ids(h_aboveground))),
+    ('storeys_below', (Taxonomy.POS_HEIGHT, _ids(h_belowground))),
+    ('height_grade', (Taxonomy.POS_HEIGHT, _ids(h_abovegrade))),
+    ('slope', (Taxonomy.POS_HEIGHT, _ids(h_slope))),
+    ('date', (Taxonomy.POS_DATE, _ids(date_type))),
+    ('occupancy', (Taxonomy.POS_OCCUPANCY, _ids(occu_type))),
+    ('occupancy_detail', (Taxonomy.POS_OCCUPANCY, _grp_ids(occu_spec_grp))),
+    ('position', (Taxonomy.POS_POSITION, _ids(bupo_type))),
+    ('plan_shape', (Taxonomy.POS_PLAN, _ids(plsh_type))),
+    ('irregularity', (Taxonomy.POS_IRREG, _ids(stir_type))),
+    ('plan_irregularity', (Taxonomy.POS_IRREG, _ids(plan_irre))),
+    ('plan_irregularity_secondary', (Taxonomy.POS_IRREG, _ids(plan_seco))),
+    ('vertical_irregularity', (Taxonomy.POS_IRREG, _ids(vert_irre))),
+    ('vertical_irregularity_secondary', (Taxonomy.POS_IRREG,
+                                         _ids(vert_seco))),
+    ('exterior_walls', (Taxonomy.POS_EXTWALL, _ids(wall_type))),
+    ('roof_shape', (Taxonomy.POS_ROOF, _ids(roof_shap))),
+    ('roof_covering', (Taxonomy.POS_ROOF, _ids(roof_cove))),
+    ('roof_material', (Taxonomy.POS_ROOF, _ids(roof_mate))),
+    ('roof_system', (Taxonomy.POS_ROOF, _grp_ids(roof_sys_grp))),
+    ('roof_connection', (Taxonomy.POS_ROOF, _ids(roof_conn))),
+    ('floor_material', (Taxonomy.POS_FLOOR, _ids(floo_syma))),
+    ('floor_system', (Taxonomy.POS_FLOOR, _grp_ids(floo_conn_grp))),
+    ('floor_connection', (Taxonomy.POS_FLOOR, _ids(floo_syty))),
+    ('foundation', (Taxonomy.POS_FOUNDATION, _ids(foun_type))),
+])
+
+# block position -> {atom: (attribute index, code)}, the atoms with
+# numeric parameters are found by name
+_CATEGORICAL_ATOMS = collections.defaultdict(dict)
+for _attr_idx, (_pos, _atoms) in enumerate(CATEGORICAL_ATTRIBUTES.values()):
+    for _code, _atom in enumerate(_atoms):
+        _CATEGORICAL_ATOMS[_pos][_atom] = (_attr_idx, _code)
+
+_NUMERIC_ATOMS = frozenset(Taxonomy.ATOM_TYPE_VALUE +
+                           Taxonomy.ATOM_TYPE_RANGE)
+
+_ROW_INVALID = (-1,) * len(CATEGORICAL_ATTRIBUTES)
+
+
+def categorical_atoms():
+    """return the dict attribute -> {code: atom}"""
+    return collections.OrderedDict(
+        (attribute, dict(enumerate(atoms)))
+        for attribute, (_, atoms) in CATEGORICAL_ATTRIBUTES.items())
+
+
+def categorical_row(taxt_full):
+    """return the tuple of the codes of the attributes of a full taxonomy
+(in CATEGORICAL_ATTRIBUTES order)"""
+    row = list(_ROW_INVALID)
+    for pos, blk in enumerate(taxt_full.split('/')):
+        blk_atoms = _CATEGORICAL_ATOMS[pos]
+        for atom in taxonomy_block(blk):
+            attr_code = blk_atoms.get(
+                atom.name if atom.name in _NUMERIC_ATOMS else atom.text)
+            if attr_code is not None:
+                row[attr_code[0]] = attr_code[1]
+    return tuple(row)
+
+
+def _column(values):
+    if numpy is not None:
+        return numpy.array(values, dtype=numpy.int8)
+    return array.array('b', values)
+
+
+def taxonomy_categorical(taxonomies, engine=ENGINE_SIMDOM):
+    """
+return (columns, atoms) for a sequence of taxonomies
+    columns:   dict attribute -> array with the code of each taxonomy
+    atoms:     dict attribute -> {code: atom}
+each distinct taxonomy is normalized (by 'engine') only once
+"""
+    taxonomies = list(taxonomies)
+    distinct = list(collections.OrderedDict.fromkeys(taxonomies))
+    rows = {}
+    for taxt, taxt_full, err in taxonomy_process_many(distinct, 0, engine):
+        rows[taxt] = _ROW_INVALID if err is not None else (
+            categorical_row(taxt_full))
+
+    cols = list(zip(*[rows[taxt] for taxt in taxonomies])) or (
+        [()] * len(CATEGORICAL_ATTRIBUTES))
+    columns = collections.OrderedDict(
+        (attribute, _column(col))
+        for attribute, col in zip(CATEGORICAL_ATTRIBUTES, cols))
+    return (columns, categorical_atoms())
@@ -0,0 +1,236 @@
+#!/usr/bin/env python
+"""
+Bit-packed codec of the normalized taxonomies.
+
+A valid taxonomy is fully described by the integer 'val()' of the
+dropdowns of the engine plus the numeric text fields (see TaxtValues in
+taxtweb_tables): the integers are packed in a CODE_BITS wide integer
+(or a CODE_BYTES long bytes key) and the text fields are returned apart
+as a tuple of strings:
+
+    code, params = taxonomy_encode('CR/LFM/HBET:3,1')
+    taxonomy_decode(code, params, 2)  ->  'CR/LFM/HBET:1,3'
+
+Two taxonomies have the same normalized form if and only if they have
+the same (code, params) pair.
+
+taxonomy_digest() returns a stable signed 64-bit integer of the full
+normalized form (a BLAKE2b hash, independent of the packing layout of
+the codes and of the Python process) to be used as a fixed-width join
+key, taxonomy_digest_many() the int64 column of a sequence of
+taxonomies:
+
+    taxonomy_digest('CR/LFM/HBET:3,1') == taxonomy_digest(
+        'DX+D99/CR/LFM/DY+D99/CR/LFM/HBET:1,3/Y99/...')
+"""
+import array
+import hashlib
+from openquake.taxonomy3.taxonomy import taxonomy_short2full
+from openquake.taxonomy3.taxtweb_eng import taxonomy_process
+from openquake.taxonomy3.taxtweb_fast import taxonomy_values
+from openquake.taxonomy3.taxtweb_tables import (
+    TaxtValues, build_taxonomy_string, material_ids, mat_tech_ids,
+    mat_tead_ids, mat_prop_ids, llrs_type_ids, llrs_duct_ids,
+    h_aboveground_ids, h_belowground_ids, h_abovegrade_ids, h_slope_ids,
+    date_type_ids, occu_type_ids, occu_spec_ids, bupo_type_ids,
+    plsh_type_ids, stir_type_ids, plan_irre_ids, plan_seco_ids,
+    vert_irre_ids, vert_seco_ids, wall_type_ids, roof_shap_ids,
+    roof_cove_ids, roof_mate_ids, roof_sys_ids, roof_conn_ids,
+    floo_syma_ids, floo_conn_ids, floo_syty_ids, foun_type_ids)
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+def _grp_size(grp):
+    return max(len(ids) for ids in grp.values())
+
+
+# number of items of the dropdown of each integer field of TaxtValues
+FIELD_SIZES = {
+    'Direction1RB': 2,
+    'HeightCB1': len(h_aboveground_ids),
+    'HeightCB2': len(h_belowground_ids),
+    'HeightCB3': len(h_abovegrade_ids),
+    'HeightCB4': len(h_slope_ids),
+    'DateCB1': len(date_type_ids),
+    'OccupancyCB1': len(occu_type_ids),
+    'OccupancyCB2': _grp_size(occu_spec_ids),
+    'PositionCB': len(bupo_type_ids),
+    'PlanShapeCB': len(plsh_type_ids),
+    'RegularityCB1': len(stir_type_ids),
+    'RegularityCB2': len(plan_irre_ids),
+    'RegularityCB3': len(vert_irre_ids),
+    'RegularityCB4': len(plan_seco_ids),
+    'RegularityCB5': len(vert_seco_ids),
+    'WallsCB': len(wall_type_ids),
+    'RoofCB1': len(roof_shap_ids),
+    'RoofCB2': len(roof_cove_ids),
+    'RoofCB3': len(roof_mate_ids),
+    'RoofCB4': _grp_size(roof_sys_ids),
+    'RoofCB5': len(roof_conn_ids),
+    'FloorCB1': len(floo_syma_ids),
+    'FloorCB2': _grp_size(floo_conn_ids),
+    'FloorCB3': len(floo_syty_ids),
+    'FoundationsCB': len(foun_type_ids),
+}
+for _sfx in ('1', '2'):
+    FIELD_SIZES.update({
+        'MaterialCB1' + _sfx: len(material_ids),
+        'MaterialCB2' + _sfx: _grp_size(mat_tech_ids),
+        'MaterialCB3' + _sfx: _grp_size(mat_prop_ids),
+        'MaterialCB4' + _sfx: _grp_size(mat_tead_ids),
+        'SystemCB1' + _sfx: _grp_size(llrs_type_ids),
+        'SystemCB2' + _sfx: _grp_size(llrs_duct_ids),
+    })
+
+# (field, bits) in packing order, the value v of a field (from -1 for
+# the empty dropdowns) is stored as v + 1
+FIELD_BITS = tuple((field, FIELD_SIZES[field].bit_length())
+                   for field in TaxtValues.INT_FIELDS)
+
+CODE_BITS = sum(bits for _, bits in FIELD_BITS)
+CODE_BYTES = (CODE_BITS + 7) // 8
+
+# digest of the invalid taxonomies in the columns of taxonomy_digest_many,
+# never returned for a valid taxonomy
+DIGEST_INVALID = -(1 << 63)
+
+
+def values_encode(v):
+    """return the (code, params) pair of a TaxtValues instance"""
+    code = 0
+    for field, bits in FIELD_BITS:
+        val = getattr(v, field) + 1
+        if val < 0 or val >= (1 << bits):
+            raise ValueError("Value %d of '%s' out of range" %
+                             (val - 1, field))
+        code = (code << bits) | val
+    return (code, v.strs())
+
+
+def values_decode(code, params):
+    """return the TaxtValues instance of a (code, params) pair"""
+    if isinstance(code, bytes):
+        code = int.from_bytes(code, 'big')
+    v = TaxtValues.__new__(TaxtValues)
+    for field, bits in reversed(FIELD_BITS):
+        setattr(v, field, (code & ((1 << bits) - 1)) - 1)
+        code >>= bits
+    for field, param in zip(TaxtValues.STR_FIELDS, params):
+        setattr(v, field, param)
+    return v
+
+
+def _taxonomy_values(taxt_in):
+    """return the TaxtValues instance of a taxonomy in any form, ValueError
+is raised if the taxonomy is not valid"""
+    v = None
+    try:
+        ret = taxonomy_short2full(taxt_in)
+        if ret.s is None:
+            v = taxonomy_values(ret.result)
+    except Exception:
+        pass
+
+    if v is None:
+        # inputs not handled by the table-driven parser are normalized
+        # by the reference engine first
+        taxt_full, err = taxonomy_process(taxt_in, 0)
+        if err is not None:
+            raise ValueError(err)
+        v = taxonomy_values(taxt_full)
+        if v is None:
+            raise ValueError("Taxonomy '%s' can't be encoded" % taxt_in)
+
+    return v
+
+
+def taxonomy_encode(taxt_in):
+    """
+return the (code, params) pair of a taxonomy in any form, ValueError is
+raised if the taxonomy is not valid
+    code:      CODE_BITS wide integer with the dropdown values
+    params:    tuple of strings with the text fields (TaxtValues.STR_FIELDS)
+"""
+    return values_encode(_taxonomy_values(taxt_in))
+
+
+def taxonomy_decode(code, params, type_out=0):
+    """
+return the normalized taxonomy of a (code, params) pair
+    code:      integer or bytes key as returned by taxonomy_key
+    type_out:  0: "full", 1: "without unknown", 2: "short"
+"""
+    return build_taxonomy_string(values_decode(code, params), type_out)
+
+
+def taxonomy_key(code):
+    """return the CODE_BYTES long bytes key of a code"""
+    return code.to_bytes(CODE_BYTES, 'big')
+
+
+def taxonomy_encode_many(taxonomies):
+    """
+return the (codes, params) lists of a sequence of taxonomies, each
+distinct taxonomy is encoded only once and invalid taxonomies have None
+in both lists
+"""
+    encoded = {}
+    codes = []
+    params = []
+    for taxt in taxonomies:
+        pair = encoded.get(taxt)
+        if pair is None:
+            try:
+                pair = taxonomy_encode(taxt)
+            except ValueError:
+                pair = (None, None)
+            encoded[taxt] = pair
+        codes.append(pair[0])
+        params.append(pair[1])
+    return (codes, params)
+
+
+def values_digest(v):
+    """return the signed 64-bit digest of a TaxtValues instance"""
+    digest = int.from_bytes(hashlib.blake2b(
+        build_taxonomy_string(v, 0).encode(), digest_size=8).digest(),
+        'big', signed=True)
+    # DIGEST_INVALID is reserved, its valid taxonomies share the next value
+    return digest + 1 if digest == DIGEST_INVALID else digest
+
+
+def taxonomy_digest(taxt_in):
+    """
+return the digest of a taxonomy in any form (a signed 64-bit integer,
+the same for all the forms of the same normalized taxonomy), ValueError
+is raised if the taxonomy is not valid
+"""
+    return values_digest(_taxonomy_values(taxt_in))
+
+
+def taxonomy_digest_many(taxonomies):
+    """
+return the column of the digests of a sequence of taxonomies (int64
+NumPy array if NumPy is available, stdlib 'q' array otherwise), each
+distinct taxonomy is normalized only once and invalid taxonomies have
+DIGEST_INVALID
+"""
+    digested = {}
+    digests = []
+    for taxt in taxonomies:
+        digest = digested.get(taxt)
+        if digest is None:
+            try:
+                digest = taxonomy_digest(taxt)
+            except ValueError:
+                digest = DIGEST_INVALID
+            digested[taxt] = digest
+        digests.append(digest)
+
+    if numpy is not None:
+        return numpy.array(digests, dtype=numpy.int64)
+    return array.array('q', digests)
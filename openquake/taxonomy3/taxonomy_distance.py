@@ -0,0 +1,253 @@
+#!/usr/bin/env python
+"""
+Similarity distance between taxonomies, for nearest-match lookups.
+
+The distance is the weighted sum, over the attributes of
+taxonomy_categorical, of a per-attribute distance that follows the
+hierarchy of taxtweb_head/taxtweb_maps:
+
+    0      same atom
+    0.5    siblings (like 'CR' and 'SRC' that share the technologies
+           of mat_tech_grp, or two technologies of the same group) or
+           one of the two atoms is unknown (like 'CT99')
+    1      different atoms or attribute present in one taxonomy only
+
+TaxonomyMatcher precomputes the codes of a library of taxonomies and
+finds the nearest library entry of many taxonomies at once:
+
+    matcher = TaxonomyMatcher(library)
+    indexes, distances = matcher.nearest(taxonomies)
+"""
+from openquake.taxonomy3.taxtweb_eng import Taxonomy, ENGINE_SIMDOM
+from openquake.taxonomy3.taxtweb_maps import (
+    mat_tech_grp, mat_prop_grp, mat_tead_grp, llrs_type_grp, llrs_duct_grp,
+    occu_spec_grp, roof_sys_grp, floo_conn_grp)
+from openquake.taxonomy3.taxtweb_head import (
+    mat_tech, occu_spec, roof_sys, floo_conn)
+from openquake.taxonomy3.taxonomy_categorical import (
+    CATEGORICAL_ATTRIBUTES, categorical_row, taxonomy_categorical)
+from openquake.taxonomy3.taxonomy_record import TAXONOMY_BLOCKS
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+INF = float('inf')
+
+# attributes not listed have weight 1
+DISTANCE_WEIGHTS = {
+    'material_x': 4.0, 'material_y': 4.0,
+    'llrs_x': 3.0, 'llrs_y': 3.0,
+    'material_technology_x': 2.0, 'material_technology_y': 2.0,
+    'storeys_above': 2.0,
+    'occupancy': 2.0,
+}
+
+# attribute -> (groups of the children, None) or (None, parent -> children)
+_HIERARCHY = {
+    'material_technology': (mat_tech_grp, None),
+    'material_properties': (mat_prop_grp, None),
+    'material_technology_add': (mat_tead_grp, None),
+    'llrs': (llrs_type_grp, None),
+    'llrs_ductility': (llrs_duct_grp, None),
+    'occupancy_detail': (occu_spec_grp, None),
+    'roof_system': (roof_sys_grp, None),
+    'floor_system': (floo_conn_grp, None),
+    'material': (None, mat_tech),
+    'occupancy': (None, occu_spec),
+    'roof_material': (None, roof_sys),
+    'floor_material': (None, floo_conn),
+}
+
+
+def _groups(attribute, atoms):
+    """return the sibling group of each atom of an attribute (None if the
+atom has no siblings)"""
+    key = attribute[:-2] if attribute[-2:] in ('_x', '_y') else attribute
+    grps, children = _HIERARCHY.get(key, (None, None))
+    groups = []
+    for atom in atoms:
+        group = None
+        if grps is not None:
+            for grp_idx, items in enumerate(grps):
+                if items and atom in [item['id'] for item in items]:
+                    group = grp_idx
+                    break
+        elif children is not None and children.get(atom):
+            # parents with the same list of children are siblings
+            group = id(children[atom])
+        groups.append(group)
+    return groups
+
+
+def attribute_distances(attribute):
+    """
+return the table of the distances between the codes of an attribute,
+indexed by code + 1 (row and column 0 are the absent attribute)
+"""
+    atoms = CATEGORICAL_ATTRIBUTES[attribute][1]
+    groups = _groups(attribute, atoms)
+    unknown = [atom in Taxonomy.UNKNOWN_ATOMS for atom in atoms]
+
+    size = len(atoms) + 1
+    table = [[1.0] * size for _ in range(size)]
+    table[0][0] = 0.0
+    for i in range(len(atoms)):
+        for j in range(len(atoms)):
+            if i == j:
+                dist = 0.0
+            elif (unknown[i] or unknown[j] or
+                  (groups[i] is not None and groups[i] == groups[j])):
+                dist = 0.5
+            else:
+                dist = 1.0
+            table[i + 1][j + 1] = dist
+    return table
+
+
+def _weights(weights):
+    if weights is None:
+        weights = DISTANCE_WEIGHTS
+    return [weights.get(attribute, 1.0)
+            for attribute in CATEGORICAL_ATTRIBUTES]
+
+
+_TABLES = [attribute_distances(attribute)
+           for attribute in CATEGORICAL_ATTRIBUTES]
+
+
+def codes_distance(codes_a, codes_b, weights=None):
+    """return the distance between two tuples of codes (as returned by
+categorical_row)"""
+    return sum(weight * table[a + 1][b + 1] for weight, table, a, b in zip(
+        _weights(weights), _TABLES, codes_a, codes_b))
+
+
+def taxonomy_distance(record_a, record_b, weights=None):
+    """
+return the distance between two parsed taxonomies (TaxonomyRecord or full
+strings)
+    weights:   dict attribute -> weight, DISTANCE_WEIGHTS by default
+ValueError is raised if a taxonomy is not in the full form
+"""
+    rows = []
+    for record in (record_a, record_b):
+        taxt_full = str(record)
+        if taxt_full.count('/') != TAXONOMY_BLOCKS - 1:
+            raise ValueError("Taxonomy '%s' is not in the full form" %
+                             taxt_full)
+        rows.append(categorical_row(taxt_full))
+    return codes_distance(rows[0], rows[1], weights)
+
+
+class TaxonomyMatcher(object):
+    """one-to-many distances between taxonomies (in any form) and a library
+of taxonomies, the invalid taxonomies of the library are never matched"""
+    CHUNKSIZE = 4096
+
+    def __init__(self, library, weights=None, engine=ENGINE_SIMDOM):
+        self.engine = engine
+        columns, _ = taxonomy_categorical(library, engine)
+        self.size = len(columns['material_x'])
+        self._weights = _weights(weights)
+        # codes of the library, one list per attribute
+        self._codes = [list(column) for column in columns.values()]
+        self._valid = [any(codes[row] != -1 for codes in self._codes)
+                       for row in range(self.size)]
+        if numpy is not None:
+            self._numpy_init()
+
+    def _numpy_init(self):
+        # the distance is a matrix product: each query is turned in the
+        # concatenation of the rows of the (weighted) tables of its codes,
+        # restricted to the codes used by the library, and each library
+        # entry in the one-hot vector of its codes
+        self._tables = []
+        onehots = []
+        for codes, table, weight in zip(self._codes, _TABLES, self._weights):
+            codes = numpy.array(codes, dtype=numpy.int16) + 1
+            used, inverse = numpy.unique(codes, return_inverse=True)
+            self._tables.append(
+                numpy.array(table, dtype=numpy.float32)[:, used] * weight)
+            onehot = numpy.zeros((len(used), self.size), dtype=numpy.float32)
+            onehot[inverse.reshape(-1), numpy.arange(self.size)] = 1
+            onehots.append(onehot)
+        self._onehot = numpy.concatenate(onehots)
+        self._penalty = numpy.where(numpy.array(self._valid, dtype=bool),
+                                    numpy.float32(0), numpy.float32(INF))
+
+    def _queries_codes(self, taxonomies):
+        """return the rows of codes of a list of taxonomies (all -1 for
+the invalid ones)"""
+        columns, _ = taxonomy_categorical(taxonomies, self.engine)
+        return list(zip(*columns.values()))
+
+    def _row_distance(self, row, lib_row):
+        if not self._valid[lib_row]:
+            return INF
+        return sum(weight * table[code + 1][codes[lib_row] + 1]
+                   for weight, table, code, codes in zip(
+                       self._weights, _TABLES, row, self._codes))
+
+    def _numpy_distances(self, rows):
+        queries = numpy.array(rows, dtype=numpy.int16).reshape(
+            len(rows), len(CATEGORICAL_ATTRIBUTES)) + 1
+        weighted = numpy.concatenate(
+            [table[queries[:, attr_idx]]
+             for attr_idx, table in enumerate(self._tables)], axis=1)
+        return weighted.dot(self._onehot) + self._penalty
+
+    def distances(self, taxt):
+        """return the list of the distances between a taxonomy and each
+entry of the library (None if the taxonomy is not valid)"""
+        row = self._queries_codes([taxt])[0]
+        if all(code == -1 for code in row):
+            return None
+        if numpy is not None:
+            return [float(dist) for dist in self._numpy_distances([row])[0]]
+        return [self._row_distance(row, lib_row)
+                for lib_row in range(self.size)]
+
+    def nearest(self, taxonomies):
+        """
+return (indexes, distances): for each taxonomy the index of the nearest
+entry of the library and its distance (-1 and inf if the taxonomy is
+not valid or if the library has no valid entries)
+"""
+        return self.nearest_codes(self._queries_codes(list(taxonomies)))
+
+    def nearest_codes(self, rows):
+        """
+nearest() for taxonomies already coded: rows is a sequence (or a 2D
+array) with a row of codes (in CATEGORICAL_ATTRIBUTES order, all -1 for
+invalid taxonomies) for each taxonomy, like the columns returned by
+taxonomy_categorical stacked as columns
+"""
+        if numpy is not None:
+            rows = numpy.array(rows, dtype=numpy.int16).reshape(
+                len(rows), len(CATEGORICAL_ATTRIBUTES))
+            indexes = numpy.full(len(rows), -1, dtype=numpy.int64)
+            distances = numpy.full(len(rows), INF)
+            valid = numpy.flatnonzero((rows != -1).any(axis=1))
+            if self.size:
+                for start in range(0, len(valid), self.CHUNKSIZE):
+                    chunk = valid[start:start + self.CHUNKSIZE]
+                    dists = self._numpy_distances(rows[chunk])
+                    best = dists.argmin(axis=1)
+                    best_dists = dists[numpy.arange(len(chunk)), best]
+                    found = best_dists < INF
+                    indexes[chunk[found]] = best[found]
+                    distances[chunk[found]] = best_dists[found]
+            return (indexes.tolist(), distances.tolist())
+
+        indexes = [-1] * len(rows)
+        distances = [INF] * len(rows)
+        valid = [i for i, row in enumerate(rows)
+                 if any(code != -1 for code in row)]
+        for i in valid:
+            for lib_row in range(self.size):
+                dist = self._row_distance(rows[i], lib_row)
+                if dist < distances[i]:
+                    indexes[i], distances[i] = lib_row, dist
+        return (indexes, distances)
@@ -0,0 +1,177 @@
+#!/usr/bin/env python
+"""
+Inverted faceted index of a list of taxonomies.
+
+Each atom of the normalized taxonomies is mapped, for its Taxonomy.POS_*
+block, to the sorted ids (positions in the input list) of the rows that
+use it, stored delta and varint encoded. The atoms with parameters are
+indexed by name too ('IRPP' for 'IRPP:TOR') and the numeric height and
+date parameters can be queried by range:
+
+    index = TaxonomyIndex(taxonomies)
+    rows = rows_intersection(
+        index.rows(Taxonomy.POS_DX_LMAT, 'CR'),
+        index.rows(Taxonomy.POS_DX_LLRS, 'LFINF'),
+        index.range('storeys_above', lo=6))
+    index.save('exposure.idx')
+    index = TaxonomyIndex.load('exposure.idx')
+"""
+import array
+import bisect
+import collections
+import pickle
+from openquake.taxonomy3.taxtweb_eng import (
+    taxonomy_process_many, ENGINE_SIMDOM)
+from openquake.taxonomy3.taxonomy_record import taxonomy_parse
+from openquake.taxonomy3.taxonomy_numeric import (
+    taxonomy_numeric, NUMERIC_ATTRIBUTES)
+
+
+def _rows_array(rows=()):
+    return array.array('l', rows)
+
+
+def rows_pack(rows):
+    """return the delta and varint encoded bytes of sorted row ids"""
+    data = bytearray()
+    prev = 0
+    for row in rows:
+        delta = row - prev
+        prev = row
+        while delta >= 0x80:
+            data.append((delta & 0x7f) | 0x80)
+            delta >>= 7
+        data.append(delta)
+    return bytes(data)
+
+
+def rows_unpack(data):
+    """return the array of row ids encoded by rows_pack"""
+    rows = _rows_array()
+    row = delta = shift = 0
+    for byte in data:
+        delta |= (byte & 0x7f) << shift
+        if byte & 0x80:
+            shift += 7
+        else:
+            row += delta
+            rows.append(row)
+            delta = shift = 0
+    return rows
+
+
+def rows_intersection(*rows_list):
+    """return the sorted array of the row ids present in all the sorted
+arrays of rows_list"""
+    if not rows_list:
+        return _rows_array()
+    rows_list = sorted(rows_list, key=len)
+    others = [set(rows) for rows in rows_list[1:]]
+    return _rows_array(row for row in rows_list[0]
+                       if all(row in rows for rows in others))
+
+
+def rows_union(*rows_list):
+    """return the sorted array of the row ids present in at least one of
+the arrays of rows_list"""
+    return _rows_array(sorted(set().union(*rows_list)))
+
+
+class TaxonomyIndex(object):
+    """inverted index of the atoms and of the numeric parameters of a list
+of taxonomies (in any form), each distinct taxonomy is normalized once and
+the rows of the invalid taxonomies are listed by 'invalid'"""
+    VERSION = 1
+
+    def __init__(self, taxonomies=(), engine=ENGINE_SIMDOM):
+        taxonomies = list(taxonomies)
+        self.size = len(taxonomies)
+
+        distinct = collections.OrderedDict()
+        for row, taxt in enumerate(taxonomies):
+            distinct.setdefault(taxt, []).append(row)
+
+        postings = collections.defaultdict(list)
+        taxts_full = [''] * self.size
+        invalid = []
+        for taxt, taxt_full, err in taxonomy_process_many(
+                list(distinct), 0, engine):
+            rows = distinct[taxt]
+            if err is not None:
+                invalid.extend(rows)
+                continue
+            for row in rows:
+                taxts_full[row] = taxt_full
+            for pos, blk in enumerate(taxonomy_parse(taxt_full)):
+                for atom in blk:
+                    postings[(pos, atom.text)].extend(rows)
+                    if atom.params:
+                        postings[(pos, atom.name)].extend(rows)
+
+        self.invalid = _rows_array(sorted(invalid))
+        self._postings = dict((key, rows_pack(sorted(rows)))
+                              for key, rows in postings.items())
+
+        # attribute -> (sorted lower bounds, rows in the same order,
+        #               upper bound of each row)
+        self._numeric = {}
+        for attribute, column in taxonomy_numeric(taxts_full).items():
+            order = sorted((lo, row) for row, lo in enumerate(column.lo)
+                           if lo == lo)
+            self._numeric[attribute] = (
+                array.array('d', [lo for lo, _ in order]),
+                _rows_array(row for _, row in order),
+                array.array('d', column.hi))
+
+    def atoms(self, pos):
+        """return the sorted list of the atoms indexed for a block"""
+        return sorted(atom for atom_pos, atom in self._postings
+                      if atom_pos == pos)
+
+    def rows(self, pos, atom):
+        """return the sorted array of the rows that use an atom (or an atom
+name, like 'HBET') in the block at pos"""
+        data = self._postings.get((pos, atom))
+        return _rows_array() if data is None else rows_unpack(data)
+
+    def count(self, pos, atom):
+        return len(self.rows(pos, atom))
+
+    def range(self, attribute, lo=None, hi=None):
+        """
+return the sorted array of the rows with the known bounds of a numeric
+attribute (see taxonomy_numeric.NUMERIC_ATTRIBUTES) included in [lo, hi],
+a missing limit is not checked
+"""
+        if attribute not in NUMERIC_ATTRIBUTES:
+            raise KeyError(attribute)
+        los, order, his = self._numeric[attribute]
+        if lo is not None:
+            rows = order[bisect.bisect_left(los, lo):]
+        elif hi is not None:
+            # the atoms with just the upper bound have no lower bound
+            rows = range(self.size)
+        else:
+            rows = [row for row, row_hi in enumerate(his) if row_hi == row_hi]
+        if hi is not None:
+            rows = [row for row in rows if his[row] <= hi]
+        return _rows_array(sorted(rows))
+
+    def save(self, filename):
+        with open(filename, 'wb') as f:
+            pickle.dump((self.VERSION, self.size, self.invalid,
+                         self._postings, self._numeric), f,
+                        pickle.HIGHEST_PROTOCOL)
+
+    @classmethod
+    def load(cls, filename):
+        """return the index saved in a file by 'save' (the file must be
+trusted, it is a pickle)"""
+        with open(filename, 'rb') as f:
+            data = pickle.load(f)
+        if data[0] != cls.VERSION:
+            raise ValueError("Unsupported index version %r" % (data[0],))
+        index = cls.__new__(cls)
+        (_, index.size, index.invalid, index._postings,
+         index._numeric) = data
+        return index
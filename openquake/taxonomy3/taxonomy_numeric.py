@@ -0,0 +1,143 @@
+#!/usr/bin/env python
+"""
+Numeric columns of the height and date parameters of taxonomies.
+
+taxonomy_numeric() turns a sequence of normalized taxonomies (any output
+type) in a dict attribute -> NumericColumn, each column holds the lower
+bound, the upper bound (NaN if unknown) and the kind (index of the atom
+in its taxtweb_maps list, -1 for invalid taxonomies) of every row:
+
+    columns = taxonomy_numeric(taxonomies)
+    # with NumPy, 3 to 7 storeys built before 1980
+    mask = (taxonomy_numeric_select(columns['storeys_above'], 3, 7) &
+            taxonomy_numeric_select(columns['date'], hi=1979))
+
+Arrays are NumPy arrays if NumPy is available, stdlib arrays otherwise.
+"""
+import array
+import collections
+from openquake.taxonomy3.taxtweb_eng import Taxonomy
+from openquake.taxonomy3.taxtweb_maps import (
+    h_aboveground, h_belowground, h_abovegrade, h_slope, date_type)
+from openquake.taxonomy3.taxonomy import taxonomy_short2full
+from openquake.taxonomy3.taxonomy_record import (
+    taxonomy_block, TAXONOMY_BLOCKS)
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+NAN = float('nan')
+
+NumericColumn = collections.namedtuple('NumericColumn', ['lo', 'hi', 'kind'])
+
+# attribute -> (block position, atoms list, kind of the atoms with only
+#               the upper bound)
+NUMERIC_ATTRIBUTES = collections.OrderedDict([
+    ('storeys_above', (Taxonomy.POS_HEIGHT, h_aboveground, ())),
+    ('storeys_below', (Taxonomy.POS_HEIGHT, h_belowground, ())),
+    ('height_grade', (Taxonomy.POS_HEIGHT, h_abovegrade, ())),
+    ('slope', (Taxonomy.POS_HEIGHT, h_slope, ())),
+    ('date', (Taxonomy.POS_DATE, date_type, ('YPRE',))),
+])
+
+# atom -> (attribute index, kind, upper bound only)
+_NUMERIC_ATOMS = dict(
+    (atom['id'], (attr_idx, kind, atom['id'] in upper_only))
+    for attr_idx, (pos, atoms, upper_only) in enumerate(
+        NUMERIC_ATTRIBUTES.values())
+    for kind, atom in enumerate(atoms))
+
+_NUMERIC_POSITIONS = sorted(set(
+    pos for pos, _, _ in NUMERIC_ATTRIBUTES.values()))
+
+_ROW_UNKNOWN = (NAN, NAN, 0) * len(NUMERIC_ATTRIBUTES)
+_ROW_INVALID = (NAN, NAN, -1) * len(NUMERIC_ATTRIBUTES)
+
+
+def _numeric_row(taxt):
+    """return the flat (lo, hi, kind, lo, hi, kind, ...) tuple of a
+normalized taxonomy"""
+    if not taxt:
+        return _ROW_INVALID
+    blks = taxt.split('/')
+    if len(blks) != TAXONOMY_BLOCKS:
+        try:
+            ret = taxonomy_short2full(taxt)
+        except IndexError:
+            # too many items, the reference engine fails too
+            return _ROW_INVALID
+        if ret.result is None:
+            return _ROW_INVALID
+        blks = ret.result.split('/')
+
+    row = list(_ROW_UNKNOWN)
+    for pos in _NUMERIC_POSITIONS:
+        for atom in taxonomy_block(blks[pos]):
+            numeric = _NUMERIC_ATOMS.get(atom.name)
+            if numeric is None:
+                continue
+            attr_idx, kind, upper_only = numeric
+            try:
+                values = atom.values
+            except ValueError:
+                return _ROW_INVALID
+            if len(values) == 2:
+                lo, hi = min(values), max(values)
+            elif len(values) == 1:
+                lo = NAN if upper_only else values[0]
+                hi = values[0]
+            else:
+                lo = hi = NAN
+            row[attr_idx * 3:attr_idx * 3 + 3] = (lo, hi, kind)
+    return tuple(row)
+
+
+def _column(typecode, values):
+    if numpy is not None:
+        return numpy.array(values, dtype=(
+            numpy.float64 if typecode == 'd' else numpy.int8))
+    return array.array(typecode, values)
+
+
+def taxonomy_numeric(taxonomies):
+    """
+return a dict attribute -> NumericColumn(lo, hi, kind) with the height
+and date parameters of a sequence of normalized taxonomies, each
+distinct taxonomy is parsed only once
+"""
+    rows = {}
+    cols = []
+    for taxt in taxonomies:
+        row = rows.get(taxt)
+        if row is None:
+            row = rows[taxt] = _numeric_row(taxt)
+        cols.append(row)
+
+    cols = list(zip(*cols)) if cols else [()] * len(_ROW_INVALID)
+    columns = collections.OrderedDict()
+    for attr_idx, attribute in enumerate(NUMERIC_ATTRIBUTES):
+        lo, hi, kind = cols[attr_idx * 3:attr_idx * 3 + 3]
+        columns[attribute] = NumericColumn(
+            _column('d', lo), _column('d', hi), _column('b', kind))
+    return columns
+
+
+def taxonomy_numeric_select(column, lo=None, hi=None):
+    """
+return the mask of the rows of a NumericColumn with the known bounds
+included in [lo, hi] (a missing limit is not checked), a NumPy boolean
+array or, without NumPy, a stdlib array of 0/1
+"""
+    if numpy is not None:
+        mask = numpy.ones(len(column.kind), dtype=bool)
+        if lo is not None:
+            mask &= column.lo >= lo
+        if hi is not None:
+            mask &= column.hi <= hi
+        return mask
+
+    return array.array('b', (
+        (lo is None or col_lo >= lo) and (hi is None or col_hi <= hi)
+        for col_lo, col_hi in zip(column.lo, column.hi)))
@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+"""
+Structured form of the full taxonomy strings.
+
+A full string (as returned by the engines with the "full" output type)
+is parsed once in a TaxonomyRecord, a tuple indexed by the Taxonomy.POS_*
+constants where each item is the tuple of the TaxonomyAtom of the block:
+
+    record = taxonomy_parse('DX+D99/CR+CT99/L99/DY+D99/CR+CT99/L99/'
+                            'HBET:1,3+HB99+HF99+HD99/Y99/...')
+    record[Taxonomy.POS_HEIGHT][0]  ->  TaxonomyAtom(text='HBET:1,3',
+                                                     name='HBET',
+                                                     params=('1', '3'))
+    record.atom(Taxonomy.POS_HEIGHT, 'HBET').values  ->  (1, 3)
+    str(record)  ->  the original full string
+"""
+import collections
+from openquake.taxonomy3.taxtweb_eng import (
+    Taxonomy, taxonomy_process, ENGINE_SIMDOM)
+
+TAXONOMY_BLOCKS = Taxonomy.POS_FOUNDATION + 1
+
+# atoms with numeric parameters
+_NUMERIC_ATOMS = frozenset(Taxonomy.ATOM_TYPE_VALUE +
+                           Taxonomy.ATOM_TYPE_RANGE)
+
+
+def _number(s):
+    try:
+        return int(s)
+    except ValueError:
+        return float(s)
+
+
+class TaxonomyAtom(collections.namedtuple('TaxonomyAtom',
+                                          'text name params')):
+    """
+immutable atom of a taxonomy block
+    text:      the atom as in the string (like 'HBET:3,1')
+    name:      the atom without parameters (like 'HBET')
+    params:    tuple of the parameters as strings (like ('3', '1'))
+"""
+    __slots__ = ()
+
+    @property
+    def values(self):
+        """the parameters, converted to int or float for the numeric
+atoms (heights and dates)"""
+        if self.name in _NUMERIC_ATOMS:
+            return tuple(_number(param) for param in self.params)
+        return self.params
+
+    def is_unknown(self):
+        return self.text in Taxonomy.UNKNOWN_ATOMS
+
+
+def taxonomy_atom(text):
+    """return the TaxonomyAtom of an atom string"""
+    name, sep, params = text.partition(':')
+    return TaxonomyAtom(text, name,
+                        tuple(params.split(',')) if sep else ())
+
+
+def taxonomy_block(blk):
+    """return the tuple of TaxonomyAtom of a block string ('+' separated
+atoms), a tuple of atoms is returned as is"""
+    if isinstance(blk, tuple):
+        return blk
+    return tuple(taxonomy_atom(atom) for atom in blk.split('+'))
+
+
+class TaxonomyRecord(tuple):
+    """
+immutable parsed full taxonomy string, indexed by the Taxonomy.POS_*
+constants, each item is the tuple of the TaxonomyAtom of the block
+"""
+    __slots__ = ()
+
+    def __str__(self):
+        return '/'.join('+'.join(atom.text for atom in blk) for blk in self)
+
+    def names(self, pos):
+        """return the names of the atoms of the block at pos"""
+        return tuple(atom.name for atom in self[pos])
+
+    def atom(self, pos, name):
+        """return the atom called name of the block at pos or None"""
+        for atom in self[pos]:
+            if atom.name == name:
+                return atom
+        return None
+
+
+def taxonomy_parse(taxt_full):
+    """
+return the TaxonomyRecord of a full taxonomy string, ValueError is
+raised if the string has not the blocks of the full form
+"""
+    blks = taxt_full.split('/')
+    if len(blks) != TAXONOMY_BLOCKS:
+        raise ValueError("Full taxonomy with %d blocks instead of %d: '%s'" %
+                         (len(blks), TAXONOMY_BLOCKS, taxt_full))
+    return TaxonomyRecord(taxonomy_block(blk) for blk in blks)
+
+
+def taxonomy_record(taxt_in, engine=ENGINE_SIMDOM, cache=None):
+    """
+normalize a taxonomy string and return it parsed as (record, None) or
+(None, error) if the string is not valid
+    engine:    the engine used by taxonomy_process
+    cache:     optional TaxonomyCache used by taxonomy_process
+"""
+    taxt_full, err = taxonomy_process(taxt_in, 0, engine, cache)
+    if err is not None:
+        return (None, err)
+    return (taxonomy_parse(taxt_full), None)
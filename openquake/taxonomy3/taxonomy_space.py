@@ -0,0 +1,282 @@
+#!/usr/bin/env python
+"""
+Lazy enumeration of the space of the valid taxonomies.
+
+The space is the set of the states of the dropdowns of the engine (see
+TaxtValues in taxtweb_tables) allowed by the dependencies of taxtweb_head
+(the technologies of a material, the ductility of a LLRS, the roof
+systems of a roof material, ...). It is the product of independent
+factors (direction, structural system of each direction, height, date,
+occupancy, ...), so it is counted and indexed without materializing it:
+
+    space = TaxonomySpace()
+    space.count()                        # size of the space
+    for taxt in space.taxonomies(2):     # every valid taxonomy, lazily
+        ...
+    space.get(12345, 0)                  # a single taxonomy by index
+    space.sample(100)                    # 100 random taxonomies
+    space.stratified(10, 'MaterialCB11') # 10 for each material (x)
+
+Numeric atoms (height and date) are set with the parameters of
+SPACE_PARAMS, a combination is the choice of the kind of the atoms.
+"""
+import itertools
+import random
+import sys
+from openquake.taxonomy3.taxtweb_tables import (
+    TaxtValues, build_taxonomy_string, material_ids, mat_tech_ids,
+    mat_tead_ids, mat_prop_ids, llrs_type_ids, llrs_duct_ids,
+    h_aboveground_ids, h_belowground_ids, h_abovegrade_ids, h_slope_ids,
+    date_type_ids, occu_type_ids, occu_spec_ids, bupo_type_ids,
+    plsh_type_ids, stir_type_ids, plan_irre_ids, plan_seco_ids,
+    vert_irre_ids, vert_seco_ids, wall_type_ids, roof_shap_ids,
+    roof_cove_ids, roof_mate_ids, roof_sys_ids, roof_conn_ids,
+    floo_syma_ids, floo_conn_ids, floo_syty_ids, foun_type_ids)
+
+# parameters of the numeric atoms: (first, second) value of each
+# HeightCBx and of DateCB1 (the second is used by the ranges only)
+SPACE_PARAMS = {
+    'HeightCB1': ('2', '5'),
+    'HeightCB2': ('1', '2'),
+    'HeightCB3': ('1.5', None),
+    'HeightCB4': ('15', None),
+    'DateCB1': ('1980', '1990'),
+}
+
+_HEIGHT_FIELDS = (('HeightCB1', 'noStoreysE11', 'noStoreysE12'),
+                  ('HeightCB2', 'noStoreysE21', 'noStoreysE22'),
+                  ('HeightCB3', 'noStoreysE31', 'noStoreysE32'),
+                  ('HeightCB4', 'noStoreysE41', None))
+
+
+def _dep(ids):
+    """return the values of a dropdown that depends on another one (-1
+if it is empty)"""
+    return range(len(ids)) if ids else (-1,)
+
+
+def _single(field, ids):
+    return [((field, val),) for val in range(len(ids))]
+
+
+def _structural(sfx):
+    options = []
+    for mat, mat_id in enumerate(material_ids):
+        for tech, tead, prop, llrs in itertools.product(
+                _dep(mat_tech_ids[mat_id]), _dep(mat_tead_ids[mat_id]),
+                _dep(mat_prop_ids[mat_id]), _dep(llrs_type_ids[mat_id])):
+            llrs_id = llrs_type_ids[mat_id][llrs]
+            for duct in _dep(llrs_duct_ids[llrs_id]):
+                options.append((
+                    ('MaterialCB1' + sfx, mat), ('MaterialCB2' + sfx, tech),
+                    ('MaterialCB3' + sfx, prop), ('MaterialCB4' + sfx, tead),
+                    ('SystemCB1' + sfx, llrs), ('SystemCB2' + sfx, duct)))
+    return options
+
+
+def _height_atom(grp, kind, params):
+    cb, e1, e2 = _HEIGHT_FIELDS[grp]
+    first, second = params[cb]
+    atom = [(cb, kind)]
+    if kind > 0:
+        atom.append((e1, first))
+    # ranges are [unknown, range, exact, approximate], but slope is
+    # [unknown, value]
+    if kind == 1 and e2 is not None:
+        atom.append((e2, second))
+    return atom
+
+
+def _height(params):
+    # ranges of ground floor level always fail in the reference engine
+    kinds = (range(1, len(h_aboveground_ids)),
+             range(len(h_belowground_ids)),
+             [kind for kind in range(len(h_abovegrade_ids)) if kind != 1],
+             range(len(h_slope_ids)))
+    # unknown height doesn't show the other groups
+    options = [tuple((cb, 0) for cb, _, _ in _HEIGHT_FIELDS)]
+    for grp_kinds in itertools.product(*kinds):
+        options.append(tuple(itertools.chain(*[
+            _height_atom(grp, kind, params)
+            for grp, kind in enumerate(grp_kinds)])))
+    return options
+
+
+def _date(params):
+    # items are [unknown, exact, range, latest, approximate]
+    first, second = params['DateCB1']
+    options = [(('DateCB1', 0),)]
+    for kind in range(1, len(date_type_ids)):
+        option = [('DateCB1', kind), ('DateE1', first)]
+        if kind == 2:
+            option.append(('DateE2', second))
+        options.append(tuple(option))
+    return options
+
+
+def _occupancy():
+    return [(('OccupancyCB1', occu), ('OccupancyCB2', spec))
+            for occu, occu_id in enumerate(occu_type_ids)
+            for spec in ((-1,) if occu == 0 else
+                         _dep(occu_spec_ids[occu_id]))]
+
+
+def _regularity():
+    options = []
+    for stir in range(len(stir_type_ids)):
+        if stir != 2:
+            options.append((('RegularityCB1', stir),
+                            ('RegularityCB2', -1), ('RegularityCB3', -1),
+                            ('RegularityCB4', -1), ('RegularityCB5', -1)))
+            continue
+        # secondary irregularities only with a primary one
+        for plir, veir in itertools.product(range(len(plan_irre_ids)),
+                                            range(len(vert_irre_ids))):
+            for plse, vese in itertools.product(
+                    range(len(plan_seco_ids)) if plir > 0 else (-1,),
+                    range(len(vert_seco_ids)) if veir > 0 else (-1,)):
+                options.append((('RegularityCB1', stir),
+                                ('RegularityCB2', plir),
+                                ('RegularityCB3', veir),
+                                ('RegularityCB4', plse),
+                                ('RegularityCB5', vese)))
+    return options
+
+
+def _roof():
+    return [(('RoofCB1', shap), ('RoofCB2', cove), ('RoofCB3', mate),
+             ('RoofCB4', sys), ('RoofCB5', conn))
+            for shap, cove, conn in itertools.product(
+                range(len(roof_shap_ids)), range(len(roof_cove_ids)),
+                range(len(roof_conn_ids)))
+            for mate, mate_id in enumerate(roof_mate_ids)
+            for sys in _dep(roof_sys_ids[mate_id])]
+
+
+def _floor():
+    return [(('FloorCB1', syma), ('FloorCB2', conn), ('FloorCB3', syty))
+            for syma, syma_id in enumerate(floo_syma_ids)
+            for conn in _dep(floo_conn_ids[syma_id])
+            for syty in range(len(floo_syty_ids))]
+
+
+def _sample_indexes(rng, count, k):
+    """return k distinct random integers of range(count), also when
+count doesn't fit in a ssize_t"""
+    if count <= sys.maxsize:
+        return rng.sample(range(count), k)
+    if k < 0:
+        raise ValueError("Sample larger than population or is negative")
+    indexes = {}
+    while len(indexes) < k:
+        indexes.setdefault(rng.randrange(count), len(indexes))
+    return sorted(indexes, key=indexes.get)
+
+
+class TaxonomySpace(object):
+    """the space of the valid taxonomies as a product of independent
+factors, each factor is a list of options and each option a tuple of
+(TaxtValues field, value) pairs"""
+    def __init__(self, params=None):
+        space_params = dict(SPACE_PARAMS)
+        space_params.update(params or {})
+        self.factors = [
+            ('direction', _single('Direction1RB', (0, 1))),
+            ('structural_x', _structural('1')),
+            ('structural_y', _structural('2')),
+            ('height', _height(space_params)),
+            ('date', _date(space_params)),
+            ('occupancy', _occupancy()),
+            ('position', _single('PositionCB', bupo_type_ids)),
+            ('plan_shape', _single('PlanShapeCB', plsh_type_ids)),
+            ('irregularity', _regularity()),
+            ('exterior_walls', _single('WallsCB', wall_type_ids)),
+            ('roof', _roof()),
+            ('floor', _floor()),
+            ('foundation', _single('FoundationsCB', foun_type_ids)),
+        ]
+
+    def count(self):
+        """return the number of valid taxonomies (a Python int)"""
+        count = 1
+        for _, options in self.factors:
+            count *= len(options)
+        return count
+
+    @staticmethod
+    def _values(options):
+        v = TaxtValues()
+        for option in options:
+            for field, value in option:
+                setattr(v, field, value)
+        return v
+
+    def values(self):
+        """generator of the TaxtValues of all the valid taxonomies"""
+        for options in itertools.product(
+                *[options for _, options in self.factors]):
+            yield self._values(options)
+
+    def taxonomies(self, type_out=0):
+        """
+generator of all the valid taxonomies
+    type_out:  0: "full", 1: "without unknown", 2: "short"
+"""
+        for v in self.values():
+            yield build_taxonomy_string(v, type_out)
+
+    def _options(self, index, factors):
+        # mixed radix, the last factor changes faster (as in values())
+        options = []
+        for _, factor_options in reversed(factors):
+            index, option_idx = divmod(index, len(factor_options))
+            options.append(factor_options[option_idx])
+        options.reverse()
+        return options
+
+    def get_values(self, index):
+        """return the TaxtValues of the taxonomy at a position of the
+values() sequence"""
+        if not 0 <= index < self.count():
+            raise IndexError("Taxonomy index %d out of range" % index)
+        return self._values(self._options(index, self.factors))
+
+    def get(self, index, type_out=0):
+        """return the taxonomy at a position of the taxonomies()
+sequence"""
+        return build_taxonomy_string(self.get_values(index), type_out)
+
+    def sample(self, k, type_out=0, rng=random):
+        """return a list of k distinct random taxonomies (rng is an
+instance of random.Random or the random module)"""
+        return [self.get(index, type_out)
+                for index in _sample_indexes(rng, self.count(), k)]
+
+    def stratified(self, k, field, type_out=0, rng=random):
+        """
+return a dict value -> list of up to k distinct random taxonomies with
+that value of a TaxtValues integer field (like 'MaterialCB11' or
+'OccupancyCB1')
+"""
+        for factor_idx, (_, options) in enumerate(self.factors):
+            if any(fld == field for fld, _ in options[0]):
+                break
+        else:
+            raise ValueError("Unknown field '%s'" % field)
+
+        strata = {}
+        for option in options:
+            strata.setdefault(dict(option)[field], []).append(option)
+
+        samples = {}
+        for value, stratum_options in sorted(strata.items()):
+            factors = list(self.factors)
+            factors[factor_idx] = (factors[factor_idx][0], stratum_options)
+            count = 1
+            for _, factor_options in factors:
+                count *= len(factor_options)
+            samples[value] = [
+                build_taxonomy_string(
+                    self._values(self._options(index, factors)), type_out)
+                for index in _sample_indexes(rng, count, min(k, count))]
+        return samples
@@ -0,0 +1,536 @@
+#!/usr/bin/env python
+"""
+Validation of taxonomies that collects all the problems.
+
+Taxonomy.process stops at the first problem and returns a free-text
+error, taxonomy_validate() goes through all the atoms and the sections
+and returns the list of all the problems, each one with a stable code
+(ERR_*), the block position (Taxonomy.POS_*, None for the unknown items
+of a taxonomy that is not in the full form) and the offending atom:
+
+    for taxt, problems in taxonomy_validate_many(taxonomies):
+        for problem in problems:
+            print(taxt, problem.code, problem.pos, problem.atom)
+
+The checks are the ones of Taxonomy.populate (plus the inputs that make
+the engine fail with an exception), in the same order: the message of
+the first problem is the error returned by the engine.
+
+taxonomy_gate() is a cheaper syntactic check to run in front of the
+engine: it returns the first problem found by a precompiled pattern of
+the items (derived from taxonomy_map) and by the checks of the values of
+height and date, or None if the engine has to process the taxonomy. A
+taxonomy is rejected only if the engine fails too, and the message of the
+problem is the error of the engine (as for taxonomy_validate).
+"""
+import re
+import collections
+from openquake.taxonomy3.taxonomy import (
+    taxonomy_short2full, taxonomy_prefix, PREFIX_POS)
+from openquake.taxonomy3.taxonomy_record import TAXONOMY_BLOCKS
+from openquake.taxonomy3.taxtweb_eng import (
+    Taxonomy, is_not_negative_int, is_not_negative_float,
+    is_in_rect_angle_float)
+from openquake.taxonomy3.taxtweb_tables import (
+    material_idx, mat_tech_idx, mat_tead_idx, mat_prop_idx, llrs_type_idx,
+    llrs_duct_idx, date_type_idx, occu_type_idx, occu_spec_idx,
+    bupo_type_idx, plsh_type_idx, stir_type_idx, plan_irre_idx,
+    plan_seco_idx, vert_irre_idx, vert_seco_idx, wall_type_idx,
+    roof_shap_idx, roof_cove_idx, roof_mate_idx, roof_sys_idx,
+    roof_conn_idx, floo_syma_idx, floo_conn_idx, floo_syty_idx,
+    foun_type_idx)
+
+TaxonomyProblem = collections.namedtuple(
+    'TaxonomyProblem', ['code', 'pos', 'atom', 'message'])
+
+ERR_EMPTY = 'empty'
+ERR_UNKNOWN_ITEM = 'unknown_item'
+ERR_ITEMS = 'items'
+ERR_DIRECTION = 'direction'
+ERR_MATERIAL = 'material'
+ERR_MATERIAL_SPEC = 'material_spec'
+ERR_LLRS = 'llrs'
+ERR_LLRS_SPEC = 'llrs_spec'
+ERR_HEIGHT = 'height'
+ERR_HEIGHT_VALUES = 'height_values'
+ERR_HEIGHT_VALUE = 'height_value'
+ERR_HEIGHT_RANGE = 'height_range'
+ERR_HEIGHT_UNSUPPORTED = 'height_unsupported'
+ERR_DATE = 'date'
+ERR_DATE_VALUES = 'date_values'
+ERR_DATE_VALUE = 'date_value'
+ERR_DATE_RANGE = 'date_range'
+ERR_OCCUPANCY = 'occupancy'
+ERR_OCCUPANCY_SPEC = 'occupancy_spec'
+ERR_POSITION = 'position'
+ERR_PLAN_SHAPE = 'plan_shape'
+ERR_IRREGULARITY = 'irregularity'
+ERR_IRREGULARITY_SPEC = 'irregularity_spec'
+ERR_IRREGULARITY_PAIR = 'irregularity_pair'
+ERR_EXTERIOR_WALLS = 'exterior_walls'
+ERR_ROOF = 'roof'
+ERR_FLOOR = 'floor'
+ERR_FOUNDATION = 'foundation'
+# unknown items found by taxonomy_gate with a known cause
+ERR_WHITESPACE = 'whitespace'
+ERR_LOWERCASE = 'lowercase'
+ERR_NUMBER = 'number'
+
+_DIRECTION_LABEL = ('X', 'Y')
+
+# height atoms: [unknown, range, exact, approximate] for each group, but
+# slope is [unknown, value]
+_H_MAP = ['H99', 'HBET', 'HEX', 'HAPP',
+          'HB99', 'HBBET', 'HBEX', 'HBAPP',
+          'HF99', 'HFBET', 'HFEX', 'HFAPP',
+          'HD99', None, 'HD']
+_H_TITLE = ['Number of storey above ground',
+            'Number of storey below ground',
+            'Height of ground floor level above grade',
+            'Slope of the ground']
+_H_TYPCK = [is_not_negative_int, is_not_negative_int,
+            is_not_negative_float, is_in_rect_angle_float]
+_H_TYPCK_S = ["positive integer", "positive integer", "positive real",
+              "positive real between 0 and 90"]
+_H_CONVF = [int, int, float, int]
+
+
+def _given(n):
+    # the engine fails with an exception building this message
+    return "%d %s given." % (n, "is" if n <= 1 else "are")
+
+
+def _problems_short(taxt, problems):
+    """return the full form of a taxonomy with the items that can't be
+identified (each one is added to problems) replaced by unknown values,
+None if nothing is left"""
+    # a trailing '/' is ignored (and removed by taxonomy_short2full)
+    tail = '/' if taxt[-1] == '/' else ''
+    items = taxt[:len(taxt) - len(tail)].split('/')
+    full = (len(items) == TAXONOMY_BLOCKS)
+    known = False
+    for i, item in enumerate(items):
+        if item in ('', 'PF', 'PO') or taxonomy_prefix(item) in PREFIX_POS:
+            known = known or item != ''
+        else:
+            problems.append(TaxonomyProblem(
+                ERR_UNKNOWN_ITEM, i if full else None, item,
+                "Unknown item '%s'" % item))
+            # an empty item is replaced by the unknown value of its place
+            items[i] = ''
+
+    if problems and not known:
+        return None
+    try:
+        return taxonomy_short2full('/'.join(items) + tail).result
+    except IndexError:
+        # the reference engine fails with an exception
+        problems.append(TaxonomyProblem(
+            ERR_ITEMS, None, taxt, "Too many items."))
+        return None
+
+
+def _problems_direction(sar, add):
+    if ((sar[0], sar[3]) != ('DX+D99', 'DY+D99') and
+            (sar[0], sar[3]) != ('DX+PF', 'DY+OF')):
+        add(ERR_DIRECTION, Taxonomy.POS_DX, sar[0] + '/' + sar[3],
+            "Not valid 'Direction specifications' found.")
+
+
+def _problems_structural(sar, add):
+    for direct in range(0, 2):
+        pos_mat = Taxonomy.POS_DX_LMAT + direct * 3
+        pos_llrs = Taxonomy.POS_DX_LLRS + direct * 3
+        label = _DIRECTION_LABEL[direct]
+        mat = sar[pos_mat].split('+')
+        llrs = sar[pos_llrs].split('+')
+
+        mat_id = mat[0]
+        if mat_id not in material_idx:
+            add(ERR_MATERIAL, pos_mat, mat_id,
+                "Not identified '" + mat_id + "' material for 'Direction " +
+                label + "'")
+            # specifications and LLRS depend on the material
+            continue
+
+        for mat_atom in mat[1:]:
+            if (mat_atom not in mat_tech_idx[mat_id] and
+                    mat_atom not in mat_tead_idx[mat_id] and
+                    mat_atom not in mat_prop_idx[mat_id]):
+                add(ERR_MATERIAL_SPEC, pos_mat, mat_atom,
+                    "Not identified '" + mat_atom + "' as specification of '" +
+                    mat_id + "' material for 'Direction " + label + "'.")
+
+        llrs_id = llrs[0]
+        if llrs_id not in llrs_type_idx[mat_id]:
+            add(ERR_LLRS, pos_llrs, llrs_id,
+                "Not identified '" + llrs_id + "' as LLRS of '" + mat_id +
+                "' material for 'Direction " + label + "'.")
+            continue
+
+        for llrs_atom in llrs[1:]:
+            if llrs_atom not in llrs_duct_idx[llrs_id]:
+                add(ERR_LLRS_SPEC, pos_llrs, llrs_atom,
+                    "Not identified '" + llrs_atom + "' as specification of '" +
+                    llrs_id + "' LLRS of '" + mat_id +
+                    "' material for 'Direction " + label + "'.")
+
+
+def _problems_height_atom(h_atom, add):
+    pos = Taxonomy.POS_HEIGHT
+    h_items = h_atom.split(':')
+    h_label = h_items[0]
+    if h_label not in _H_MAP:
+        add(ERR_HEIGHT, pos, h_atom, "Height not defined properly.")
+        return
+
+    h_id = _H_MAP.index(h_label)
+    h_grp = h_id // 4
+    h_type = h_id % 4
+    if h_type == 0:
+        if len(h_items) != 1:
+            add(ERR_HEIGHT_VALUES, pos, h_atom,
+                "Height: '" + h_label + "' type requires no values, " +
+                _given(len(h_items)))
+        return
+
+    n_vals = 2 if h_type == 1 else 1
+    if len(h_items) < 2:
+        add(ERR_HEIGHT_VALUES, pos, h_atom,
+            "Height: '" + h_label + "' type requires exactly %d value%s, "
+            "no one is given." % (n_vals, 's' if n_vals == 2 else ''))
+        return
+    h_vals = h_items[1].split(',')
+    if len(h_vals) != n_vals:
+        add(ERR_HEIGHT_VALUES, pos, h_atom,
+            "Height: '" + h_label + "' type requires exactly %d value%s, " %
+            (n_vals, 's' if n_vals == 2 else '') +
+            _given(len(h_vals)))
+        return
+
+    title = _H_TITLE[h_grp]
+    if not _H_TYPCK[h_grp](h_vals[0]):
+        add(ERR_HEIGHT_VALUE, pos, h_atom,
+            title + (": lower limit not " if h_type == 1 else ": not ") +
+            _H_TYPCK_S[h_grp] + ". ")
+        return
+    if h_type == 1:
+        if not _H_TYPCK[h_grp](h_vals[1]):
+            add(ERR_HEIGHT_VALUE, pos, h_atom,
+                title + ": higher limit not " + _H_TYPCK_S[h_grp] + ". ")
+        elif _H_CONVF[h_grp](h_vals[0]) == _H_CONVF[h_grp](h_vals[1]):
+            add(ERR_HEIGHT_RANGE, pos, h_atom, title + ": invalid range. ")
+        elif h_grp == 2:
+            # the reference engine fails with an exception
+            add(ERR_HEIGHT_UNSUPPORTED, pos, h_atom,
+                title + ": ranges are not supported. ")
+
+
+def _problems_height(sar, add):
+    for h_atom in sar[Taxonomy.POS_HEIGHT].split('+'):
+        _problems_height_atom(h_atom, add)
+
+
+def _problems_date(sar, add):
+    pos = Taxonomy.POS_DATE
+    date = sar[pos].split('+')
+    date_items = date[0].split(':')
+    date_id = date_items[0]
+    if len(date) != 1:
+        add(ERR_DATE, pos, sar[pos], "Date not defined properly.")
+        return
+    if date_id not in date_type_idx:
+        add(ERR_DATE, pos, date_id,
+            "Not identified '" + date_id + "' as specification of date.")
+        return
+    if date_id == 'Y99':
+        return
+
+    atom = date[0]
+    if len(date_items) < 2:
+        add(ERR_DATE_VALUES, pos, atom, "Date: no values defined.")
+        return
+    date_vals = date_items[1].split(',')
+    n_vals = 2 if date_id == 'YBET' else 1
+    if len(date_vals) != n_vals:
+        add(ERR_DATE_VALUES, pos, atom,
+            "Date: '" + date_id + "' type requires exactly %d value%s, " %
+            (n_vals, 's' if n_vals == 2 else '') +
+            _given(len(date_vals)))
+        return
+
+    if not is_not_negative_int(date_vals[0]) or len(date_vals[0]) > 4:
+        add(ERR_DATE_VALUE, pos, atom,
+            "Date of construction or retrofit: lower limit is not a valid "
+            "date." if date_id == 'YBET' else
+            "Date of construction or retrofit: it is not a valid date.")
+        return
+    if date_id == 'YBET':
+        if not is_not_negative_int(date_vals[1]) or len(date_vals[1]) > 4:
+            add(ERR_DATE_VALUE, pos, atom,
+                "Date of construction or retrofit: higher limit is not a "
+                "valid date.")
+        elif int(date_vals[0]) == int(date_vals[1]):
+            add(ERR_DATE_RANGE, pos, atom,
+                "Date of construction or retrofit: invalid range.")
+
+
+def _problems_occupancy(sar, add):
+    pos = Taxonomy.POS_OCCUPANCY
+    occu = sar[pos].split('+')
+    occu_id = occu[0]
+    if occu_id == 'OC99' and len(occu) != 1:
+        add(ERR_OCCUPANCY, pos, sar[pos],
+            "Occupancy not defined properly (" + occu_id + ").")
+        return
+    if occu_id not in occu_type_idx:
+        add(ERR_OCCUPANCY, pos, occu_id,
+            "Not identified '" + occu_id + "' as specification of occupancy.")
+        return
+    if len(occu) > 1 and occu[1] not in occu_spec_idx[occu_id]:
+        add(ERR_OCCUPANCY_SPEC, pos, occu[1],
+            "Not identified '" + occu[1] + "' as specification of '" +
+            occu_id + "' occupancy.")
+
+
+def _problems_single(pos, code, idx, improper, unknown):
+    def problems(sar, add):
+        items = sar[pos].split('+')
+        if len(items) != 1:
+            add(code, pos, sar[pos], improper)
+        elif items[0] not in idx:
+            add(code, pos, items[0],
+                "Not identified '" + items[0] + "' as specification of " +
+                unknown + ".")
+    return problems
+
+
+def _problems_irregularity(sar, add):
+    pos = Taxonomy.POS_IRREG
+    stir = sar[pos].split('+')
+    stir_id = stir[0]
+    if stir_id not in stir_type_idx:
+        add(ERR_IRREGULARITY, pos, stir_id,
+            "Not identified '" + stir_id + "' as specification of shape of "
+            "the building plan.")
+        return
+    if stir_id != 'IRIR' and len(stir) > 1:
+        add(ERR_IRREGULARITY, pos, sar[pos],
+            "Structural irregularity not defined properly.")
+        return
+
+    ir_ids = {}
+    ir_idxs = {'IRPP': plan_irre_idx, 'IRPS': plan_seco_idx,
+               'IRVP': vert_irre_idx, 'IRVS': vert_seco_idx}
+    for stir_atom in stir[1:]:
+        s_items = stir_atom.split(':')
+        if len(s_items) != 2:
+            add(ERR_IRREGULARITY_SPEC, pos, stir_atom,
+                "'" + stir_atom + "' not define properly as specification "
+                "of '" + stir_id + "' type of irregularity.")
+        elif stir_atom in ir_idxs.get(s_items[0], ()):
+            ir_ids[s_items[0]] = stir_atom
+        else:
+            add(ERR_IRREGULARITY_SPEC, pos, stir_atom,
+                "Not identified '" + stir_atom + "' as specification of "
+                "structural irregularity.")
+
+    for prim, seco in (('IRPP', 'IRPS'), ('IRVP', 'IRVS')):
+        prim_id, seco_id = ir_ids.get(prim, ''), ir_ids.get(seco, '')
+        if prim_id == prim + ':IRN' and seco_id:
+            add(ERR_IRREGULARITY_PAIR, pos, seco_id,
+                "'" + prim_id + "' and '" + seco_id + "' are not a valid "
+                "specification of structural irregularity.")
+
+    vese_id = ir_ids.get('IRVS', '')
+    if vese_id not in ('', 'IRVS:IRN') and 'IRVP' not in ir_ids:
+        # the reference engine fails with an exception
+        add(ERR_IRREGULARITY_PAIR, pos, vese_id,
+            "'" + vese_id + "' requires a primary vertical structural "
+            "irregularity.")
+
+
+def _problems_roof(sar, add):
+    pos = Taxonomy.POS_ROOF
+    roof_mat_id = None
+    for roof_atom in sar[pos].split('+'):
+        if roof_atom in roof_mate_idx:
+            roof_mat_id = roof_atom
+        elif not (roof_atom in roof_shap_idx or roof_atom in roof_cove_idx or
+                  roof_atom in roof_conn_idx or
+                  (roof_mat_id is not None and
+                   roof_atom in roof_sys_idx[roof_mat_id])):
+            add(ERR_ROOF, pos, roof_atom,
+                "Not identified '" + roof_atom + "' as specification of roof.")
+
+
+def _problems_floor(sar, add):
+    pos = Taxonomy.POS_FLOOR
+    floor_mat_id = None
+    for floor_atom in sar[pos].split('+'):
+        if floor_atom in floo_syma_idx:
+            floor_mat_id = floor_atom
+        elif not (floor_atom in floo_syty_idx or
+                  (floor_mat_id is not None and
+                   floor_atom in floo_conn_idx[floor_mat_id])):
+            add(ERR_FLOOR, pos, floor_atom,
+                "Not identified '" + floor_atom +
+                "' as specification of floor.")
+
+
+# checks in the same order of Taxonomy.populate
+_PROBLEMS_SECTIONS = (
+    _problems_direction,
+    _problems_structural,
+    _problems_height,
+    _problems_date,
+    _problems_occupancy,
+    _problems_single(
+        Taxonomy.POS_POSITION, ERR_POSITION, bupo_type_idx,
+        "Building position within a block not defined properly.",
+        "building position within a block"),
+    _problems_single(
+        Taxonomy.POS_PLAN, ERR_PLAN_SHAPE, plsh_type_idx,
+        "Shape of the building plan not defined properly.",
+        "shape of the building plan"),
+    _problems_irregularity,
+    _problems_single(
+        Taxonomy.POS_EXTWALL, ERR_EXTERIOR_WALLS, wall_type_idx,
+        "Exterior walls not defined properly.", "exterior walls"),
+    _problems_roof,
+    _problems_floor,
+    _problems_single(
+        Taxonomy.POS_FOUNDATION, ERR_FOUNDATION, foun_type_idx,
+        "Foundations not defined properly.", "foundation"),
+)
+
+
+def taxonomy_validate(taxt_in):
+    """
+return the list of all the problems (TaxonomyProblem instances with
+code, pos, atom and message) of a taxonomy in any form, an empty list if
+the taxonomy is valid
+"""
+    problems = []
+    if not taxt_in:
+        problems.append(TaxonomyProblem(
+            ERR_EMPTY, None, '', "Empty taxonomy."))
+        return problems
+
+    taxt_full = _problems_short(taxt_in, problems)
+    if taxt_full is None:
+        return problems
+
+    def add(code, pos, atom, message):
+        problems.append(TaxonomyProblem(code, pos, atom, message))
+
+    sar = taxt_full.split('/')
+    for section in _PROBLEMS_SECTIONS:
+        section(sar, add)
+    return problems
+
+
+def _trie_pattern(words):
+    """return a regular expression that matches the words, with the
+common prefixes factorized (no backtracking between the alternatives)"""
+    trie = {}
+    for word in words:
+        node = trie
+        for c in word:
+            node = node.setdefault(c, {})
+        node[''] = {}
+
+    def pattern(node):
+        alts = [re.escape(c) + pattern(child)
+                for c, child in sorted(node.items()) if c]
+        if not alts:
+            return ''
+        alt = alts[0] if len(alts) == 1 else '(?:%s)' % '|'.join(alts)
+        return '(?:%s)?' % alt if '' in node else alt
+
+    return pattern(trie)
+
+
+# an item is empty, a hided direction or a known prefix followed by the
+# rest of the atoms
+_GATE_ITEM = r'(?:%s(?:[+:,][^/]*)?|PF|PO)?' % _trie_pattern(PREFIX_POS)
+_gate_match = re.compile(r'%s(?:/%s)*' % (_GATE_ITEM, _GATE_ITEM)).fullmatch
+_whitespace_search = re.compile(r'\s').search
+_lowercase_search = re.compile(r'[a-z]').search
+
+
+def _gate_item(taxt):
+    items = (taxt[:-1] if taxt[-1] == '/' else taxt).split('/')
+    for item in items:
+        if item in ('', 'PF', 'PO') or taxonomy_prefix(item) in PREFIX_POS:
+            continue
+        if _whitespace_search(item):
+            code = ERR_WHITESPACE
+        elif _lowercase_search(item):
+            code = ERR_LOWERCASE
+        elif item[:1].isdigit():
+            code = ERR_NUMBER
+        else:
+            code = ERR_UNKNOWN_ITEM
+        return TaxonomyProblem(code, None, item, "Unknown item '%s'" % item)
+
+
+def taxonomy_gate(taxt_in):
+    """
+return the first problem (a TaxonomyProblem) of a taxonomy in any form
+found by a syntactic check, None if the taxonomy has to be processed by
+the engine (that fails for each taxonomy with a problem, with the message
+of the problem as error if not an exception)
+"""
+    if not taxt_in:
+        return TaxonomyProblem(ERR_EMPTY, None, '', "Empty taxonomy.")
+    if _gate_match(taxt_in) is None:
+        return _gate_item(taxt_in)
+    # height and date items are the ones that start with 'H' or 'Y'
+    if not ('/H' in taxt_in or '/Y' in taxt_in or taxt_in[0] in 'HY'):
+        return None
+
+    # values are checked on the blocks of the full form: each height or
+    # date item overwrites the block, an empty item is replaced by the
+    # unknown value of a block only if no item before it is in the same
+    # or in a following block, so the block is the last item
+    sar = {}
+    for item in taxt_in.split('/'):
+        if item[:1] == 'H':
+            sar[Taxonomy.POS_HEIGHT] = item
+        elif item[:1] == 'Y':
+            sar[Taxonomy.POS_DATE] = item
+
+    problems = []
+
+    def add(code, pos, atom, message):
+        problems.append(TaxonomyProblem(code, pos, atom, message))
+
+    if Taxonomy.POS_HEIGHT in sar:
+        _problems_height(sar, add)
+    if not problems and Taxonomy.POS_DATE in sar:
+        _problems_date(sar, add)
+    if not problems:
+        return None
+
+    # the engine fails, but the blocks before height and date are checked
+    # first: its error is the first problem found in populate order
+    return (taxonomy_validate(taxt_in) or problems)[0]
+
+
+def taxonomy_validate_many(taxonomies, maxsize=65536):
+    """
+generator of (taxonomy, problems) for each taxonomy of an iterable
+(like the lines of a file), the inputs are read once and the problems of
+the last 'maxsize' distinct taxonomies are reused
+"""
+    results = collections.OrderedDict()
+    for taxt in taxonomies:
+        problems = results.get(taxt)
+        if problems is None:
+            problems = results[taxt] = taxonomy_validate(taxt)
+            if len(results) > maxsize:
+                results.popitem(last=False)
+        else:
+            results.move_to_end(taxt)
+        yield (taxt, problems)
@@ -0,0 +1,68 @@
+#!/usr/bin/env python
+"""
+Bounded LRU cache of the results of the taxonomy normalization.
+"""
+import collections
+from openquake.taxonomy3.taxtweb_eng import taxonomy_engine, ENGINE_SIMDOM
+
+CacheInfo = collections.namedtuple(
+    'CacheInfo', ['hits', 'misses', 'evictions', 'maxsize', 'currsize'])
+
+
+class TaxonomyCache(object):
+    """memoization layer with the same 'process' interface of the taxonomy
+engines, results (errors included) are cached with key (taxt_in, type_out)
+and the least recently used are evicted when 'maxsize' is reached
+(maxsize=None means unbounded)"""
+    MAXSIZE_DEFAULT = 65536
+
+    def __init__(self, maxsize=MAXSIZE_DEFAULT, engine=ENGINE_SIMDOM):
+        if maxsize is not None and maxsize < 1:
+            raise ValueError("maxsize must be a positive integer or None")
+        self.maxsize = maxsize
+        self.engine = engine
+        self._taxonomy = None
+        self._results = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def process(self, taxt_in, type_out):
+        """
+convert an input taxonomy to a normalized form if correct else an error is returned.
+    taxt_in:   taxonomy input string
+    type_out:  type of taxonomy output
+               0, "full", 1: "without unknown", 2: "short"
+RETURN:
+(taxonomy_out, error_str)
+    taxonomy_out: a taxonomy if success else None
+    error_str: None if success else a string with the error description
+"""
+        key = (taxt_in, type_out)
+        ret = self._results.get(key)
+        if ret is not None:
+            self._results.move_to_end(key)
+            self.hits += 1
+            return ret
+
+        self.misses += 1
+        if self._taxonomy is None:
+            self._taxonomy = taxonomy_engine('taxonomy', self.engine)
+        ret = self._taxonomy.process(taxt_in, type_out)
+
+        self._results[key] = ret
+        if self.maxsize is not None and len(self._results) > self.maxsize:
+            self._results.popitem(last=False)
+            self.evictions += 1
+
+        return ret
+
+    def info(self):
+        """return hits, misses, evictions, maxsize and current size"""
+        return CacheInfo(self.hits, self.misses, self.evictions,
+                         self.maxsize, len(self._results))
+
+    def clear(self):
+        """remove all the cached results and reset the statistics"""
+        self._results.clear()
+        self.hits = self.misses = self.evictions = 0
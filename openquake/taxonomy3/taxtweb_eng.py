@@ -1,17 +1,22 @@
 #!/usr/bin/env python
-import sys, math, re, io
-
-from openquake.taxonomy3.taxtweb_maps import (
-    material, date_type, occu_type, bupo_type, plsh_type, stir_type,
-    plan_irre, plan_seco, vert_irre, vert_seco, wall_type, roof_shap,
-    roof_cove, roof_mate, roof_conn, floo_syma, floo_syty, foun_type,)
-from openquake.taxonomy3.taxtweb_head import (
-    mat_tech, mat_tead, mat_prop, llrs_type, llrs_duct, occu_spec,
-    roof_sys, floo_conn)
+import sys, math, re, io, types, collections, functools
+
+from openquake.taxonomy3.taxtweb_head import occu_spec
+from openquake.taxonomy3.taxtweb_tables import (
+    material_idx, mat_tech_idx, mat_tead_idx, mat_prop_idx, llrs_type_idx,
+    llrs_duct_idx, date_type_idx, occu_type_idx, occu_spec_idx,
+    bupo_type_idx, plsh_type_idx, stir_type_idx, plan_irre_idx,
+    plan_seco_idx, vert_irre_idx, vert_seco_idx, wall_type_idx,
+    roof_shap_idx, roof_cove_idx, roof_mate_idx, roof_conn_idx, roof_sys_idx,
+    floo_syma_idx, floo_syty_idx, floo_conn_idx, foun_type_idx,
+    TaxtValues, build_taxonomy_string)
 from openquake.taxonomy3.taxonomy import taxonomy_short2full, Ret
 
 taxonomy = None
 
+# labels of the select widgets (label tuple -> itself)
+TAXT_LABELS = {}
+
 
 def is_not_negative_int(s):
     """return true if the string is convertible
@@ -46,6 +51,13 @@ def is_in_rect_angle_float(s):
         return False
     return True
 
+def taxt_labels(items):
+    """return the immutable tuple of labels equal to items, shared with
+all the widgets (of all the engines) with the same labels"""
+    items = tuple(items)
+    return TAXT_LABELS.setdefault(items, items)
+
+
 def is_or_are_given(n):
     return n + (" is" if n <= 1 else " are") + " given."
 
@@ -53,13 +65,16 @@ def is_or_are_given(n):
 class TaxtSel(object):
     """this class modelize the behavior of the javascript rapresentation
 of a 'select' html tag with the same methods"""
+    __slots__ = ('_name', '_items', '_val', '_disabled', '_first_disabled',
+                 '_change_cb')
+
     def __init__(self, name, items=[], val=-1, disabled=False, change_cb=None):
         '''
         items => list of 1 element dicts
         val => int identifing current val item
         '''
         self._name = name
-        self._items = items[:]
+        self._items = taxt_labels(items)
         if items:
             if val == -1:
                 self._val = 0
@@ -73,7 +88,7 @@ of a 'select' html tag with the same methods"""
         self._change_cb = change_cb
 
     def empty(self):
-        self._items = []
+        self._items = ()
         self._val = -1
 
     def disabled(self, disabled=None):
@@ -92,11 +107,13 @@ of a 'select' html tag with the same methods"""
         '''
         items => list of 1 element dicts
         val => int identifing current val item
+        the returned labels are an immutable tuple shared between widgets,
+        replace them with a new list to change them
         '''
         if items is None:
             return self._items
         else:
-            self._items = items[:]
+            self._items = taxt_labels(items)
 
         self.val(val)
 
@@ -127,6 +144,8 @@ of a 'select' html tag with the same methods"""
 
 
 class TaxtBool(object):
+    __slots__ = ('_name', '_val', '_change_cb')
+
     def __init__(self, name, val=False, change_cb=None):
         self._name = name
         self._val = val
@@ -149,6 +168,8 @@ class TaxtBool(object):
 
 
 class TaxtRadioItem(object):
+    __slots__ = ('_val', '_checked', '_change_cb', '_radio')
+
     def __init__(self, val=None, checked=False, radio=None, change_cb=None):
         self._val = val
         self._checked = checked
@@ -181,6 +202,8 @@ class TaxtRadioItem(object):
 
 
 class TaxtRadio(object):
+    __slots__ = ('_items',)
+
     def __init__(self, items=[]):
         self._items = items[:]
         for item in items:
@@ -192,6 +215,8 @@ class TaxtRadio(object):
 
 
 class TaxtStr(object):
+    __slots__ = ('_val', '_change_cb', '_disabled', '_name')
+
     def __init__(self, name, val="0", change_cb=None, disabled=None):
         self._val = val
         self._change_cb = change_cb
@@ -217,6 +242,57 @@ class TaxtStr(object):
         return "%s" % self._val
 
 
+TAXT_WIDGETS = (TaxtSel, TaxtBool, TaxtRadioItem, TaxtRadio, TaxtStr)
+
+
+# widget attributes that can refer to other widgets or to callbacks
+TAXT_REFS = ('_change_cb', '_radio', '_items')
+
+
+def taxt_clone(obj, memo):
+    """return a copy of a widget: widgets and callbacks bound to objects
+in memo (id(original) -> copy) are copied, other attributes (strings,
+numbers and tuples of labels) are shared"""
+    obj_copy = memo.get(id(obj))
+    if obj_copy is None:
+        obj_class = obj.__class__
+        obj_copy = obj_class.__new__(obj_class)
+        memo[id(obj)] = obj_copy
+        for k in obj_class.__slots__:
+            v = getattr(obj, k)
+            if k in TAXT_REFS and v is not None:
+                v = taxt_clone_value(v, memo)
+            setattr(obj_copy, k, v)
+    return obj_copy
+
+
+def taxt_clone_value(v, memo):
+    """return a copy of an attribute value performed as in taxt_clone"""
+    v_type = type(v)
+    if v_type in TAXT_WIDGETS:
+        return taxt_clone(v, memo)
+    elif v_type is types.MethodType:
+        v_self = memo.get(id(v.__self__))
+        if v_self is not None:
+            return v.__func__.__get__(v_self)
+    elif v_type is list and v and type(v[0]) in TAXT_WIDGETS:
+        return [taxt_clone(item, memo) for item in v]
+    return v
+
+
+def taxt_counted(func):
+    """decorator that counts the calls of an engine method in its
+'calls' counter"""
+    name = func.__name__
+
+    @functools.wraps(func)
+    def wrapper(self, *args):
+        self.calls[name] += 1
+        return func(self, *args)
+
+    return wrapper
+
+
 class Taxonomy(object):
     POS_DX = 0
     POS_DX_LMAT = 1
@@ -247,8 +323,12 @@ class Taxonomy(object):
                        'YEX', 'YPRE', 'YAPP']
     ATOM_TYPE_RANGE = ['HBET', 'HBBET', 'HFBET', 'YBET']
 
-    def __init__(self, name, full):
+    def __init__(self, name, full, quiet=False):
         self._name = name
+        self.quiet = quiet
+        self.calls = collections.Counter()
+        self._quiet = False
+        self._quiet_build = False
 
         self._gem_taxonomy_regularity_postinit = -1
         self._gem_taxonomy_form = ""
@@ -690,17 +770,77 @@ class Taxonomy(object):
                             'Floor-wall diaphragm connection not provided',
                              'Floor-wall diaphragm connection present'])
 
-        self.taxt_ValidateMaterial1()
-        self.taxt_ValidateMaterial2()
-        self.taxt_ValidateRoof()
-        self.taxt_ValidateFloor()
-        self.taxt_ValidateHeight()
-        self.taxt_ValidateDate()
-        self.taxt_ValidateRegularity()
-        self.taxt_ValidateOccupancy()
+        if not self._quiet:
+            # in quiet mode they are skipped, they already run
+            # in the change callbacks triggered by the items above
+            self.taxt_ValidateMaterial1()
+            self.taxt_ValidateMaterial2()
+            self.taxt_ValidateRoof()
+            self.taxt_ValidateFloor()
+            self.taxt_ValidateHeight()
+            self.taxt_ValidateDate()
+            self.taxt_ValidateRegularity()
+            self.taxt_ValidateOccupancy()
         self.taxt_BuildTaxonomy()
 
 
+    def clone(self, name=None):
+        """return a new engine with the same state of this one without
+recomputing it"""
+        taxonomy = Taxonomy.__new__(Taxonomy)
+        taxonomy._state_copy(self)
+        if name is not None:
+            taxonomy._name = name
+        return taxonomy
+
+    def reset(self):
+        """restore the initial state of the engine without recomputing it"""
+        name, quiet = self._name, self.quiet
+        self._state_copy(taxonomy_prototype(hasattr(self, 'OutTypeCB')))
+        self._name, self.quiet = name, quiet
+
+    def _exception_result(self, ex):
+        """return the (None, error_str) result of an unexpected exception,
+a failure in the middle of the population can leave the engine in a state
+that breaks the next call so the initial state is restored"""
+        self.reset()
+        return (None, "EXCEPTION: " + str(ex))
+
+    def _state_copy(self, src):
+        memo = {id(src): self}
+        self.__dict__ = dict((k, taxt_clone_value(v, memo))
+                             for k, v in src.__dict__.items())
+        self.calls = collections.Counter()
+
+    def quiet_begin(self):
+        """start a quiet section: the build of the taxonomy string is
+deferred to quiet_end and the select handlers already run by the change
+callbacks are not repeated"""
+        self._quiet = True
+        self._quiet_build = False
+
+    def quiet_end(self):
+        """close a quiet section and run the deferred build"""
+        try:
+            # the build can swap the ranges and the swaps request
+            # a new build, repeated until the values are stable
+            while self._quiet_build:
+                self._quiet_build = False
+                self.taxt_BuildTaxonomyNow()
+        finally:
+            self._quiet = False
+            self._quiet_build = False
+
+    def _val_select(self, widget, val, select_cb):
+        """set the value of a widget and run its select handler as the
+web form does, in a quiet section the handler already run by the change
+callback of the widget is not repeated"""
+        widget.val(val)
+        if self._quiet:
+            self.calls['select_skipped'] += 1
+        else:
+            select_cb(None)
+
     def __str__(self):
         ret = "%s (Taxonomy)\n" % self._name
         ret += self.OutTypeCB.__str__()
@@ -952,6 +1092,7 @@ class Taxonomy(object):
     def taxt_FloorCB3Select(self, obj=None):
         self.taxt_BuildTaxonomy()
 
+    @taxt_counted
     def taxt_ValidateSystem1(self):
 
         self.SystemCB21.empty()
@@ -969,6 +1110,7 @@ class Taxonomy(object):
             self.SystemCB21.disabled(False)
 
 
+    @taxt_counted
     def taxt_ValidateSystem2(self):
 
         self.SystemCB22.empty()
@@ -986,6 +1128,7 @@ class Taxonomy(object):
             self.SystemCB22.disabled(False)
 
 
+    @taxt_counted
     def taxt_ValidateMaterial1(self):
         self.MaterialCB21.empty()
         self.MaterialCB31.empty()
@@ -1165,6 +1308,7 @@ class Taxonomy(object):
         self.taxt_ValidateSystem1()
 
 
+    @taxt_counted
     def taxt_ValidateMaterial2(self):
         self.MaterialCB22.empty()
         self.MaterialCB32.empty()
@@ -1344,6 +1488,7 @@ class Taxonomy(object):
         self.taxt_ValidateSystem2()
 
 
+    @taxt_counted
     def taxt_ValidateRoof(self):
         self.RoofCB4.empty()
         if self.RoofCB3.val() == 0 or self.RoofCB3.val() == 7:
@@ -1403,6 +1548,7 @@ class Taxonomy(object):
             self.RoofCB4.disabled(False)
 
 
+    @taxt_counted
     def taxt_ValidateFloor(self):
         self.FloorCB2.empty()
 
@@ -1453,6 +1599,7 @@ class Taxonomy(object):
             self.FloorCB2.disabled(False)
 
 
+    @taxt_counted
     def taxt_ValidateHeight(self):
         self.HeightCB2.disabled(True)
         self.HeightCB3.disabled(True)
@@ -1528,6 +1675,7 @@ class Taxonomy(object):
             self.noStoreysE12.disabled(True)
 
 
+    @taxt_counted
     def taxt_ValidateDate(self):
         if self.DateCB1.val() == 0:
             self.DateE1.disabled(True)
@@ -1542,6 +1690,7 @@ class Taxonomy(object):
             self.DateE2.disabled(True)
 
 
+    @taxt_counted
     def taxt_ValidateRegularity(self):
         self.RegularityCB2.empty()
         self.RegularityCB3.empty()
@@ -1606,6 +1755,7 @@ class Taxonomy(object):
             self._gem_taxonomy_regularity_postinit = 3
 
 
+    @taxt_counted
     def taxt_ValidateRegularity2(self):
 
         self.RegularityCB4.empty()
@@ -1624,6 +1774,7 @@ class Taxonomy(object):
         self.taxt_ValidateRegularityCross23("2")
 
 
+    @taxt_counted
     def taxt_ValidateRegularity3(self):
 
         self.RegularityCB5.empty()
@@ -1661,6 +1812,7 @@ class Taxonomy(object):
             else:
                 self.RegularityCB2.first_disabled(True)
 
+    @taxt_counted
     def taxt_ValidateOccupancy(self):
 
         self.OccupancyCB2.empty()
@@ -1765,6 +1917,14 @@ class Taxonomy(object):
 
 
     def taxt_BuildTaxonomy(self):
+        if self._quiet:
+            self.calls['BuildTaxonomy_deferred'] += 1
+            self._quiet_build = True
+        else:
+            self.taxt_BuildTaxonomyNow()
+
+    @taxt_counted
+    def taxt_BuildTaxonomyNow(self):
 
         ResTax = None
         ResTaxFull = self.BuildTaxonomyString(0)
@@ -1967,1186 +2127,18 @@ class Taxonomy(object):
             # self.permalink.attr("href", taxt_prefix)
 
 
-    def BuildTaxonomyString(self, out_type):
-        taxonomy = [""] * 50
-
-        ResTax = None
-        direction1 = None
-        direction2 = None
-
-        # /* Structural System: Direction X */
-
-        if self.MaterialCB11.val() == 0 and (out_type == 0):
-            taxonomy[0] = 'MAT99'
-        if self.MaterialCB11.val() == 1:
-            taxonomy[0] = 'C99'
-        if self.MaterialCB11.val() == 2:
-            taxonomy[0] = 'CU'
-        if self.MaterialCB11.val() == 3:
-            taxonomy[0] = 'CR'
-        if self.MaterialCB11.val() == 4:
-            taxonomy[0] = 'SRC'
-
-        if (self.MaterialCB11.val() > 0) and (self.MaterialCB11.val() < 5):
-            if (self.MaterialCB21.val() == 0) and (out_type == 0):
-                taxonomy[1] = '+CT99'
-            if self.MaterialCB21.val() == 1:
-                taxonomy[1] = '+CIP'
-            if self.MaterialCB21.val() == 2:
-                taxonomy[1] = '+PC'
-            if self.MaterialCB21.val() == 3:
-                taxonomy[1] = '+CIPPS'
-            if self.MaterialCB21.val() == 4:
-                taxonomy[1] = '+PCPS'
-
-        if self.MaterialCB11.val() == 5:
-            taxonomy[0] = 'S'
-            if self.MaterialCB21.val() == 0 and (out_type == 0):
-                taxonomy[1] = '+S99'
-            if self.MaterialCB21.val() == 1:
-                taxonomy[1] = '+SL'
-            if self.MaterialCB21.val() == 2:
-                taxonomy[1] = '+SR'
-            if self.MaterialCB21.val() == 3:
-                taxonomy[1] = '+SO'
-
-
-        if self.MaterialCB11.val() == 6:
-            taxonomy[0] = 'ME'
-            if self.MaterialCB21.val() == 0 and (out_type == 0):
-                taxonomy[1] = '+ME99'
-            if self.MaterialCB21.val() == 1:
-                taxonomy[1] = '+MEIR'
-            if self.MaterialCB21.val() == 2:
-                taxonomy[1] = '+MEO'
-
-
-        if self.MaterialCB11.val() == 5:
-            if self.MaterialCB31.val() == 0 and (out_type == 0):
-                taxonomy[2] = '+SC99'
-            if self.MaterialCB31.val() == 1:
-                taxonomy[2] = '+WEL'
-            if self.MaterialCB31.val() == 2:
-                taxonomy[2] = '+RIV'
-            if self.MaterialCB31.val() == 3:
-                taxonomy[2] = '+BOL'
-
-
-        if self.MaterialCB11.val() > 6 and self.MaterialCB11.val() < 11:
-            if self.MaterialCB11.val() == 7:
-                taxonomy[0] = 'M99'
-            if self.MaterialCB11.val() == 8:
-                taxonomy[0] = 'MUR'
-            if self.MaterialCB11.val() == 9:
-                taxonomy[0] = 'MCF'
-
-            if self.MaterialCB21.val() == 0 and (out_type == 0):
-                taxonomy[1] = '+MUN99'
-            if self.MaterialCB21.val() == 1:
-                taxonomy[1] = '+ADO'
-            if self.MaterialCB21.val() == 2:
-                taxonomy[1] = '+ST99'
-            if self.MaterialCB21.val() == 3:
-                taxonomy[1] = '+STRUB'
-            if self.MaterialCB21.val() == 4:
-                taxonomy[1] = '+STDRE'
-            if self.MaterialCB21.val() == 5:
-                taxonomy[1] = '+CL99'
-            if self.MaterialCB21.val() == 6:
-                taxonomy[1] = '+CLBRS'
-            if self.MaterialCB21.val() == 7:
-                taxonomy[1] = '+CLBRH'
-            if self.MaterialCB21.val() == 8:
-                taxonomy[1] = '+CLBLH'
-            if self.MaterialCB21.val() == 9:
-                taxonomy[1] = '+CB99'
-            if self.MaterialCB21.val() == 10:
-                taxonomy[1] = '+CBS'
-            if self.MaterialCB21.val() == 11:
-                taxonomy[1] = '+CBH'
-            if self.MaterialCB21.val() == 12:
-                taxonomy[1] = '+MO'
-
-            if self.MaterialCB11.val() == 10:
-                taxonomy[0] = 'MR'
-                if (self.MaterialCB41.val() == 0) and (out_type == 0):
-                    taxonomy[34] = '+MR99'
-                if self.MaterialCB41.val() == 1:
-                    taxonomy[34] = '+RS'
-                if self.MaterialCB41.val() == 2:
-                    taxonomy[34] = '+RW'
-                if self.MaterialCB41.val() == 3:
-                    taxonomy[34] = '+RB'
-                if self.MaterialCB41.val() == 4:
-                    taxonomy[34] = '+RCM'
-                if self.MaterialCB41.val() == 5:
-                    taxonomy[34] = '+RCB'
-
-
-            if (self.MaterialCB31.val() == 0) and (out_type == 0):
-                taxonomy[2] = '+MO99'
-            if self.MaterialCB31.val() == 1:
-                taxonomy[2] = '+MON'
-            if self.MaterialCB31.val() == 2:
-                taxonomy[2] = '+MOM'
-            if self.MaterialCB31.val() == 3:
-                taxonomy[2] = '+MOL'
-            if self.MaterialCB31.val() == 4:
-                taxonomy[2] = '+MOC'
-            if self.MaterialCB31.val() == 5:
-                taxonomy[2] = '+MOCL'
-            if self.MaterialCB31.val() == 6:
-                taxonomy[2] = '+SP99'
-            if self.MaterialCB31.val() == 7:
-                taxonomy[2] = '+SPLI'
-            if self.MaterialCB31.val() == 8:
-                taxonomy[2] = '+SPSA'
-            if self.MaterialCB31.val() == 9:
-                taxonomy[2] = '+SPTU'
-            if self.MaterialCB31.val() == 10:
-                taxonomy[2] = '+SPSL'
-            if self.MaterialCB31.val() == 11:
-                taxonomy[2] = '+SPGR'
-            if self.MaterialCB31.val() == 12:
-                taxonomy[2] = '+SPBA'
-            if self.MaterialCB31.val() == 13:
-                taxonomy[2] = '+SPO'
-
-
-        if (self.MaterialCB11.val()>10) and (self.MaterialCB11.val()<14):
-            if self.MaterialCB11.val() == 11:
-                taxonomy[0] = 'E99'
-            if self.MaterialCB11.val() == 12:
-                taxonomy[0] = 'EU'
-            if self.MaterialCB11.val() == 13:
-                taxonomy[0] = 'ER'
-
-            if (self.MaterialCB21.val() == 0) and (out_type == 0):
-                taxonomy[1] = '+ET99'
-            if self.MaterialCB21.val() == 1:
-                taxonomy[1] = '+ETR'
-            if self.MaterialCB21.val() == 2:
-                taxonomy[1] = '+ETC'
-            if self.MaterialCB21.val() == 3:
-                taxonomy[1] = '+ETO'
-
-
-        if self.MaterialCB11.val() == 14:
-            taxonomy[0] = 'W'
-            if (self.MaterialCB21.val() == 0) and (out_type == 0):
-                taxonomy[1] = '+W99'
-            if self.MaterialCB21.val() == 1:
-                taxonomy[1] = '+WHE'
-            if self.MaterialCB21.val() == 2:
-                taxonomy[1] = '+WLI'
-            if self.MaterialCB21.val() == 3:
-                taxonomy[1] = '+WS'
-            if self.MaterialCB21.val() == 4:
-                taxonomy[1] = '+WWD'
-            if self.MaterialCB21.val() == 5:
-                taxonomy[1] = '+WBB'
-            if self.MaterialCB21.val() == 6:
-                taxonomy[1] = '+WO'
-
-
-        if self.MaterialCB11.val() == 15:
-            taxonomy[0] = 'MATO'
-
-        if (self.SystemCB11.val() == 0) and (out_type == 0):
-            taxonomy[3] = 'L99'
-
-        if (self.MaterialCB11.val() > 10) and (self.MaterialCB11.val() < 14):
-            if self.SystemCB11.val() == 1:
-                taxonomy[3] = 'LN'
-            if self.SystemCB11.val() == 2:
-                taxonomy[3] = 'LWAL'
-            if self.SystemCB11.val() == 3:
-                taxonomy[3] = 'LH'
-            if self.SystemCB11.val() == 4:
-                taxonomy[3] = 'LO'
-
-        elif ((self.MaterialCB11.val()>6) and (self.MaterialCB11.val()<11)) or (self.MaterialCB11.val() == 14):
-            if self.SystemCB11.val() == 1:
-                taxonomy[3] = 'LN'
-            if self.SystemCB11.val() == 2:
-                taxonomy[3] = 'LFM'
-            if self.SystemCB11.val() == 3:
-                taxonomy[3] = 'LPB'
-            if self.SystemCB11.val() == 4:
-                taxonomy[3] = 'LWAL'
-            if self.SystemCB11.val() == 5:
-                taxonomy[3] = 'LH'
-            if self.SystemCB11.val() == 6:
-                taxonomy[3] = 'LO'
-
-        else:
-            if self.SystemCB11.val() == 1:
-                taxonomy[3] = 'LN'
-            if self.SystemCB11.val() == 2:
-                taxonomy[3] = 'LFM'
-            if self.SystemCB11.val() == 3:
-                taxonomy[3] = 'LFINF'
-            if self.SystemCB11.val() == 4:
-                taxonomy[3] = 'LFBR'
-            if self.SystemCB11.val() == 5:
-                taxonomy[3] = 'LPB'
-            if self.SystemCB11.val() == 6:
-                taxonomy[3] = 'LWAL'
-            if self.SystemCB11.val() == 7:
-                taxonomy[3] = 'LDUAL'
-            if self.SystemCB11.val() == 8:
-                taxonomy[3] = 'LFLS'
-            if self.SystemCB11.val() == 9:
-                taxonomy[3] = 'LFLSINF'
-            if self.SystemCB11.val() == 10:
-                taxonomy[3] = 'LH'
-            if self.SystemCB11.val() == 11:
-                taxonomy[3] = 'LO'
-
-
-        if self.SystemCB11.val() > 0:
-            if (self.SystemCB21.val() == 0) and (out_type == 0):
-                taxonomy[4] = '+DU99'
-            if self.SystemCB21.val() == 1:
-                taxonomy[4] = '+DUC'
-            if self.SystemCB21.val() == 2:
-                taxonomy[4] = '+DNO'
-            if self.SystemCB21.val() == 3:
-                taxonomy[4] = '+DBD'
-
-
-        # /* Structural System: Direction Y */
-
-        if self.MaterialCB12.val() == 0 and (out_type == 0):
-            taxonomy[5] = 'MAT99'
-        if self.MaterialCB12.val() == 1:
-            taxonomy[5] = 'C99'
-        if self.MaterialCB12.val() == 2:
-            taxonomy[5] = 'CU'
-        if self.MaterialCB12.val() == 3:
-            taxonomy[5] = 'CR'
-        if self.MaterialCB12.val() == 4:
-            taxonomy[5] = 'SRC'
-
-        if (self.MaterialCB12.val() > 0) and (self.MaterialCB12.val() < 5):
-            if (self.MaterialCB22.val() == 0) and (out_type == 0):
-                taxonomy[6] = '+CT99'
-            if self.MaterialCB22.val() == 1:
-                taxonomy[6] = '+CIP'
-            if self.MaterialCB22.val() == 2:
-                taxonomy[6] = '+PC'
-            if self.MaterialCB22.val() == 3:
-                taxonomy[6] = '+CIPPS'
-            if self.MaterialCB22.val() == 4:
-                taxonomy[6] = '+PCPS'
-
-        if self.MaterialCB12.val() == 5:
-            taxonomy[5] = 'S'
-            if self.MaterialCB22.val() == 0 and (out_type == 0):
-                taxonomy[6] = '+S99'
-            if self.MaterialCB22.val() == 1:
-                taxonomy[6] = '+SL'
-            if self.MaterialCB22.val() == 2:
-                taxonomy[6] = '+SR'
-            if self.MaterialCB22.val() == 3:
-                taxonomy[6] = '+SO'
-
-
-        if self.MaterialCB12.val() == 6:
-            taxonomy[5] = 'ME'
-            if self.MaterialCB22.val() == 0 and (out_type == 0):
-                taxonomy[6] = '+ME99'
-            if self.MaterialCB22.val() == 1:
-                taxonomy[6] = '+MEIR'
-            if self.MaterialCB22.val() == 2:
-                taxonomy[6] = '+MEO'
-
-
-        if self.MaterialCB12.val() == 5:
-            if self.MaterialCB32.val() == 0 and (out_type == 0):
-                taxonomy[7] = '+SC99'
-            if self.MaterialCB32.val() == 1:
-                taxonomy[7] = '+WEL'
-            if self.MaterialCB32.val() == 2:
-                taxonomy[7] = '+RIV'
-            if self.MaterialCB32.val() == 3:
-                taxonomy[7] = '+BOL'
-
-
-        if self.MaterialCB12.val() > 6 and self.MaterialCB12.val() < 11:
-            if self.MaterialCB12.val() == 7:
-                taxonomy[5] = 'M99'
-            if self.MaterialCB12.val() == 8:
-                taxonomy[5] = 'MUR'
-            if self.MaterialCB12.val() == 9:
-                taxonomy[5] = 'MCF'
-
-            if self.MaterialCB22.val() == 0 and (out_type == 0):
-                taxonomy[6] = '+MUN99'
-            if self.MaterialCB22.val() == 1:
-                taxonomy[6] = '+ADO'
-            if self.MaterialCB22.val() == 2:
-                taxonomy[6] = '+ST99'
-            if self.MaterialCB22.val() == 3:
-                taxonomy[6] = '+STRUB'
-            if self.MaterialCB22.val() == 4:
-                taxonomy[6] = '+STDRE'
-            if self.MaterialCB22.val() == 5:
-                taxonomy[6] = '+CL99'
-            if self.MaterialCB22.val() == 6:
-                taxonomy[6] = '+CLBRS'
-            if self.MaterialCB22.val() == 7:
-                taxonomy[6] = '+CLBRH'
-            if self.MaterialCB22.val() == 8:
-                taxonomy[6] = '+CLBLH'
-            if self.MaterialCB22.val() == 9:
-                taxonomy[6] = '+CB99'
-            if self.MaterialCB22.val() == 10:
-                taxonomy[6] = '+CBS'
-            if self.MaterialCB22.val() == 11:
-                taxonomy[6] = '+CBH'
-            if self.MaterialCB22.val() == 12:
-                taxonomy[6] = '+MO'
-
-            if self.MaterialCB12.val() == 10:
-                taxonomy[5] = 'MR'
-                if (self.MaterialCB42.val() == 0) and (out_type == 0):
-                    taxonomy[35] = '+MR99'
-                if self.MaterialCB42.val() == 1:
-                    taxonomy[35] = '+RS'
-                if self.MaterialCB42.val() == 2:
-                    taxonomy[35] = '+RW'
-                if self.MaterialCB42.val() == 3:
-                    taxonomy[35] = '+RB'
-                if self.MaterialCB42.val() == 4:
-                    taxonomy[35] = '+RCM'
-                if self.MaterialCB42.val() == 5:
-                    taxonomy[35] = '+RCB'
-
-
-            if (self.MaterialCB32.val() == 0) and (out_type == 0):
-                taxonomy[7] = '+MO99'
-            if self.MaterialCB32.val() == 1:
-                taxonomy[7] = '+MON'
-            if self.MaterialCB32.val() == 2:
-                taxonomy[7] = '+MOM'
-            if self.MaterialCB32.val() == 3:
-                taxonomy[7] = '+MOL'
-            if self.MaterialCB32.val() == 4:
-                taxonomy[7] = '+MOC'
-            if self.MaterialCB32.val() == 5:
-                taxonomy[7] = '+MOCL'
-            if self.MaterialCB32.val() == 6:
-                taxonomy[7] = '+SP99'
-            if self.MaterialCB32.val() == 7:
-                taxonomy[7] = '+SPLI'
-            if self.MaterialCB32.val() == 8:
-                taxonomy[7] = '+SPSA'
-            if self.MaterialCB32.val() == 9:
-                taxonomy[7] = '+SPTU'
-            if self.MaterialCB32.val() == 10:
-                taxonomy[7] = '+SPSL'
-            if self.MaterialCB32.val() == 11:
-                taxonomy[7] = '+SPGR'
-            if self.MaterialCB32.val() == 12:
-                taxonomy[7] = '+SPBA'
-            if self.MaterialCB32.val() == 13:
-                taxonomy[7] = '+SPO'
-
-
-        if (self.MaterialCB12.val() > 10) and (self.MaterialCB12.val() < 14):
-            if self.MaterialCB12.val() == 11:
-                taxonomy[5] = 'E99'
-            if self.MaterialCB12.val() == 12:
-                taxonomy[5] = 'EU'
-            if self.MaterialCB12.val() == 13:
-                taxonomy[5] = 'ER'
-
-            if (self.MaterialCB22.val() == 0) and (out_type == 0):
-                taxonomy[6] = '+ET99'
-            if self.MaterialCB22.val() == 1:
-                taxonomy[6] = '+ETR'
-            if self.MaterialCB22.val() == 2:
-                taxonomy[6] = '+ETC'
-            if self.MaterialCB22.val() == 3:
-                taxonomy[6] = '+ETO'
-
-
-        if self.MaterialCB12.val() == 14:
-            taxonomy[5] = 'W'
-            if (self.MaterialCB22.val() == 0) and (out_type == 0):
-                taxonomy[6] = '+W99'
-            if self.MaterialCB22.val() == 1:
-                taxonomy[6] = '+WHE'
-            if self.MaterialCB22.val() == 2:
-                taxonomy[6] = '+WLI'
-            if self.MaterialCB22.val() == 3:
-                taxonomy[6] = '+WS'
-            if self.MaterialCB22.val() == 4:
-                taxonomy[6] = '+WWD'
-            if self.MaterialCB22.val() == 5:
-                taxonomy[6] = '+WBB'
-            if self.MaterialCB22.val() == 6:
-                taxonomy[6] = '+WO'
-
-
-        if self.MaterialCB12.val() == 15:
-            taxonomy[5] = 'MATO'
-
-        if (self.SystemCB12.val() == 0) and (out_type == 0):
-            taxonomy[8] = 'L99'
-
-        if (self.MaterialCB12.val() > 10) and (self.MaterialCB12.val() < 14):
-            if self.SystemCB12.val() == 1:
-                taxonomy[8] = 'LN'
-            if self.SystemCB12.val() == 2:
-                taxonomy[8] = 'LWAL'
-            if self.SystemCB12.val() == 3:
-                taxonomy[8] = 'LH'
-            if self.SystemCB12.val() == 4:
-                taxonomy[8] = 'LO'
-
-        elif ((self.MaterialCB12.val() > 6) and (self.MaterialCB12.val() < 11)) or (self.MaterialCB12.val() == 14):
-            if self.SystemCB12.val() == 1:
-                taxonomy[8] = 'LN'
-            if self.SystemCB12.val() == 2:
-                taxonomy[8] = 'LFM'
-            if self.SystemCB12.val() == 3:
-                taxonomy[8] = 'LPB'
-            if self.SystemCB12.val() == 4:
-                taxonomy[8] = 'LWAL'
-            if self.SystemCB12.val() == 5:
-                taxonomy[8] = 'LH'
-            if self.SystemCB12.val() == 6:
-                taxonomy[8] = 'LO'
-
-        else:
-            if self.SystemCB12.val() == 1:
-                taxonomy[8] = 'LN'
-            if self.SystemCB12.val() == 2:
-                taxonomy[8] = 'LFM'
-            if self.SystemCB12.val() == 3:
-                taxonomy[8] = 'LFINF'
-            if self.SystemCB12.val() == 4:
-                taxonomy[8] = 'LFBR'
-            if self.SystemCB12.val() == 5:
-                taxonomy[8] = 'LPB'
-            if self.SystemCB12.val() == 6:
-                taxonomy[8] = 'LWAL'
-            if self.SystemCB12.val() == 7:
-                taxonomy[8] = 'LDUAL'
-            if self.SystemCB12.val() == 8:
-                taxonomy[8] = 'LFLS'
-            if self.SystemCB12.val() == 9:
-                taxonomy[8] = 'LFLSINF'
-            if self.SystemCB12.val() == 10:
-                taxonomy[8] = 'LH'
-            if self.SystemCB12.val() == 11:
-                taxonomy[8] = 'LO'
-
-
-        if self.SystemCB12.val() > 0:
-            if (self.SystemCB22.val() == 0) and (out_type == 0):
-                taxonomy[9] = '+DU99'
-            if self.SystemCB22.val() == 1:
-                taxonomy[9] = '+DUC'
-            if self.SystemCB22.val() == 2:
-                taxonomy[9] = '+DNO'
-            if self.SystemCB22.val() == 3:
-                taxonomy[9] = '+DBD'
-
-
-        if self.DateCB1.val() == 0  and (out_type == 0):
-            taxonomy[10] = 'Y99'
-        if self.DateCB1.val() == 1:
-            taxonomy[10] = 'YEX:' + self.DateE1.val()
-        elif self.DateCB1.val() == 2:
-            taxonomy[10] = 'YBET:' + self.DateE1.val() + "," + self.DateE2.val()
-        elif self.DateCB1.val() == 3:
-            taxonomy[10] = 'YPRE:' + self.DateE1.val()
-        elif self.DateCB1.val() == 4:
-            taxonomy[10] = 'YAPP:' + self.DateE1.val()
-
-        if self.HeightCB1.val() == 0:
-            if (out_type == 0):
-                taxonomy[11] ='H99'
-
-        else:
-            if self.HeightCB1.val() == 1:
-                taxonomy[11] = 'HBET:' + self.noStoreysE11.val() + ',' + self.noStoreysE12.val()
-            if self.HeightCB1.val() == 2:
-                taxonomy[11] = 'HEX:' + self.noStoreysE11.val()
-            if self.HeightCB1.val() == 3:
-                taxonomy[11] = 'HAPP:' + self.noStoreysE11.val()
-
-            if self.HeightCB2.val() == 0 and (out_type == 0):
-                taxonomy[12] = '+HB99'
-            if self.HeightCB2.val() == 1:
-                taxonomy[12] = '+HBBET:' + self.noStoreysE21.val() + ',' + self.noStoreysE22.val()
-            if self.HeightCB2.val() == 2:
-                taxonomy[12] = '+HBEX:' + self.noStoreysE21.val()
-            if self.HeightCB2.val() == 3:
-                taxonomy[12] = '+HBAPP:' + self.noStoreysE21.val()
-
-            if self.HeightCB3.val() == 0 and (out_type == 0):
-                taxonomy[13] = '+HF99'
-            if self.HeightCB3.val() == 1:
-                taxonomy[13] = '+HFBET:' + self.noStoreysE31.val() + ',' + self.noStoreysE32.val()
-            if self.HeightCB3.val() == 2:
-                taxonomy[13] = '+HFEX:' + self.noStoreysE31.val()
-            if self.HeightCB3.val() == 3:
-                taxonomy[13] = '+HFAPP:' + self.noStoreysE31.val()
-
-            if self.HeightCB4.val() == 0 and (out_type == 0):
-                taxonomy[14] = '+HD99'
-            if self.HeightCB4.val() == 1:
-                taxonomy[14] = '+HD:' + self.noStoreysE41.val()
-
-
-        if self.OccupancyCB1.val() == 0:
-            if (out_type == 0):
-                taxonomy[15] = 'OC99'
-
-        elif self.OccupancyCB1.val() == 1:
-            taxonomy[15] = 'RES'
-            if self.OccupancyCB2.val() == 0 and (out_type == 0):
-                taxonomy[16] = '+RES99'
-            if self.OccupancyCB2.val() == 1:
-                taxonomy[16] = '+RES1'
-            if self.OccupancyCB2.val() == 2:
-                taxonomy[16] = '+RES2'
-            if self.OccupancyCB2.val() == 3:
-                taxonomy[16] = '+RES2A'
-            if self.OccupancyCB2.val() == 4:
-                taxonomy[16] = '+RES2B'
-            if self.OccupancyCB2.val() == 5:
-                taxonomy[16] = '+RES2C'
-            if self.OccupancyCB2.val() == 6:
-                taxonomy[16] = '+RES2D'
-            if self.OccupancyCB2.val() == 7:
-                taxonomy[16] = '+RES2E'
-            if self.OccupancyCB2.val() == 8:
-                taxonomy[16] = '+RES2F'
-            if self.OccupancyCB2.val() == 9:
-                taxonomy[16] = '+RES3'
-            if self.OccupancyCB2.val() == 10:
-                taxonomy[16] = '+RES4'
-            if self.OccupancyCB2.val() == 11:
-                taxonomy[16] = '+RES5'
-            if self.OccupancyCB2.val() == 12:
-                taxonomy[16] = '+RES6'
-
-        elif self.OccupancyCB1.val() == 2:
-            taxonomy[15] = 'COM'
-            if self.OccupancyCB2.val() == 0 and (out_type == 0):
-                taxonomy[16] = '+COM99'
-            if self.OccupancyCB2.val() == 1:
-                taxonomy[16] = '+COM1'
-            if self.OccupancyCB2.val() == 2:
-                taxonomy[16] = '+COM2'
-            if self.OccupancyCB2.val() == 3:
-                taxonomy[16] = '+COM3'
-            if self.OccupancyCB2.val() == 4:
-                taxonomy[16] = '+COM4'
-            if self.OccupancyCB2.val() == 5:
-                taxonomy[16] = '+COM5'
-            if self.OccupancyCB2.val() == 6:
-                taxonomy[16] = '+COM6'
-            if self.OccupancyCB2.val() == 7:
-                taxonomy[16] = '+COM7'
-            if self.OccupancyCB2.val() == 8:
-                taxonomy[16] = '+COM8'
-            if self.OccupancyCB2.val() == 9:
-                taxonomy[16] = '+COM9'
-            if self.OccupancyCB2.val() == 10:
-                taxonomy[16] = '+COM10'
-            if self.OccupancyCB2.val() == 11:
-                taxonomy[16] = '+COM11'
-
-        elif self.OccupancyCB1.val() == 3:
-            taxonomy[15] = 'MIX'
-            if self.OccupancyCB2.val() == 0 and (out_type == 0):
-                taxonomy[16] = '+MIX99'
-            if self.OccupancyCB2.val() == 1:
-                taxonomy[16] = '+MIX1'
-            if self.OccupancyCB2.val() == 2:
-                taxonomy[16] = '+MIX2'
-            if self.OccupancyCB2.val() == 3:
-                taxonomy[16] = '+MIX3'
-            if self.OccupancyCB2.val() == 4:
-                taxonomy[16] = '+MIX4'
-            if self.OccupancyCB2.val() == 5:
-                taxonomy[16] = '+MIX5'
-            if self.OccupancyCB2.val() == 6:
-                taxonomy[16] = '+MIX6'
-
-        elif self.OccupancyCB1.val() == 4:
-            taxonomy[15] = 'IND'
-            if self.OccupancyCB2.val() == 0 and (out_type == 0):
-                taxonomy[16] = '+IND99'
-            if self.OccupancyCB2.val() == 1:
-                taxonomy[16] = '+IND1'
-            if self.OccupancyCB2.val() == 2:
-                taxonomy[16] = '+IND2'
-
-        elif self.OccupancyCB1.val() == 5:
-            taxonomy[15] = 'AGR'
-            if self.OccupancyCB2.val() == 0 and (out_type == 0):
-                taxonomy[16] = '+AGR99'
-            if self.OccupancyCB2.val() == 1:
-                taxonomy[16] = '+AGR1'
-            if self.OccupancyCB2.val() == 2:
-                taxonomy[16] = '+AGR2'
-            if self.OccupancyCB2.val() == 3:
-                taxonomy[16] = '+AGR3'
-
-        elif self.OccupancyCB1.val() == 6:
-            taxonomy[15] = 'ASS'
-            if self.OccupancyCB2.val() == 0 and (out_type == 0):
-                taxonomy[16] = '+ASS99'
-            if self.OccupancyCB2.val() == 1:
-                taxonomy[16] = '+ASS1'
-            if self.OccupancyCB2.val() == 2:
-                taxonomy[16] = '+ASS2'
-            if self.OccupancyCB2.val() == 3:
-                taxonomy[16] = '+ASS3'
-            if self.OccupancyCB2.val() == 4:
-                taxonomy[16] = '+ASS4'
-
-        elif self.OccupancyCB1.val() == 7:
-            taxonomy[15] = 'GOV'
-            if self.OccupancyCB2.val() == 0 and (out_type == 0):
-                taxonomy[16] = '+GOV99'
-            if self.OccupancyCB2.val() == 1:
-                taxonomy[16] = '+GOV1'
-            if self.OccupancyCB2.val() == 2:
-                taxonomy[16] = '+GOV2'
-
-        elif self.OccupancyCB1.val() == 8:
-            taxonomy[15] = 'EDU'
-            if self.OccupancyCB2.val() == 0 and (out_type == 0):
-                taxonomy[16] = '+EDU99'
-            if self.OccupancyCB2.val() == 1:
-                taxonomy[16] = '+EDU1'
-            if self.OccupancyCB2.val() == 2:
-                taxonomy[16] = '+EDU2'
-            if self.OccupancyCB2.val() == 3:
-                taxonomy[16] = '+EDU3'
-            if self.OccupancyCB2.val() == 4:
-                taxonomy[16] = '+EDU4'
-
-        elif self.OccupancyCB1.val() == 9:
-            taxonomy[15] = 'OCO'
-
-
-        if self.PositionCB.val() == 0 and (out_type == 0):
-            taxonomy[17] = 'BP99'
-        elif self.PositionCB.val() == 1:
-            taxonomy[17] = 'BPD'
-        elif self.PositionCB.val() == 2:
-            taxonomy[17] = 'BP1'
-        elif self.PositionCB.val() == 3:
-            taxonomy[17] = 'BP2'
-        elif self.PositionCB.val() == 4:
-            taxonomy[17] = 'BP3'
-        elif self.PositionCB.val() == 5:
-            taxonomy[17] = 'BPI'
-
-        if self.PlanShapeCB.val() == 0 and (out_type == 0):
-            taxonomy[18] = 'PLF99'
-        elif self.PlanShapeCB.val() == 1:
-            taxonomy[18] = 'PLFSQ'
-        elif self.PlanShapeCB.val() == 2:
-            taxonomy[18] = 'PLFSQO'
-        elif self.PlanShapeCB.val() == 3:
-            taxonomy[18] = 'PLFR'
-        elif self.PlanShapeCB.val() == 4:
-            taxonomy[18] = 'PLFRO'
-        elif self.PlanShapeCB.val() == 5:
-            taxonomy[18] = 'PLFL'
-        elif self.PlanShapeCB.val() == 6:
-            taxonomy[18] = 'PLFC'
-        elif self.PlanShapeCB.val() == 7:
-            taxonomy[18] = 'PLFCO'
-        elif self.PlanShapeCB.val() == 8:
-            taxonomy[18] = 'PLFD'
-        elif self.PlanShapeCB.val() == 9:
-            taxonomy[18] = 'PLFDO'
-        elif self.PlanShapeCB.val() == 10:
-            taxonomy[18] = 'PLFE'
-        elif self.PlanShapeCB.val() == 11:
-            taxonomy[18] = 'PLFH'
-        elif self.PlanShapeCB.val() == 12:
-            taxonomy[18] = 'PLFS'
-        elif self.PlanShapeCB.val() == 13:
-            taxonomy[18] = 'PLFT'
-        elif self.PlanShapeCB.val() == 14:
-            taxonomy[18] = 'PLFU'
-        elif self.PlanShapeCB.val() == 15:
-            taxonomy[18] = 'PLFX'
-        elif self.PlanShapeCB.val() == 16:
-            taxonomy[18] = 'PLFY'
-        elif self.PlanShapeCB.val() == 17:
-            taxonomy[18] = 'PLFP'
-        elif self.PlanShapeCB.val() == 18:
-            taxonomy[18] = 'PLFPO'
-        elif self.PlanShapeCB.val() == 19:
-            taxonomy[18] = 'PLFI'
-
-        if self.RegularityCB1.val() == 0:
-            if (out_type == 0):
-                taxonomy[19] = 'IR99'
-
-        else:
-            if self.RegularityCB1.val() == 1:
-                taxonomy[19] = 'IRRE'
-            if self.RegularityCB1.val() == 2:
-                taxonomy[19] = 'IRIR'
-                if self.RegularityCB2.val() == 0 and (out_type == 0):
-                    taxonomy[20] = '+IRPP:IRN'
-                if self.RegularityCB2.val() == 1:
-                    taxonomy[20] = '+IRPP:TOR'
-                if self.RegularityCB2.val() == 2:
-                    taxonomy[20] = '+IRPP:REC'
-                if self.RegularityCB2.val() == 3:
-                    taxonomy[20] = '+IRPP:IRHO'
-
-                if self.RegularityCB3.val() == 0 and (out_type == 0):
-                    taxonomy[21] = '+IRVP:IRN'
-                if self.RegularityCB3.val() == 1:
-                    taxonomy[21] = '+IRVP:SOS'
-                if self.RegularityCB3.val() == 2:
-                    taxonomy[21] = '+IRVP:CRW'
-                if self.RegularityCB3.val() == 3:
-                    taxonomy[21] = '+IRVP:SHC'
-                if self.RegularityCB3.val() == 4:
-                    taxonomy[21] = '+IRVP:POP'
-                if self.RegularityCB3.val() == 5:
-                    taxonomy[21] = '+IRVP:SET'
-                if self.RegularityCB3.val() == 6:
-                    taxonomy[21] = '+IRVP:CHV'
-                if self.RegularityCB3.val() == 7:
-                    taxonomy[21] = '+IRVP:IRVO'
-
-                if self.RegularityCB2.val() > 0:
-                    if self.RegularityCB4.val() == 0:
-                        taxonomy[22] = '+IRPS:IRN'
-                    if self.RegularityCB4.val() == 1:
-                        taxonomy[22] = '+IRPS:TOR'
-                    if self.RegularityCB4.val() == 2:
-                        taxonomy[22] = '+IRPS:REC'
-                    if self.RegularityCB4.val() == 3:
-                        taxonomy[22] = '+IRPS:IRHO'
-
-                if self.RegularityCB3.val() > 0:
-                    if self.RegularityCB5.val() == 0:
-                        taxonomy[23] = '+IRVS:IRN'
-                    if self.RegularityCB5.val() == 1:
-                        taxonomy[23] = '+IRVS:SOS'
-                    if self.RegularityCB5.val() == 2:
-                        taxonomy[23] = '+IRVS:CRW'
-                    if self.RegularityCB5.val() == 3:
-                        taxonomy[23] = '+IRVS:SHC'
-                    if self.RegularityCB5.val() == 4:
-                        taxonomy[23] = '+IRVS:POP'
-                    if self.RegularityCB5.val() == 5:
-                        taxonomy[23] = '+IRVS:SET'
-                    if self.RegularityCB5.val() == 6:
-                        taxonomy[23] = '+IRVS:CHV'
-                    if self.RegularityCB5.val() == 7:
-                        taxonomy[23] = '+IRVS:IRVO'
-
-
-
-
-        if self.WallsCB.val() == 0 and (out_type == 0):
-            taxonomy[24] = 'EW99'
-        if self.WallsCB.val() == 1:
-            taxonomy[24] = 'EWC'
-        if self.WallsCB.val() == 2:
-            taxonomy[24] = 'EWG'
-        if self.WallsCB.val() == 3:
-            taxonomy[24] = 'EWE'
-        if self.WallsCB.val() == 4:
-            taxonomy[24] = 'EWMA'
-        if self.WallsCB.val() == 5:
-            taxonomy[24] = 'EWME'
-        if self.WallsCB.val() == 6:
-            taxonomy[24] = 'EWV'
-        if self.WallsCB.val() == 7:
-            taxonomy[24] = 'EWW'
-        if self.WallsCB.val() == 8:
-            taxonomy[24] = 'EWSL'
-        if self.WallsCB.val() == 9:
-            taxonomy[24] = 'EWPL'
-        if self.WallsCB.val() == 10:
-            taxonomy[24] = 'EWCB'
-        if self.WallsCB.val() == 11:
-            taxonomy[24] = 'EWO'
-
-        if self.RoofCB1.val() == 0 and (out_type == 0):
-            taxonomy[25] = 'RSH99'
-        if self.RoofCB1.val() == 1:
-            taxonomy[25] = 'RSH1'
-        if self.RoofCB1.val() == 2:
-            taxonomy[25] = 'RSH2'
-        if self.RoofCB1.val() == 3:
-            taxonomy[25] = 'RSH3'
-        if self.RoofCB1.val() == 4:
-            taxonomy[25] = 'RSH4'
-        if self.RoofCB1.val() == 5:
-            taxonomy[25] = 'RSH5'
-        if self.RoofCB1.val() == 6:
-            taxonomy[25] = 'RSH6'
-        if self.RoofCB1.val() == 7:
-            taxonomy[25] = 'RSH7'
-        if self.RoofCB1.val() == 8:
-            taxonomy[25] = 'RSH8'
-        if self.RoofCB1.val() == 9:
-            taxonomy[25] = 'RSH9'
-        if self.RoofCB1.val() == 10:
-            taxonomy[25] = 'RSHO'
-
-        if self.RoofCB2.val() == 0 and (out_type == 0):
-            taxonomy[26] = 'RMT99'
-        if self.RoofCB2.val() == 1:
-            taxonomy[26] = 'RMN'
-        if self.RoofCB2.val() == 2:
-            taxonomy[26] = 'RMT1'
-        if self.RoofCB2.val() == 3:
-            taxonomy[26] = 'RMT2'
-        if self.RoofCB2.val() == 4:
-            taxonomy[26] = 'RMT3'
-        if self.RoofCB2.val() == 5:
-            taxonomy[26] = 'RMT4'
-        if self.RoofCB2.val() == 6:
-            taxonomy[26] = 'RMT5'
-        if self.RoofCB2.val() == 7:
-            taxonomy[26] = 'RMT6'
-        if self.RoofCB2.val() == 8:
-            taxonomy[26] = 'RMT7'
-        if self.RoofCB2.val() == 9:
-            taxonomy[26] = 'RMT8'
-        if self.RoofCB2.val() == 10:
-            taxonomy[26] = 'RMT9'
-        if self.RoofCB2.val() == 11:
-            taxonomy[26] = 'RMT10'
-        if self.RoofCB2.val() == 12:
-            taxonomy[26] = 'RMT11'
-        if self.RoofCB2.val() == 13:
-            taxonomy[26] = 'RMTO'
-
-        if self.RoofCB3.val() == 0:
-            if (out_type == 0):
-                taxonomy[27] = 'R99'
-
-        else:
-            if self.RoofCB3.val() == 1:
-                taxonomy[27] = 'RM'
-                if self.RoofCB4.val() == 0 and (out_type == 0):
-                    taxonomy[28] = 'RM99'
-                if self.RoofCB4.val() == 1:
-                    taxonomy[28] = 'RM1'
-                if self.RoofCB4.val() == 2:
-                    taxonomy[28] = 'RM2'
-                if self.RoofCB4.val() == 3:
-                    taxonomy[28] = 'RM3'
-
-            elif self.RoofCB3.val() == 2:
-                taxonomy[27] = 'RE'
-                if self.RoofCB4.val() == 0 and (out_type == 0):
-                    taxonomy[28] = 'RE99'
-                if self.RoofCB4.val() == 1:
-                    taxonomy[28] = 'RE1'
-
-            elif self.RoofCB3.val() == 3:
-                taxonomy[27] = 'RC'
-                if self.RoofCB4.val() == 0 and (out_type == 0):
-                    taxonomy[28] = 'RC99'
-                if self.RoofCB4.val() == 1:
-                    taxonomy[28] = 'RC1'
-                if self.RoofCB4.val() == 2:
-                    taxonomy[28] = 'RC2'
-                if self.RoofCB4.val() == 3:
-                    taxonomy[28] = 'RC3'
-                if self.RoofCB4.val() == 4:
-                    taxonomy[28] = 'RC4'
-
-            elif self.RoofCB3.val() == 4:
-                taxonomy[27] = 'RME'
-                if self.RoofCB4.val() == 0 and (out_type == 0):
-                    taxonomy[28] = 'RME99'
-                if self.RoofCB4.val() == 1:
-                    taxonomy[28] = 'RME1'
-                if self.RoofCB4.val() == 2:
-                    taxonomy[28] = 'RME2'
-                if self.RoofCB4.val() == 3:
-                    taxonomy[28] = 'RME3'
-
-            elif self.RoofCB3.val() == 5:
-                taxonomy[27] = 'RWO'
-                if self.RoofCB4.val() == 0 and (out_type == 0):
-                    taxonomy[28] = 'RWO99'
-                if self.RoofCB4.val() == 1:
-                    taxonomy[28] = 'RWO1'
-                if self.RoofCB4.val() == 2:
-                    taxonomy[28] = 'RWO2'
-                if self.RoofCB4.val() == 3:
-                    taxonomy[28] = 'RWO3'
-                if self.RoofCB4.val() == 4:
-                    taxonomy[28] = 'RWO4'
-                if self.RoofCB4.val() == 5:
-                    taxonomy[28] = 'RWO5'
-
-            elif self.RoofCB3.val() == 6:
-                taxonomy[27] = 'RFA'
-                if self.RoofCB4.val() == 0:
-                    taxonomy[28] = 'RFA1'
-                if self.RoofCB4.val() == 1:
-                    taxonomy[28] = 'RFAO'
-
-            elif self.RoofCB3.val() == 7:
-                taxonomy[27] = 'RO'
-
-
-
-        if self.RoofCB5.val() == 0 and (out_type == 0):
-            taxonomy[29] = 'RWC99'
-        if self.RoofCB5.val() == 1:
-            taxonomy[29] = 'RWCN'
-        if self.RoofCB5.val() == 2:
-            taxonomy[29] = 'RWCP'
-        if self.RoofCB5.val() == 3:
-            taxonomy[29] = 'RTD99'
-        if self.RoofCB5.val() == 4:
-            taxonomy[29] = 'RTDN'
-        if self.RoofCB5.val() == 5:
-            taxonomy[29] = 'RTDP'
-
-        if self.FloorCB1.val() == 0:
-            if (out_type == 0):
-                taxonomy[30] = 'F99'
-
-        elif self.FloorCB1.val() == 1:
-            taxonomy[30] = 'FN'
-
-        else:
-            if self.FloorCB1.val() == 2:
-                taxonomy[30] = 'FM'
-                if self.FloorCB2.val() == 0 and (out_type == 0):
-                    taxonomy[31] = '+FM99'
-                if self.FloorCB2.val() == 1:
-                    taxonomy[31] = '+FM1'
-                if self.FloorCB2.val() == 2:
-                    taxonomy[31] = '+FM2'
-                if self.FloorCB2.val() == 3:
-                    taxonomy[31] = '+FM3'
-
-            elif self.FloorCB1.val() == 3:
-                taxonomy[30] = 'FE'
-                if self.FloorCB2.val() == 0 and (out_type == 0):
-                    taxonomy[31] = '+FE99'
-
-            elif self.FloorCB1.val() == 4:
-                taxonomy[30] = 'FC'
-                if self.FloorCB2.val() == 0 and (out_type == 0):
-                    taxonomy[31] = '+FC99'
-                if self.FloorCB2.val() == 1:
-                    taxonomy[31] = '+FC1'
-                if self.FloorCB2.val() == 2:
-                    taxonomy[31] = '+FC2'
-                if self.FloorCB2.val() == 3:
-                    taxonomy[31] = '+FC3'
-                if self.FloorCB2.val() == 4:
-                    taxonomy[31] = '+FC4'
-
-            elif self.FloorCB1.val() == 5:
-                taxonomy[30] = 'FME'
-                if self.FloorCB2.val() == 0 and (out_type == 0):
-                    taxonomy[31] = '+FME99'
-                if self.FloorCB2.val() == 1:
-                    taxonomy[31] = '+FME1'
-                if self.FloorCB2.val() == 2:
-                    taxonomy[31] = '+FME2'
-                if self.FloorCB2.val() == 3:
-                    taxonomy[31] = '+FME3'
-
-            elif self.FloorCB1.val() == 6:
-                taxonomy[30] = 'FW'
-                if self.FloorCB2.val() == 0 and (out_type == 0):
-                    taxonomy[31] = '+FW99'
-                if self.FloorCB2.val() == 1:
-                    taxonomy[31] = '+FW1'
-                if self.FloorCB2.val() == 2:
-                    taxonomy[31] = '+FW2'
-                if self.FloorCB2.val() == 3:
-                    taxonomy[31] = '+FW3'
-                if self.FloorCB2.val() == 4:
-                    taxonomy[31] = '+FW4'
-
-            elif self.FloorCB1.val() == 7:
-                taxonomy[30] = 'FO'
-
-
-        if self.FloorCB3.val() == 0 and (out_type == 0):
-            taxonomy[32] = 'FWC99'
-        if self.FloorCB3.val() == 1:
-            taxonomy[32] = 'FWCN'
-        if self.FloorCB3.val() == 2:
-            taxonomy[32] = 'FWCP'
-
-        if self.FoundationsCB.val() == 0 and (out_type == 0):
-            taxonomy[33] = 'FOS99'
-        if self.FoundationsCB.val() == 1:
-            taxonomy[33] = 'FOSSL'
-        if self.FoundationsCB.val() == 2:
-            taxonomy[33] = 'FOSN'
-        if self.FoundationsCB.val() == 3:
-            taxonomy[33] = 'FOSDL'
-        if self.FoundationsCB.val() == 4:
-            taxonomy[33] = 'FOSDN'
-        if self.FoundationsCB.val() == 5:
-            taxonomy[33] = 'FOSO'
-
-
-        # // TAIL
-        direction1 = 'DX'
-        direction2 = 'DY'
-
-        if self.Direction1RB1.checked()  and (out_type == 0):
-            direction1 = direction1 + '+D99'
-            direction2 = direction2 + '+D99'
-
-        elif self.Direction1RB2.checked():
-            direction1 = direction1 + '+PF'
-            direction2 = direction2 + '+OF'
-
-
-        # /*
-        #    0) direction X
-
-        #       0 - Material type
-        #       1 - Material technology
-        #       34- Material tech adds
-        #       2 - Material properties
-
-        #       3 - Type of lateral system
-        #       4 - System ductility
-
-        #       direction Y
-
-        #       5 - Material type
-        #       6 - Material technology
-        #       35- Material tech adds
-        #       7 - Material properties
-
-        #    5) 8 - Type of lateral system
-        #       9 - System ductility
-
-        #       11 - Height above the ground
-        #       12 - Height below the ground
-        #       13 - Height of grade
-        #       14 - Slope of the ground
-
-        #       10 - Date of construction
-
-        #       15 - Occupancy type
-        #       16 - Occupancy description
-
-        #       17 - Position
-
-        #   10) 18 - Plan
-
-        #       19 - Type of irregularity
-        #       20 - Plan irregularity(primary)
-        #       22 - Vertical irregularity(primary)
-        #       21 - Plan irregularity(secondary)
-        #       23 - Vertical irregularity(secondary)
-
-        #       24- Material of exterior walls
-
-        #       25 - Roof shape
-        #       26 - Roof covering
-        #       27 - Roof system material
-        #       28 - Roof system type
-        #       29 - Roof connections
-
-        #       30 - Floor system material
-        #       31 - Floor system type
-        #       32 - Floor connections
-
-        #   15) 33 - Foundation
-        #       */
-
-        # /* roof special case */
-        roof_atom_empty = True
-        for i in range(25, 30):
-            if taxonomy[i] != '':
-                if roof_atom_empty:
-                    roof_atom_empty = False
-                else:
-                    taxonomy[i] = "+" + str(taxonomy[i])
-
-
-        # /* floor special case */
-        floor_atom_empty = True
-        floor_atom_primaries = [30, 32]
-        for i in floor_atom_primaries:
-            if taxonomy[i] != '':
-                if floor_atom_empty:
-                    floor_atom_empty = False
-                else:
-                    taxonomy[i] = "+" + str(taxonomy[i])
-
-
-        ResTax = (str(direction1) + '/' + str(taxonomy[0]) + str(taxonomy[1]) + str(taxonomy[34]) + str(taxonomy[2]) +
-                  '/' + str(taxonomy[3]) + str(taxonomy[4]) +
-                  '/' + direction2 + '/' + str(taxonomy[5]) + str(taxonomy[6]) + str(taxonomy[35]) + str(taxonomy[7]) +
-                  '/' + str(taxonomy[8]) + str(taxonomy[9]) +
-                  '/' + str(taxonomy[11]) + str(taxonomy[12]) + str(taxonomy[13]) + str(taxonomy[14]) + '/' + str(taxonomy[10]) +
-                  '/' + str(taxonomy[15]) + str(taxonomy[16]) + '/' + str(taxonomy[17]) + '/' + str(taxonomy[18]) +
-                  '/' + str(taxonomy[19]) + str(taxonomy[20]) + str(taxonomy[22]) + str(taxonomy[21]) + str(taxonomy[23]) +
-                  '/' + str(taxonomy[24]) + '/' + str(taxonomy[25]) + str(taxonomy[26]) + str(taxonomy[27]) + str(taxonomy[28]) + str(taxonomy[29]) +
-                  '/' + str(taxonomy[30]) + str(taxonomy[31]) + str(taxonomy[32]) + '/' + str(taxonomy[33]))
-
-        if out_type == 2:
-            is_first = True
-            ResAtoms = ResTax.split('/')
-            if ResAtoms[1] == ResAtoms[4] and ResAtoms[2] == ResAtoms[5]:
-                # // same params case
-                ResAtoms[3] = ResAtoms[4] = ResAtoms[5] = ""
-                if self.Direction1RB1.checked():
-                    ResAtoms[0] = ""
-
-                else:
-                    ResAtoms[0] = "PF"
-
-
-            else:
-                if self.Direction1RB1.checked():
-                    ResAtoms[0] = "DX"
-                    ResAtoms[3] = "DY"
-
-                else:
-                    ResAtoms[0] = "DX+PF"
-                    ResAtoms[3] = "DY+PO"
-
-
-            ResTax = ""
-            for id, v in enumerate(ResAtoms):
-                if ResAtoms[id] == "":
-                    continue
-
-                if not is_first:
-                    ResTax += "/"
-                else:
-                    is_first = False
-                ResTax += ResAtoms[id]
-
-
-        return (ResTax)
-
+    def taxt_values(self):
+        """return a TaxtValues with the current state of the widgets"""
+        values = TaxtValues.__new__(TaxtValues)
+        values.Direction1RB = 1 if self.Direction1RB2.checked() else 0
+        for field in TaxtValues.INT_FIELDS[1:]:
+            setattr(values, field, getattr(self, field)._val)
+        for field in TaxtValues.STR_FIELDS:
+            setattr(values, field, getattr(self, field)._val)
+        return values
 
+    def BuildTaxonomyString(self, out_type):
+        return build_taxonomy_string(self.taxt_values(), out_type)
 
     def populate(self, s, ret_s):
         # var i
@@ -3216,12 +2208,11 @@ class Taxonomy(object):
                 return (False)
 
 
-            for i in range(0, len(material)):
-                if mat[0] == material[i]['id']:
-                    mat_id = mat[0]
-                    getattr(self, mat_ddown[direct]).val(i)
-                    getattr(self, mat_selec[direct])()
-                    break
+            i = material_idx.get(mat[0])
+            if i is not None:
+                mat_id = mat[0]
+                self._val_select(getattr(self, mat_ddown[direct]), i,
+                                 getattr(self, mat_selec[direct]))
             else:
                 ret_s.s = "Not identified '" + mat[0] + "' material for 'Direction " + ("X" if direct == 0 else "Y") + "'"
                 return (False)
@@ -3230,42 +2221,24 @@ class Taxonomy(object):
                 mat_atom = mat[sub_i]
 
                 # Material technology
-                completed = False
-                for i in range( 0, len(mat_tech[mat_id])):
-                    if mat_atom == mat_tech[mat_id][i]['id']:
-                        getattr(self, mat_tecn_ddown[direct]).val(i)
-                        getattr(self, mat_tecn_selec[direct])()
-                        break
-                else:
-                    completed = True
-
-                if not completed:
+                i = mat_tech_idx[mat_id].get(mat_atom)
+                if i is not None:
+                    self._val_select(getattr(self, mat_tecn_ddown[direct]), i,
+                                     getattr(self, mat_tecn_selec[direct]))
                     continue
 
                 # Material technology added
-                completed = False
-                for i in range(0, len(mat_tead[mat_id])):
-                    if mat_atom == mat_tead[mat_id][i]['id']:
-                        getattr(self, mat_tead_ddown[direct]).val(i)
-                        getattr(self, mat_tead_selec[direct])()
-                        break
-                else:
-                    completed = True
-
-                if not completed:
+                i = mat_tead_idx[mat_id].get(mat_atom)
+                if i is not None:
+                    self._val_select(getattr(self, mat_tead_ddown[direct]), i,
+                                     getattr(self, mat_tead_selec[direct]))
                     continue
 
                 # Material properties
-                completed = False
-                for i in range(0, len(mat_prop[mat_id])):
-                    if mat_atom == mat_prop[mat_id][i]['id']:
-                        getattr(self, mat_prop_ddown[direct]).val(i)
-                        getattr(self, mat_prop_selec[direct])()
-                        break
-                else:
-                    completed = True
-
-                if not completed:
+                i = mat_prop_idx[mat_id].get(mat_atom)
+                if i is not None:
+                    self._val_select(getattr(self, mat_prop_ddown[direct]), i,
+                                     getattr(self, mat_prop_selec[direct]))
                     continue
 
                 ret_s.s = "Not identified '" + mat_atom + "' as specification of '" + mat_id + "' material for 'Direction " + ("X" if direct == 0 else "Y") + "'."
@@ -3275,13 +2248,11 @@ class Taxonomy(object):
             #
             #  Lateral load resisting system: type
             #
-            for i in range(0, len(llrs_type[mat_id])):
-                llrs_id = llrs_type[mat_id][i]['id']
-
-                if llrs[0] == llrs_id:
-                    getattr(self, llrs_ddown[direct]).val(i)
-                    getattr(self, llrs_selec[direct])()
-                    break
+            i = llrs_type_idx[mat_id].get(llrs[0])
+            if i is not None:
+                llrs_id = llrs[0]
+                self._val_select(getattr(self, llrs_ddown[direct]), i,
+                                 getattr(self, llrs_selec[direct]))
             else:
                 ret_s.s = "Not identified '" + llrs[0] + "' as LLRS of '" + mat_id + "' material for 'Direction " + ("X" if direct == 0 else "Y") + "'."
                 return (False)
@@ -3290,16 +2261,10 @@ class Taxonomy(object):
                 llrs_atom = llrs[sub_i]
 
                 # Ductility
-                completed = False
-                for i in range(0, len(llrs_duct[llrs_id])):
-                    if llrs_atom == llrs_duct[llrs_id][i]['id']:
-                        getattr(self, llrs_duct_ddown[direct]).val(i)
-                        getattr(self, llrs_duct_selec[direct])()
-                        break
-                else:
-                    completed = True
-
-                if not completed:
+                i = llrs_duct_idx[llrs_id].get(llrs_atom)
+                if i is not None:
+                    self._val_select(getattr(self, llrs_duct_ddown[direct]), i,
+                                     getattr(self, llrs_duct_selec[direct]))
                     continue
 
                 ret_s.s = "Not identified '" + llrs_atom + "' as specification of '" + llrs[0] + "' LLRS of '" + mat_id + "' material for 'Direction " + ("X" if direct == 0 else"Y") + "'."
@@ -3415,15 +2380,14 @@ class Taxonomy(object):
 
                 # set value (in the case of 'HD' the real index must be (h_type - 1))
                 getattr(self, 'HeightCB' + h_cbid[h_grp]).val(h_type - 1 if h_map[h_id] == 'HD' else h_type)
-                getattr(self, 'noStoreysE' + h_cbid[h_grp] + '1').val(h_vals[0])
-
-                h_cbfun[h_grp](None)
+                self._val_select(getattr(self, 'noStoreysE' + h_cbid[h_grp] + '1'),
+                                 h_vals[0], h_cbfun[h_grp])
 
             else:
                 # missing case for H99 case
                 the_value = h_type - 1 if h_map[h_id] == 'HD' else h_type
-                getattr(self, 'HeightCB' + h_cbid[h_grp]).val(the_value)
-                h_cbfun[h_grp](None)
+                self._val_select(getattr(self, 'HeightCB' + h_cbid[h_grp]),
+                                 the_value, h_cbfun[h_grp])
 
 
 
@@ -3441,11 +2405,10 @@ class Taxonomy(object):
             return (False)
 
 
-        for i in range(0, len(date_type)):
-            if date_label == date_type[i]['id']:
-                date_index = i
-                date_id = date_label
-                break
+        i = date_type_idx.get(date_label)
+        if i is not None:
+            date_index = i
+            date_id = date_label
         else:
             ret_s.s = "Not identified '" + date_label + "' as specification of date."
             return (False)
@@ -3499,15 +2462,13 @@ class Taxonomy(object):
 
                 self.DateE2.val(date_vals[1])
 
-            self.DateCB1.val(date_index)
-            self.taxt_DateCB1Select(None)
+            self._val_select(self.DateCB1, date_index, self.taxt_DateCB1Select)
             self.DateE1.val(date_vals[0])
 
             self.taxt_ValidateDate()
 
         else:
-            self.DateCB1.val(0)
-            self.taxt_DateCB1Select(None)
+            self._val_select(self.DateCB1, 0, self.taxt_DateCB1Select)
 
 
         #
@@ -3524,12 +2485,10 @@ class Taxonomy(object):
 
 
 
-        for i in range(0, len(occu_type)):
-            if occu_label == occu_type[i]['id']:
-                occu_id = occu_label
-                self.OccupancyCB1.val(i)
-                self.taxt_OccupancyCB1Select(None)
-                break
+        i = occu_type_idx.get(occu_label)
+        if i is not None:
+            occu_id = occu_label
+            self._val_select(self.OccupancyCB1, i, self.taxt_OccupancyCB1Select)
         else:
             ret_s.s = "Not identified '" + occu_label + "' as specification of occupancy."
             return (False)
@@ -3547,11 +2506,9 @@ class Taxonomy(object):
                 self.OccupancyCB2.disabled(True)
             else:
                 self.OccupancyCB2.disabled(False)
-                for i in range(0, len(occu_spec[occu_id])):
-                    if occu_atom == occu_spec[occu_id][i]['id']:
-                        self.OccupancyCB2.val(i)
-                        self.taxt_OccupancyCB2Select(None)
-                        break
+                i = occu_spec_idx[occu_id].get(occu_atom)
+                if i is not None:
+                    self._val_select(self.OccupancyCB2, i, self.taxt_OccupancyCB2Select)
                 else:
                     ret_s.s = ("Not identified '" + occu_atom +
                                "' as specification of '" + occu_id +
@@ -3570,13 +2527,11 @@ class Taxonomy(object):
             return (False)
 
 
-        for i in range(0, len(bupo_type)):
-            if bupo_label == bupo_type[i]['id']:
-                # 'bupo_id' assigned but never used
-                # bupo_id = bupo_label
-                self.PositionCB.val(i)
-                self.taxt_PositionCBSelect(None)
-                break
+        i = bupo_type_idx.get(bupo_label)
+        if i is not None:
+            # 'bupo_id' assigned but never used
+            # bupo_id = bupo_label
+            self._val_select(self.PositionCB, i, self.taxt_PositionCBSelect)
         else:
             ret_s.s = "Not identified '" + bupo_label + "' as specification of building position within a block."
             return (False)
@@ -3594,13 +2549,11 @@ class Taxonomy(object):
             return (False)
 
 
-        for i in range(0, len(plsh_type)):
-            if plsh_label == plsh_type[i]['id']:
-                # assigned but never used
-                # plsh_id = plsh_label
-                self.PlanShapeCB.val(i)
-                self.taxt_PlanShapeCBSelect(None)
-                break
+        i = plsh_type_idx.get(plsh_label)
+        if i is not None:
+            # assigned but never used
+            # plsh_id = plsh_label
+            self._val_select(self.PlanShapeCB, i, self.taxt_PlanShapeCBSelect)
         else:
             ret_s.s = "Not identified '" + plsh_label + "' as specification of shape of the building plan."
             return (False)
@@ -3616,11 +2569,10 @@ class Taxonomy(object):
         stir = sar[11].split('+')
         stir_label = stir[0]
 
-        for i in range(0, len(stir_type)):
-            if stir_label == stir_type[i]['id']:
-                stir_id = stir_label
-                ir_values[0] = i
-                break
+        i = stir_type_idx.get(stir_label)
+        if i is not None:
+            stir_id = stir_label
+            ir_values[0] = i
         else:
             ret_s.s = "Not identified '" + stir_label + "' as specification of shape of the building plan."
             return (False)
@@ -3642,57 +2594,33 @@ class Taxonomy(object):
 
             # Plan structural irregularity - primary
             if s_label == "IRPP":
-                completed = False
-                for i in range(0, len(plan_irre)):
-                    if stir_atom == plan_irre[i]['id']:
-                        plir_id = stir_atom
-                        ir_values[1] = i
-                        break
-                else:
-                    completed = True
-
-                if not completed:
+                i = plan_irre_idx.get(stir_atom)
+                if i is not None:
+                    plir_id = stir_atom
+                    ir_values[1] = i
                     continue
 
 
             elif s_label == "IRPS":
-                completed = False
-                for i in range(0, len(plan_seco)):
-                    if stir_atom == plan_seco[i]['id']:
-                        plse_id = stir_atom
-                        ir_values[3] = i
-                        break
-                else:
-                    completed = True
-
-                if not completed:
+                i = plan_seco_idx.get(stir_atom)
+                if i is not None:
+                    plse_id = stir_atom
+                    ir_values[3] = i
                     continue
 
             elif s_label == "IRVP":
-                completed = False
-                for i in range(0, len(vert_irre)):
-                    if stir_atom == vert_irre[i]['id']:
-                        veir_id = stir_atom
-                        ir_values[2] = i
-                        break
-                else:
-                    completed = True
-
-                if not completed:
+                i = vert_irre_idx.get(stir_atom)
+                if i is not None:
+                    veir_id = stir_atom
+                    ir_values[2] = i
                     continue
 
 
             elif s_label == "IRVS":
-                completed = False
-                for i in range(0, len(vert_seco)):
-                    if stir_atom == vert_seco[i]['id']:
-                        vese_id = stir_atom
-                        ir_values[4] = i
-                        break
-                else:
-                    completed = True
-
-                if not completed:
+                i = vert_seco_idx.get(stir_atom)
+                if i is not None:
+                    vese_id = stir_atom
+                    ir_values[4] = i
                     continue
 
             ret_s.s = "Not identified '" + stir_atom + "' as specification of structural irregularity."
@@ -3710,24 +2638,19 @@ class Taxonomy(object):
         # all data are retrieved before the population phase to avoid unrequired reset of values permformed
         # by hierarchical ancestors
         if ir_values[0] > -1:
-            self.RegularityCB1.val(ir_values[0])
-            self.taxt_RegularityCB1Select(None)
+            self._val_select(self.RegularityCB1, ir_values[0], self.taxt_RegularityCB1Select)
 
         if ir_values[1] > -1:
-            self.RegularityCB2.val(ir_values[1])
-            self.taxt_RegularityCB2Select(None)
+            self._val_select(self.RegularityCB2, ir_values[1], self.taxt_RegularityCB2Select)
 
         if ir_values[2] > -1:
-            self.RegularityCB3.val(ir_values[2])
-            self.taxt_RegularityCB3Select(None)
+            self._val_select(self.RegularityCB3, ir_values[2], self.taxt_RegularityCB3Select)
 
         if ir_values[3] > -1:
-            self.RegularityCB4.val(ir_values[3])
-            self.taxt_RegularityCB4Select(None)
+            self._val_select(self.RegularityCB4, ir_values[3], self.taxt_RegularityCB4Select)
 
         if ir_values[4] > -1:
-            self.RegularityCB5.val(ir_values[4])
-            self.taxt_RegularityCB5Select(None)
+            self._val_select(self.RegularityCB5, ir_values[4], self.taxt_RegularityCB5Select)
 
 
         #
@@ -3741,13 +2664,11 @@ class Taxonomy(object):
             return (False)
 
 
-        for i in range(0, len(wall_type)):
-            if wall_label == wall_type[i]['id']:
-                # 'wall_id' assigned but not used
-                # wall_id = wall_label
-                self.WallsCB.val(i)
-                self.taxt_WallsCBSelect(None)
-                break
+        i = wall_type_idx.get(wall_label)
+        if i is not None:
+            # 'wall_id' assigned but not used
+            # wall_id = wall_label
+            self._val_select(self.WallsCB, i, self.taxt_WallsCBSelect)
         else:
             ret_s.s = "Not identified '" + wall_label + "' as specification of exterior walls."
             return (False)
@@ -3769,72 +2690,37 @@ class Taxonomy(object):
             rosh_atom = rosh[sub_i]
 
             # roof shape
-            completed = False
-            for i in range(0, len(roof_shap)):
-                if rosh_atom == roof_shap[i]['id']:
-                    self.RoofCB1.val(i)
-                    self.taxt_RoofCB1Select(None)
-                    break
-            else:
-                completed = True
-
-            if not completed:
+            i = roof_shap_idx.get(rosh_atom)
+            if i is not None:
+                self._val_select(self.RoofCB1, i, self.taxt_RoofCB1Select)
                 continue
 
             # roof covering
-            completed = False
-            for i in range(0, len(roof_cove)):
-                if rosh_atom == roof_cove[i]['id']:
-                    self.RoofCB2.val(i)
-                    self.taxt_RoofCB2Select(None)
-                    break
-            else:
-                completed = True
-
-            if not completed:
+            i = roof_cove_idx.get(rosh_atom)
+            if i is not None:
+                self._val_select(self.RoofCB2, i, self.taxt_RoofCB2Select)
                 continue
 
             # roof system material
-            completed = False
-            for i in range(0, len(roof_mate)):
-                if rosh_atom == roof_mate[i]['id']:
-                    roof_system_set = True
-                    roof_system_val = rosh_atom
-
-                    self.RoofCB3.val(i)
-                    self.taxt_RoofCB3Select(None)
-                    break
-            else:
-                completed = True
+            i = roof_mate_idx.get(rosh_atom)
+            if i is not None:
+                roof_system_set = True
+                roof_system_val = rosh_atom
 
-            if not completed:
+                self._val_select(self.RoofCB3, i, self.taxt_RoofCB3Select)
                 continue
 
             # roof connections
-            completed = False
-            for i in range(0, len(roof_conn)):
-                if rosh_atom == roof_conn[i]['id']:
-                    self.RoofCB5.val(i)
-                    self.taxt_RoofCB5Select(None)
-                    break
-            else:
-                completed = True
-
-            if not completed:
+            i = roof_conn_idx.get(rosh_atom)
+            if i is not None:
+                self._val_select(self.RoofCB5, i, self.taxt_RoofCB5Select)
                 continue
 
             if roof_system_set:
                 # roof connections
-                completed = False
-                for i in range(0, len(roof_sys[roof_system_val])):
-                    if rosh_atom == roof_sys[roof_system_val][i]['id']:
-                        self.RoofCB4.val(i)
-                        self.taxt_RoofCB4Select(None)
-                        break
-                else:
-                    completed = True
-
-                if not completed:
+                i = roof_sys_idx[roof_system_val].get(rosh_atom)
+                if i is not None:
+                    self._val_select(self.RoofCB4, i, self.taxt_RoofCB4Select)
                     continue
 
             ret_s.s = "Not identified '" + rosh_atom + "' as specification of roof."
@@ -3855,46 +2741,23 @@ class Taxonomy(object):
             flma_atom = flma[sub_i]
 
             # floor system material
-            completed = False
-            for i in range(0, len(floo_syma)):
-
-                if flma_atom == floo_syma[i]['id']:
-                    flma_id = floo_syma[i]['id']
-                    self.FloorCB1.val(i)
-                    self.taxt_FloorCB1Select(None)
-                    break
-            else:
-                completed = True
-
-            if not completed:
+            i = floo_syma_idx.get(flma_atom)
+            if i is not None:
+                flma_id = flma_atom
+                self._val_select(self.FloorCB1, i, self.taxt_FloorCB1Select)
                 continue
 
             # floor system type
-            completed = False
-            for i in range(0, len(floo_syty)):
-                if flma_atom == floo_syty[i]['id']:
-                    self.FloorCB3.val(i)
-                    self.taxt_FloorCB3Select(None)
-                    break
-            else:
-                completed = True
-
-            if not completed:
+            i = floo_syty_idx.get(flma_atom)
+            if i is not None:
+                self._val_select(self.FloorCB3, i, self.taxt_FloorCB3Select)
                 continue
 
             if flma_id != -1:
                 # floor connections
-                completed = False
-                for i in range(0, len(floo_conn[flma_id])):
-                    if flma_atom == floo_conn[flma_id][i]['id']:
-                        self.FloorCB2.val(i)
-                        self.taxt_FloorCB2Select(None)
-                        break
-
-                else:
-                    completed = True
-
-                if not completed:
+                i = floo_conn_idx[flma_id].get(flma_atom)
+                if i is not None:
+                    self._val_select(self.FloorCB2, i, self.taxt_FloorCB2Select)
                     continue
 
 
@@ -3913,13 +2776,11 @@ class Taxonomy(object):
             ret_s.s = "Foundations not defined properly."
             return (False)
 
-        for i in range(0, len(foun_type)):
-            if foun_label == foun_type[i]['id']:
-                # 'foun_id' assigned but never used
-                # foun_id = foun_label
-                self.FoundationsCB.val(i)
-                self.taxt_FoundationsCBSelect(None)
-                break
+        i = foun_type_idx.get(foun_label)
+        if i is not None:
+            # 'foun_id' assigned but never used
+            # foun_id = foun_label
+            self._val_select(self.FoundationsCB, i, self.taxt_FoundationsCBSelect)
         else:
             ret_s.s = "Not identified '" + foun_label + "' as specification of foundation."
             return (False)
@@ -3966,9 +2827,18 @@ class Taxonomy(object):
                 # NOTE: all console.log calls will be removed
                 # after a short quarantine period
                 # console.log("PRE POP: " + taxonomy)
-                self.taxt_Initiate(False)
+                if self.quiet:
+                    self.quiet_begin()
+                    try:
+                        self.taxt_Initiate(False)
+                        populated = self.populate(taxonomy, ret_s)
+                    finally:
+                        self.quiet_end()
+                else:
+                    self.taxt_Initiate(False)
+                    populated = self.populate(taxonomy, ret_s)
 
-                if self.populate(taxonomy, ret_s) is False:
+                if populated is False:
                     error = ret_s.s
                     break
 
@@ -3981,8 +2851,7 @@ class Taxonomy(object):
                 self.resultE = self.resultE_virt
                 return (str(self.resultE), None)
         except Exception as ex:
-            self._virt_sfx = ''
-            return (None, "EXCEPTION: " + str(ex))
+            return self._exception_result(ex)
 
     def process(self, taxt_in, type_out):
         """
@@ -3998,22 +2867,194 @@ RETURN:
         self.OutTypeCB.val(type_out)
         return self.resultE_mgmt(taxt_in)
 
+    def process_all(self, taxt_in):
+        """
+convert an input taxonomy to all the normalized forms if correct else an error is returned,
+the input taxonomy is parsed once.
+    taxt_in:   taxonomy input string
+RETURN:
+(taxonomies_out, error_str)
+    taxonomies_out: if success a tuple with the taxonomy for each type of output
+                    (0, "full", 1: "without unknown", 2: "short") else None
+    error_str: None if success else a string with the error description
+"""
+        self.OutTypeCB.val(0)
+        taxt_out, error = self.resultE_mgmt(taxt_in)
+        if error is not None:
+            return (None, error)
+
+        taxts_out = [taxt_out]
+        try:
+            for type_out in range(1, 3):
+                # the output type callback rebuilds the result
+                self.OutTypeCB.val(type_out)
+                taxts_out.append(str(self.resultE))
+        except Exception as ex:
+            return self._exception_result(ex)
+
+        return (tuple(taxts_out), None)
+
+
+_taxonomy_prototypes = {}
+
+
+def taxonomy_prototype(full=True):
+    """
+return the pristine engine used as prototype by taxonomy_new (it is
+created at the first call and it must not be modified)
+"""
+    taxonomy = _taxonomy_prototypes.get(full)
+    if taxonomy is None:
+        taxonomy = _taxonomy_prototypes[full] = Taxonomy('prototype', full)
+    return taxonomy
+
+
+def taxonomy_new(name, full=True, quiet=False):
+    """
+return a new Taxonomy engine in the initial state, cloned from the
+prototype (equivalent to Taxonomy(name, full, quiet) but much cheaper)
+"""
+    taxonomy = taxonomy_prototype(full).clone(name)
+    taxonomy.quiet = quiet
+    return taxonomy
+
+
+# objects owned by the code and not by an engine
+_FOOTPRINT_SKIP = (type, types.ModuleType, types.FunctionType,
+                   types.BuiltinFunctionType)
+
+
+def taxonomy_footprint(taxonomy, shared=False):
+    """
+return the deep memory footprint (in bytes) of an engine, the label
+tuples shared by all the engines are counted only if shared is True
+"""
+    seen = set()
+    if not shared:
+        seen.update(id(labels) for labels in TAXT_LABELS.values())
+
+    size = 0
+    objs = [taxonomy]
+    while objs:
+        obj = objs.pop()
+        if id(obj) in seen or isinstance(obj, _FOOTPRINT_SKIP):
+            continue
+        seen.add(id(obj))
+        size += sys.getsizeof(obj)
+
+        if isinstance(obj, dict):
+            objs.extend(obj.keys())
+            objs.extend(obj.values())
+        elif isinstance(obj, (list, tuple)):
+            objs.extend(obj)
+        elif isinstance(obj, types.MethodType):
+            objs.append(obj.__self__)
+        else:
+            if hasattr(obj, '__dict__'):
+                objs.append(obj.__dict__)
+            for k in getattr(type(obj), '__slots__', ()):
+                objs.append(getattr(obj, k, None))
+    return size
+
+
+ENGINE_SIMDOM = 'simdom'
+ENGINE_QUIET = 'quiet'
+ENGINE_FAST = 'fast'
+
+
+def taxonomy_engine(name, engine=ENGINE_SIMDOM):
+    """
+return a new taxonomy engine with a 'process' method
+    name:      name of the engine instance
+    engine:    ENGINE_SIMDOM for the simulated-dom engine (reference),
+               ENGINE_QUIET for the simulated-dom engine in quiet mode
+               (same results with deferred builds),
+               ENGINE_FAST for the table-driven engine (same results)
+"""
+    if engine == ENGINE_SIMDOM:
+        return taxonomy_new(name)
+    elif engine == ENGINE_QUIET:
+        return taxonomy_new(name, quiet=True)
+    elif engine == ENGINE_FAST:
+        from openquake.taxonomy3.taxtweb_fast import TaxonomyFast
+        return TaxonomyFast(name)
+    else:
+        raise ValueError("Unknown taxonomy engine '%s'" % engine)
+
 
-def taxonomy_process(taxt_in, type_out):
+def taxonomy_process(taxt_in, type_out, engine=ENGINE_SIMDOM, cache=None):
     """
 convert an input taxonomy to a normalized form if correct else an error is returned.
     taxt_in:   taxonomy input string
     type_out:  type of taxonomy output
                0, "full", 1: "without unknown", 2: "short"
+    engine:    ENGINE_SIMDOM (default), ENGINE_QUIET or ENGINE_FAST
+    cache:     optional TaxonomyCache instance (taxtweb_cache) used
+               in place of a new engine, the engine of the cache is used
+               and ValueError is raised if a different one is requested
 RETURN:
 (taxonomy_out, error_str)
     taxonomy_out: a taxonomy if success else None
     error_str: None if success else a string with the error description
 """
-    taxonomy = Taxonomy('taxonomy', True)
+    if cache is not None:
+        if engine not in (ENGINE_SIMDOM, cache.engine):
+            raise ValueError("Taxonomy engine '%s' differs from the '%s' "
+                             "engine of the cache" % (engine, cache.engine))
+        return cache.process(taxt_in, type_out)
+
+    taxonomy = taxonomy_engine('taxonomy', engine)
     return taxonomy.process(taxt_in, type_out)
 
 
+def taxonomy_process_all(taxt_in, engine=ENGINE_SIMDOM):
+    """
+convert an input taxonomy to all the normalized forms if correct else an error is returned.
+    taxt_in:   taxonomy input string
+    engine:    ENGINE_SIMDOM (default), ENGINE_QUIET or ENGINE_FAST
+RETURN:
+(taxonomies_out, error_str)
+    taxonomies_out: if success a tuple with the taxonomy for each type of output
+                    (0, "full", 1: "without unknown", 2: "short") else None
+    error_str: None if success else a string with the error description
+"""
+    taxonomy = taxonomy_engine('taxonomy', engine)
+    return taxonomy.process_all(taxt_in)
+
+
+def taxonomy_process_many(taxts_in, type_out, engine=ENGINE_SIMDOM,
+                          gate=False):
+    """
+generator that converts each input taxonomy to a normalized form reusing
+the same engine instance, results are the same of taxonomy_process.
+    taxts_in:  iterable of taxonomy input strings
+    type_out:  type of taxonomy output
+               0, "full", 1: "without unknown", 2: "short"
+    engine:    ENGINE_SIMDOM (default), ENGINE_QUIET or ENGINE_FAST
+    gate:      if True the taxonomies rejected by taxonomy_gate
+               (taxonomy_validate) are not processed by the engine
+YIELD:
+(taxt_in, taxonomy_out, error_str) for each input taxonomy
+    taxonomy_out: a taxonomy if success else None
+    error_str: None if success else a string with the error description
+               (the message of the gate problem if rejected)
+"""
+    if gate:
+        from openquake.taxonomy3.taxonomy_validate import taxonomy_gate
+
+    taxonomy = None
+    for taxt_in in taxts_in:
+        if gate:
+            problem = taxonomy_gate(taxt_in)
+            if problem is not None:
+                yield (taxt_in, None, problem.message)
+                continue
+        if taxonomy is None:
+            taxonomy = taxonomy_engine('taxonomy', engine)
+        taxt_out, error = taxonomy.process(taxt_in, type_out)
+        yield (taxt_in, taxt_out, error)
+
+
 if __name__ == '__main__':
     taxonomy = Taxonomy('taxonomy', True)
     if len(sys.argv) > 2:
@@ -0,0 +1,607 @@
+#!/usr/bin/env python
+"""
+Table-driven taxonomy normalizer.
+
+TaxonomyFast has the same 'process' interface of the simulated-dom
+engine (Taxonomy in taxtweb_eng) but it parses the full form of a taxonomy
+directly into a TaxtValues instance, without firing any widget callback,
+and it builds the output string with the compiled tables of taxtweb_tables.
+
+Just the inputs accepted by the simulated-dom engine without any quirk are
+handled here: in every other case (errors included) the processing is
+delegated to a lazily created Taxonomy instance so results and error
+messages are always identical to the reference engine.
+
+Taxonomies already in full form are converted to the other forms by
+taxonomy_full2short with string and table operations only.
+"""
+from openquake.taxonomy3.taxonomy import taxonomy_short2full
+from openquake.taxonomy3.taxtweb_eng import (
+    Taxonomy, taxonomy_new, taxonomy_process, is_not_negative_int,
+    is_not_negative_float, is_in_rect_angle_float)
+from openquake.taxonomy3.taxtweb_tables import (
+    TaxtValues, build_taxonomy_string, material_ids, mat_tech_ids,
+    mat_tead_ids, mat_prop_ids,
+    material_idx, mat_tech_idx, mat_tead_idx, mat_prop_idx,
+    llrs_type_ids, llrs_type_idx, llrs_duct_ids, llrs_duct_idx,
+    date_type_idx, occu_type_idx, occu_spec_ids, occu_spec_idx,
+    bupo_type_idx, plsh_type_idx, stir_type_idx,
+    plan_irre_idx, plan_seco_idx, vert_irre_idx, vert_seco_idx,
+    wall_type_idx, roof_shap_idx, roof_cove_idx, roof_mate_ids,
+    roof_mate_idx, roof_sys_ids, roof_sys_idx, roof_conn_idx,
+    floo_syma_idx, floo_conn_ids, floo_conn_idx, floo_syty_idx,
+    foun_type_idx, always_shown)
+
+# height label -> (group, type), type is the value of the HeightCBx widget
+# (in the case of 'HD' the real index is 1)
+h_label_map = {
+    'H99': (0, 0), 'HBET': (0, 1), 'HEX': (0, 2), 'HAPP': (0, 3),
+    'HB99': (1, 0), 'HBBET': (1, 1), 'HBEX': (1, 2), 'HBAPP': (1, 3),
+    'HF99': (2, 0), 'HFBET': (2, 1), 'HFEX': (2, 2), 'HFAPP': (2, 3),
+    'HD99': (3, 0), 'HD': (3, 1)}
+
+h_fields = (('HeightCB1', 'noStoreysE11', 'noStoreysE12'),
+            ('HeightCB2', 'noStoreysE21', 'noStoreysE22'),
+            ('HeightCB3', 'noStoreysE31', 'noStoreysE32'),
+            ('HeightCB4', 'noStoreysE41', None))
+
+ir_idx = (plan_irre_idx, plan_seco_idx, vert_irre_idx, vert_seco_idx)
+ir_label = {'IRPP': 0, 'IRPS': 1, 'IRVP': 2, 'IRVS': 3}
+
+h_typck = (is_not_negative_int, is_not_negative_int,
+           is_not_negative_float, is_in_rect_angle_float)
+
+
+def _structural(v, direct, mat, llrs):
+    sfx = '1' if direct == 0 else '2'
+
+    mat_id = mat[0]
+    mat_val = material_idx.get(mat_id)
+    if mat_val is None:
+        return False
+    tech = 0 if mat_tech_idx[mat_id] else -1
+    tead = 0 if mat_tead_idx[mat_id] else -1
+    prop = 0 if mat_prop_idx[mat_id] else -1
+
+    for mat_atom in mat[1:]:
+        if mat_atom in mat_tech_idx[mat_id]:
+            tech = mat_tech_idx[mat_id][mat_atom]
+        elif mat_atom in mat_tead_idx[mat_id]:
+            tead = mat_tead_idx[mat_id][mat_atom]
+        elif mat_atom in mat_prop_idx[mat_id]:
+            prop = mat_prop_idx[mat_id][mat_atom]
+        else:
+            return False
+
+    llrs_val = llrs_type_idx[mat_id].get(llrs[0])
+    if llrs_val is None:
+        return False
+    llrs_id = llrs_type_ids[mat_id][llrs_val]
+    duct = 0 if llrs_duct_ids[llrs_id] else -1
+
+    for llrs_atom in llrs[1:]:
+        if llrs_atom in llrs_duct_idx[llrs_id]:
+            duct = llrs_duct_idx[llrs_id][llrs_atom]
+        else:
+            return False
+
+    setattr(v, 'MaterialCB1' + sfx, mat_val)
+    setattr(v, 'MaterialCB2' + sfx, tech)
+    setattr(v, 'MaterialCB3' + sfx, prop)
+    setattr(v, 'MaterialCB4' + sfx, tead)
+    setattr(v, 'SystemCB1' + sfx, llrs_val)
+    setattr(v, 'SystemCB2' + sfx, duct)
+    return True
+
+
+def _height(v, height):
+    h_grps = set()
+    for h_atom in height.split('+'):
+        h_items = h_atom.split(':')
+        h_grp, h_type = h_label_map.get(h_items[0], (-1, -1))
+        if h_grp == -1 or h_grp in h_grps:
+            # the same group twice is managed by the reference engine
+            # with some intermediate swap of values
+            return False
+        h_grps.add(h_grp)
+
+        cb, e1, e2 = h_fields[h_grp]
+        if h_type == 0:
+            if len(h_items) != 1:
+                return False
+            setattr(v, cb, 0)
+            continue
+
+        if len(h_items) < 2:
+            return False
+        h_vals = h_items[1].split(',')
+        if h_grp < 3 and h_type == 1:
+            if h_grp == 2:
+                # ranges of ground floor level always fail in the
+                # reference engine
+                return False
+            if (len(h_vals) != 2 or not h_typck[h_grp](h_vals[0]) or
+                    not h_typck[h_grp](h_vals[1]) or
+                    int(h_vals[0]) == int(h_vals[1])):
+                return False
+            if int(h_vals[0]) > int(h_vals[1]):
+                h_vals = [h_vals[1], h_vals[0]]
+            setattr(v, e2, h_vals[1])
+        elif len(h_vals) != 1 or not h_typck[h_grp](h_vals[0]):
+            return False
+
+        setattr(v, cb, h_type)
+        setattr(v, e1, h_vals[0])
+
+    return True
+
+
+def _is_date(s):
+    return is_not_negative_int(s) and len(s) <= 4
+
+
+def _date(v, date):
+    date = date.split('+')
+    if len(date) != 1:
+        return False
+    date_items = date[0].split(':')
+    date_val = date_type_idx.get(date_items[0])
+    if date_val is None:
+        return False
+
+    if date_val == 0:
+        v.DateCB1 = 0
+        return True
+
+    if len(date_items) < 2:
+        return False
+    date_vals = date_items[1].split(',')
+    if date_val == 2:
+        if (len(date_vals) != 2 or not _is_date(date_vals[0]) or
+                not _is_date(date_vals[1]) or
+                int(date_vals[0]) == int(date_vals[1])):
+            return False
+        if int(date_vals[0]) > int(date_vals[1]):
+            date_vals = [date_vals[1], date_vals[0]]
+        v.DateE2 = date_vals[1]
+    elif len(date_vals) != 1 or not _is_date(date_vals[0]):
+        return False
+
+    v.DateCB1 = date_val
+    v.DateE1 = date_vals[0]
+    return True
+
+
+def _occupancy(v, occu):
+    occu = occu.split('+')
+    occu_id = occu[0]
+    occu_val = occu_type_idx.get(occu_id)
+    if occu_val is None or (occu_val == 0 and len(occu) != 1):
+        return False
+
+    v.OccupancyCB1 = occu_val
+    v.OccupancyCB2 = 0 if occu_spec_ids[occu_id] else -1
+    if len(occu) > 1:
+        spec_val = occu_spec_idx[occu_id].get(occu[1])
+        if spec_val is None:
+            return False
+        v.OccupancyCB2 = spec_val
+
+    return True
+
+
+def _single(atoms, idx):
+    atoms = atoms.split('+')
+    if len(atoms) != 1:
+        return None
+    return idx.get(atoms[0])
+
+
+def _regularity(v, stir):
+    stir = stir.split('+')
+    stir_val = stir_type_idx.get(stir[0])
+    if stir_val is None or (stir_val != 2 and len(stir) > 1):
+        return False
+
+    # [IRPP, IRPS, IRVP, IRVS]
+    ir_values = [-1, -1, -1, -1]
+    for stir_atom in stir[1:]:
+        s_items = stir_atom.split(':')
+        if len(s_items) != 2 or s_items[0] not in ir_label:
+            return False
+        ir_id = ir_label[s_items[0]]
+        ir_val = ir_idx[ir_id].get(stir_atom)
+        if ir_val is None:
+            return False
+        ir_values[ir_id] = ir_val
+
+    plir, plse, veir, vese = ir_values
+    if (plir == 0 and plse != -1) or (veir == 0 and vese != -1):
+        return False
+
+    v.RegularityCB1 = stir_val
+    v.RegularityCB2 = v.RegularityCB3 = -1
+    v.RegularityCB4 = v.RegularityCB5 = -1
+    if stir_val == 2:
+        # the reference engine infers missing primary irregularities in
+        # a way that depends on the order of the callbacks
+        if plir == -1 or (vese != -1 and veir == -1):
+            return False
+        v.RegularityCB2 = plir
+        v.RegularityCB3 = veir if veir != -1 else 0
+        v.RegularityCB4 = plse if plse != -1 else (0 if plir > 0 else -1)
+        v.RegularityCB5 = vese if vese != -1 else (0 if veir > 0 else -1)
+
+    return True
+
+
+def _roof(v, roof):
+    roof_mat_id = None
+    for roof_atom in roof.split('+'):
+        if roof_atom in roof_shap_idx:
+            v.RoofCB1 = roof_shap_idx[roof_atom]
+            v.RoofCB4 = 0 if roof_sys_ids[roof_mate_ids[v.RoofCB3]] else -1
+        elif roof_atom in roof_cove_idx:
+            v.RoofCB2 = roof_cove_idx[roof_atom]
+        elif roof_atom in roof_mate_idx:
+            roof_mat_id = roof_atom
+            v.RoofCB3 = roof_mate_idx[roof_atom]
+            v.RoofCB4 = 0 if roof_sys_ids[roof_atom] else -1
+        elif roof_atom in roof_conn_idx:
+            v.RoofCB5 = roof_conn_idx[roof_atom]
+        elif (roof_mat_id is not None and
+              roof_atom in roof_sys_idx[roof_mat_id]):
+            v.RoofCB4 = roof_sys_idx[roof_mat_id][roof_atom]
+        else:
+            return False
+
+    return True
+
+
+def _floor(v, floor):
+    floor_mat_id = None
+    for floor_atom in floor.split('+'):
+        if floor_atom in floo_syma_idx:
+            floor_mat_id = floor_atom
+            v.FloorCB1 = floo_syma_idx[floor_atom]
+            v.FloorCB2 = 0 if floo_conn_ids[floor_atom] else -1
+        elif floor_atom in floo_syty_idx:
+            v.FloorCB3 = floo_syty_idx[floor_atom]
+        elif (floor_mat_id is not None and
+              floor_atom in floo_conn_idx[floor_mat_id]):
+            v.FloorCB2 = floo_conn_idx[floor_mat_id][floor_atom]
+        else:
+            return False
+
+    return True
+
+
+def taxonomy_values(s):
+    """
+parse the full form of a taxonomy into a TaxtValues instance
+    s:         taxonomy in full form (as returned by taxonomy_short2full)
+RETURN:
+    a TaxtValues instance or None if the taxonomy is not valid or if it
+    is not handled by the table-driven parser
+"""
+    sar = s.split('/')
+    if len(sar) != 16:
+        return None
+
+    v = TaxtValues()
+
+    if sar[0] == 'DX+D99' and sar[3] == 'DY+D99':
+        v.Direction1RB = 0
+    elif sar[0] == 'DX+PF' and sar[3] == 'DY+OF':
+        v.Direction1RB = 1
+    else:
+        return None
+
+    for direct in range(0, 2):
+        if not _structural(v, direct, sar[1 + (direct * 3)].split('+'),
+                           sar[2 + (direct * 3)].split('+')):
+            return None
+
+    if not (_height(v, sar[6]) and _date(v, sar[7]) and
+            _occupancy(v, sar[8])):
+        return None
+
+    v.PositionCB = _single(sar[9], bupo_type_idx)
+    v.PlanShapeCB = _single(sar[10], plsh_type_idx)
+    v.WallsCB = _single(sar[12], wall_type_idx)
+    v.FoundationsCB = _single(sar[15], foun_type_idx)
+    if None in (v.PositionCB, v.PlanShapeCB, v.WallsCB, v.FoundationsCB):
+        return None
+
+    v.RoofCB4 = v.FloorCB2 = -1
+    if not (_regularity(v, sar[11]) and _roof(v, sar[13]) and
+            _floor(v, sar[14])):
+        return None
+
+    return v
+
+
+def _values_copy(v):
+    v_new = TaxtValues.__new__(TaxtValues)
+    for field in TaxtValues.__slots__:
+        setattr(v_new, field, getattr(v, field))
+    return v_new
+
+
+def _ids_atom(ids, val):
+    return [ids[val]] if 0 <= val < len(ids) else []
+
+
+def _structural_atoms(v, direct):
+    """return the (material atoms, llrs atoms) lists of a direction"""
+    sfx = '1' if direct == 0 else '2'
+    mat_id = (_ids_atom(material_ids, getattr(v, 'MaterialCB1' + sfx)) or
+              [material_ids[0]])[0]
+    mat = [mat_id]
+    for ids, field in ((mat_tech_ids, 'MaterialCB2'),
+                       (mat_tead_ids, 'MaterialCB4'),
+                       (mat_prop_ids, 'MaterialCB3')):
+        mat += _ids_atom(ids[mat_id], getattr(v, field + sfx))
+
+    llrs = _ids_atom(llrs_type_ids[mat_id], getattr(v, 'SystemCB1' + sfx))
+    if llrs:
+        llrs += _ids_atom(llrs_duct_ids[llrs[0]],
+                          getattr(v, 'SystemCB2' + sfx))
+    return mat, llrs
+
+
+def _edit_direction(v, pos, blk):
+    blks = ['DX+D99', 'DY+D99'] if v.Direction1RB == 0 else ['DX+PF', 'DY+OF']
+    blks[pos // 3] = blk
+    if blks == ['DX+D99', 'DY+D99']:
+        v.Direction1RB = 0
+    elif blks == ['DX+PF', 'DY+OF']:
+        v.Direction1RB = 1
+    else:
+        return False
+    return True
+
+
+def _edit_structural(v, pos, blk):
+    direct = pos // 3
+    mat, llrs = _structural_atoms(v, direct)
+    if pos % 3 == 1:
+        mat = blk.split('+')
+    else:
+        llrs = blk.split('+')
+    return _structural(v, direct, mat, llrs)
+
+
+def _edit_height(v, _, blk):
+    for cb, e1, e2 in h_fields:
+        setattr(v, cb, 0)
+        setattr(v, e1, '')
+        if e2 is not None:
+            setattr(v, e2, '')
+    return _height(v, blk)
+
+
+def _edit_date(v, _, blk):
+    v.DateCB1 = 0
+    v.DateE1 = v.DateE2 = ''
+    return _date(v, blk)
+
+
+def _edit_single(field, idx):
+    def edit(v, _, blk):
+        val = _single(blk, idx)
+        if val is None:
+            return False
+        setattr(v, field, val)
+        return True
+    return edit
+
+
+def _edit_roof(v, _, blk):
+    v.RoofCB1 = v.RoofCB2 = v.RoofCB3 = v.RoofCB5 = 0
+    v.RoofCB4 = -1
+    return _roof(v, blk)
+
+
+def _edit_floor(v, _, blk):
+    v.FloorCB1 = v.FloorCB3 = 0
+    v.FloorCB2 = -1
+    return _floor(v, blk)
+
+
+# block position -> parser of the section of the block, the same used by
+# taxonomy_values on a state where the fields of the section are reset
+_EDIT_SECTIONS = {
+    Taxonomy.POS_DX: _edit_direction,
+    Taxonomy.POS_DX_LMAT: _edit_structural,
+    Taxonomy.POS_DX_LLRS: _edit_structural,
+    Taxonomy.POS_DY: _edit_direction,
+    Taxonomy.POS_DY_LMAT: _edit_structural,
+    Taxonomy.POS_DY_LLRS: _edit_structural,
+    Taxonomy.POS_HEIGHT: _edit_height,
+    Taxonomy.POS_DATE: _edit_date,
+    Taxonomy.POS_OCCUPANCY: lambda v, _, blk: _occupancy(v, blk),
+    Taxonomy.POS_POSITION: _edit_single('PositionCB', bupo_type_idx),
+    Taxonomy.POS_PLAN: _edit_single('PlanShapeCB', plsh_type_idx),
+    Taxonomy.POS_IRREG: lambda v, _, blk: _regularity(v, blk),
+    Taxonomy.POS_EXTWALL: _edit_single('WallsCB', wall_type_idx),
+    Taxonomy.POS_ROOF: _edit_roof,
+    Taxonomy.POS_FLOOR: _edit_floor,
+    Taxonomy.POS_FOUNDATION: _edit_single('FoundationsCB', foun_type_idx),
+}
+
+
+def values_edit(v, pos, blk):
+    """
+return a new TaxtValues with the block at position pos (a Taxonomy.POS_*
+constant) replaced by blk, just the section of the block is parsed
+    v:         TaxtValues instance (as returned by taxonomy_values or by
+               Taxonomy.taxt_values), not modified
+    blk:       the new block, like 'HEX:4' or 'RSH1+RMT2'
+RETURN:
+    a TaxtValues instance or None if the block is not valid or if it is
+    not handled by the table-driven parser
+"""
+    v_new = _values_copy(v)
+    if not _EDIT_SECTIONS[pos](v_new, pos, blk):
+        return None
+    return v_new
+
+
+def taxonomy_edit(taxt_in, pos, blk, type_out=0):
+    """
+change a single block of a taxonomy and return the normalized result
+    taxt_in:   taxonomy (a string in any form, a TaxonomyRecord or a
+               TaxtValues instance), the full form is parsed directly
+    pos:       position of the block (a Taxonomy.POS_* constant)
+    blk:       the new block, like 'HEX:4' or 'RSH1+RMT2'
+    type_out:  0: "full", 1: "without unknown", 2: "short"
+RETURN:
+(taxonomy_out, error_str)
+    the same of the processing of the changed taxonomy by the reference
+    engine, that is used just when the table-driven parser fails
+"""
+    if isinstance(taxt_in, TaxtValues):
+        v = taxt_in
+    else:
+        taxt_in = str(taxt_in)
+        if taxt_in.count('/') != 15:
+            taxt_in, err = taxonomy_process(taxt_in, 0)
+            if err is not None:
+                return (None, err)
+        v = taxonomy_values(taxt_in)
+
+    if v is not None:
+        v_new = values_edit(v, pos, blk)
+        if v_new is not None:
+            return (build_taxonomy_string(v_new, type_out), None)
+        blks = build_taxonomy_string(v, 0).split('/')
+    else:
+        blks = taxt_in.split('/')
+
+    blks[pos] = blk
+    return taxonomy_process('/'.join(blks), type_out)
+
+
+# atoms omitted by the "without unknown" and "short" forms (the unknown
+# direction 'D99' is managed with its block)
+omit_atoms = frozenset(Taxonomy.UNKNOWN_ATOMS) - always_shown - {'D99'}
+
+# direction blocks of the full form -> the ones without unknown atoms
+_full2short_dirs = {('DX+D99', 'DY+D99'): ('DX', 'DY'),
+                    ('DX+PF', 'DY+OF'): ('DX+PF', 'DY+OF')}
+
+# block -> block without unknown atoms, blocks repeat a lot in the
+# datasets (the unknown ones first of all) so the results are kept up to
+# OMIT_CACHE_SIZE blocks
+OMIT_CACHE_SIZE = 65536
+_omit_cache = {}
+
+
+def _omit_unknown(blk):
+    res = _omit_cache.get(blk)
+    if res is None:
+        res = '+'.join([atom for atom in blk.split('+')
+                        if atom not in omit_atoms])
+        if len(_omit_cache) < OMIT_CACHE_SIZE:
+            _omit_cache[blk] = res
+    return res
+
+
+def taxonomy_full2short(taxt_full, type_out=2):
+    """
+convert a normalized taxonomy from the full form to another form without
+the engine (just a string and table operation on the 16 blocks)
+    taxt_full: taxonomy in full form as returned by the engine (the
+               blocks are not validated)
+    type_out:  0: "full", 1: "without unknown", 2: "short"
+RETURN:
+    the taxonomy in the type_out form, the same of the engine; ValueError
+    is raised if taxt_full has not 16 blocks or a valid direction
+"""
+    blks = taxt_full.split('/')
+    if len(blks) != 16:
+        raise ValueError("Taxonomy '%s' is not in full form" % taxt_full)
+    dirs = _full2short_dirs.get((blks[0], blks[3]))
+    if dirs is None:
+        raise ValueError("Taxonomy '%s' is not in full form" % taxt_full)
+    if type_out == 0:
+        return taxt_full
+
+    res_atoms = [_omit_unknown(blk) for blk in blks]
+    res_atoms[0], res_atoms[3] = dirs
+
+    if type_out != 2:
+        return '/'.join(res_atoms)
+
+    if res_atoms[1] == res_atoms[4] and res_atoms[2] == res_atoms[5]:
+        # same params case
+        res_atoms[3] = res_atoms[4] = res_atoms[5] = ''
+        res_atoms[0] = '' if dirs[0] == 'DX' else 'PF'
+    elif dirs[0] == 'DX+PF':
+        res_atoms[3] = 'DY+PO'
+
+    return '/'.join([atom for atom in res_atoms if atom])
+
+
+class TaxonomyFast(object):
+    """table-driven replacement of the Taxonomy engine for the
+normalization of taxonomies"""
+    def __init__(self, name):
+        self.name = name
+        self._engine = None
+
+    @property
+    def engine(self):
+        """reference simulated-dom engine used as fallback"""
+        if self._engine is None:
+            self._engine = taxonomy_new(self.name, quiet=True)
+        return self._engine
+
+    def process(self, taxt_in, type_out):
+        """
+convert an input taxonomy to a normalized form if correct else an error is returned.
+    taxt_in:   taxonomy input string
+    type_out:  type of taxonomy output
+               0, "full", 1: "without unknown", 2: "short"
+RETURN:
+(taxonomy_out, error_str)
+    taxonomy_out: a taxonomy if success else None
+    error_str: None if success else a string with the error description
+"""
+        if type_out in (0, 1, 2):
+            try:
+                ret = taxonomy_short2full(taxt_in)
+                if ret.s:
+                    return (None, ret.s)
+                v = taxonomy_values(ret.result)
+                if v is not None:
+                    return (build_taxonomy_string(v, type_out), None)
+            except Exception:
+                pass
+
+        return self.engine.process(taxt_in, type_out)
+
+    def process_all(self, taxt_in):
+        """
+convert an input taxonomy to all the normalized forms if correct else an error is returned,
+the input taxonomy is parsed once.
+    taxt_in:   taxonomy input string
+RETURN:
+(taxonomies_out, error_str)
+    taxonomies_out: if success a tuple with the taxonomy for each type of output
+                    (0, "full", 1: "without unknown", 2: "short") else None
+    error_str: None if success else a string with the error description
+"""
+        try:
+            ret = taxonomy_short2full(taxt_in)
+            if ret.s:
+                return (None, ret.s)
+            v = taxonomy_values(ret.result)
+            if v is not None:
+                return (tuple(build_taxonomy_string(v, type_out)
+                              for type_out in range(0, 3)), None)
+        except Exception:
+            pass
+
+        return self.engine.process_all(taxt_in)
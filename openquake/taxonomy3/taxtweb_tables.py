@@ -0,0 +1,313 @@
+#!/usr/bin/env python
+"""
+Compiled lookup tables derived from taxtweb_maps and taxtweb_head and a
+table-driven emitter of the normalized taxonomy string.
+
+Each dropdown of the simulated-dom engine (Taxonomy in taxtweb_eng) is
+represented here by a tuple of atom ids (index -> atom) and by a dict
+(atom -> index); the integer indexes are the same 'val()' integers held
+by the TaxtSel widgets of the engine.
+"""
+from openquake.taxonomy3.taxtweb_maps import (
+    material, h_aboveground, h_belowground, h_abovegrade, h_slope,
+    date_type, occu_type, bupo_type, plsh_type, stir_type,
+    plan_irre, plan_seco, vert_irre, vert_seco, wall_type, roof_shap,
+    roof_cove, roof_mate, roof_conn, floo_syma, floo_syty, foun_type)
+from openquake.taxonomy3.taxtweb_head import (
+    mat_tech, mat_tead, mat_prop, llrs_type, llrs_duct, occu_spec,
+    roof_sys, floo_conn)
+
+
+def ids_tuple(items):
+    """return the tuple of the 'id' fields of a list of map items"""
+    return tuple(item['id'] for item in items)
+
+
+def ids_index(items):
+    """return a dict that map each 'id' of a list of map items to its
+    position in the list (the first one, as a linear search would do)"""
+    idx = {}
+    for i, item in enumerate(items):
+        idx.setdefault(item['id'], i)
+    return idx
+
+
+def ids_tuple_grp(grp):
+    """ids_tuple applied to each value of a dict of lists of map items"""
+    return dict((k, ids_tuple(v)) for k, v in grp.items())
+
+
+def ids_index_grp(grp):
+    """ids_index applied to each value of a dict of lists of map items"""
+    return dict((k, ids_index(v)) for k, v in grp.items())
+
+
+material_ids = ids_tuple(material)
+material_idx = ids_index(material)
+mat_tech_ids = ids_tuple_grp(mat_tech)
+mat_tech_idx = ids_index_grp(mat_tech)
+mat_tead_ids = ids_tuple_grp(mat_tead)
+mat_tead_idx = ids_index_grp(mat_tead)
+mat_prop_ids = ids_tuple_grp(mat_prop)
+mat_prop_idx = ids_index_grp(mat_prop)
+llrs_type_ids = ids_tuple_grp(llrs_type)
+llrs_type_idx = ids_index_grp(llrs_type)
+llrs_duct_ids = ids_tuple_grp(llrs_duct)
+llrs_duct_idx = ids_index_grp(llrs_duct)
+
+h_aboveground_ids = ids_tuple(h_aboveground)
+h_belowground_ids = ids_tuple(h_belowground)
+h_abovegrade_ids = ids_tuple(h_abovegrade)
+h_slope_ids = ids_tuple(h_slope)
+
+date_type_ids = ids_tuple(date_type)
+date_type_idx = ids_index(date_type)
+occu_type_ids = ids_tuple(occu_type)
+occu_type_idx = ids_index(occu_type)
+occu_spec_ids = ids_tuple_grp(occu_spec)
+occu_spec_idx = ids_index_grp(occu_spec)
+bupo_type_ids = ids_tuple(bupo_type)
+bupo_type_idx = ids_index(bupo_type)
+plsh_type_ids = ids_tuple(plsh_type)
+plsh_type_idx = ids_index(plsh_type)
+stir_type_ids = ids_tuple(stir_type)
+stir_type_idx = ids_index(stir_type)
+plan_irre_ids = ids_tuple(plan_irre)
+plan_irre_idx = ids_index(plan_irre)
+plan_seco_ids = ids_tuple(plan_seco)
+plan_seco_idx = ids_index(plan_seco)
+vert_irre_ids = ids_tuple(vert_irre)
+vert_irre_idx = ids_index(vert_irre)
+vert_seco_ids = ids_tuple(vert_seco)
+vert_seco_idx = ids_index(vert_seco)
+wall_type_ids = ids_tuple(wall_type)
+wall_type_idx = ids_index(wall_type)
+roof_shap_ids = ids_tuple(roof_shap)
+roof_shap_idx = ids_index(roof_shap)
+roof_cove_ids = ids_tuple(roof_cove)
+roof_cove_idx = ids_index(roof_cove)
+roof_mate_ids = ids_tuple(roof_mate)
+roof_mate_idx = ids_index(roof_mate)
+roof_sys_ids = ids_tuple_grp(roof_sys)
+roof_sys_idx = ids_index_grp(roof_sys)
+roof_conn_ids = ids_tuple(roof_conn)
+roof_conn_idx = ids_index(roof_conn)
+floo_syma_ids = ids_tuple(floo_syma)
+floo_syma_idx = ids_index(floo_syma)
+floo_conn_ids = ids_tuple_grp(floo_conn)
+floo_conn_idx = ids_index_grp(floo_conn)
+floo_syty_ids = ids_tuple(floo_syty)
+floo_syty_idx = ids_index(floo_syty)
+foun_type_ids = ids_tuple(foun_type)
+foun_type_idx = ids_index(foun_type)
+
+# first items of a dropdown that BuildTaxonomyString emits also when
+# unknown atoms are omitted
+always_shown = frozenset(['RFA1', 'IRPS:IRN', 'IRVS:IRN'])
+
+
+class TaxtValues(object):
+    """state of the dropdowns and of the text fields of a Taxonomy engine
+(the integers are the 'val()' of the TaxtSel widgets with the same name,
+'Direction1RB' is 0 for unspecified direction and 1 for parallel/orthogonal
+to the street)"""
+    INT_FIELDS = (
+        'Direction1RB',
+        'MaterialCB11', 'MaterialCB21', 'MaterialCB31', 'MaterialCB41',
+        'SystemCB11', 'SystemCB21',
+        'MaterialCB12', 'MaterialCB22', 'MaterialCB32', 'MaterialCB42',
+        'SystemCB12', 'SystemCB22',
+        'HeightCB1', 'HeightCB2', 'HeightCB3', 'HeightCB4',
+        'DateCB1',
+        'OccupancyCB1', 'OccupancyCB2',
+        'PositionCB', 'PlanShapeCB',
+        'RegularityCB1', 'RegularityCB2', 'RegularityCB3',
+        'RegularityCB4', 'RegularityCB5',
+        'WallsCB',
+        'RoofCB1', 'RoofCB2', 'RoofCB3', 'RoofCB4', 'RoofCB5',
+        'FloorCB1', 'FloorCB2', 'FloorCB3',
+        'FoundationsCB')
+    STR_FIELDS = (
+        'noStoreysE11', 'noStoreysE12', 'noStoreysE21', 'noStoreysE22',
+        'noStoreysE31', 'noStoreysE32', 'noStoreysE41',
+        'DateE1', 'DateE2')
+
+    __slots__ = INT_FIELDS + STR_FIELDS
+
+    def __init__(self):
+        for field in self.INT_FIELDS:
+            setattr(self, field, 0)
+        for field in self.STR_FIELDS:
+            setattr(self, field, '')
+
+    def ints(self):
+        return tuple(getattr(self, field) for field in self.INT_FIELDS)
+
+    def strs(self):
+        return tuple(getattr(self, field) for field in self.STR_FIELDS)
+
+    def __eq__(self, other):
+        return (isinstance(other, TaxtValues) and
+                self.ints() == other.ints() and self.strs() == other.strs())
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def __str__(self):
+        return "TaxtValues(%s)" % ", ".join(
+            "%s=%r" % (field, getattr(self, field))
+            for field in self.__slots__)
+
+
+def _atom(ids, val, full):
+    if val < 0 or val >= len(ids):
+        return ''
+    if val == 0 and not full and ids[0] not in always_shown:
+        return ''
+    return ids[val]
+
+
+def _join(atoms):
+    return '+'.join([atom for atom in atoms if atom])
+
+
+def _id(ids, val):
+    # like _atom without the special cases of unknown items
+    return ids[val] if 0 <= val < len(ids) else ''
+
+
+def _structural(mat, tech, tead, prop, llrs, duct, full):
+    # an undefined material has no specification, as 'MAT99'
+    mat_id = _id(material_ids, mat) or material_ids[0]
+    mat_out = _join([_atom(material_ids, mat, full),
+                     _atom(mat_tech_ids[mat_id], tech, full),
+                     _atom(mat_tead_ids[mat_id], tead, full),
+                     _atom(mat_prop_ids[mat_id], prop, full)])
+
+    llrs_ids = llrs_type_ids[mat_id]
+    llrs_out = _atom(llrs_ids, llrs, full)
+    if llrs > 0 and llrs_out:
+        llrs_out = _join([llrs_out,
+                          _atom(llrs_duct_ids[llrs_out], duct, full)])
+
+    return mat_out, llrs_out
+
+
+def _height(ids, val, val1, val2, full):
+    # ids items are [unknown, range, exact, approximate]
+    if val == 0:
+        return ids[0] if full else ''
+    elif val == 1:
+        return ids[1] + ':' + val1 + ',' + val2
+    elif 1 < val < len(ids):
+        return ids[val] + ':' + val1
+    return ''
+
+
+def build_taxonomy_string(v, out_type):
+    """
+table-driven string builder used by Taxonomy.BuildTaxonomyString,
+any widget state is accepted (stale or out of range values are skipped)
+    v:         a TaxtValues instance
+    out_type:  0: "full", 1: "without unknown", 2: "short"
+"""
+    full = (out_type == 0)
+
+    # Direction
+    if v.Direction1RB == 0:
+        if full:
+            dirx, diry = 'DX+D99', 'DY+D99'
+        else:
+            dirx, diry = 'DX', 'DY'
+    else:
+        dirx, diry = 'DX+PF', 'DY+OF'
+
+    # Material and lateral load-resisting system
+    matx, llrsx = _structural(
+        v.MaterialCB11, v.MaterialCB21, v.MaterialCB41, v.MaterialCB31,
+        v.SystemCB11, v.SystemCB21, full)
+    maty, llrsy = _structural(
+        v.MaterialCB12, v.MaterialCB22, v.MaterialCB42, v.MaterialCB32,
+        v.SystemCB12, v.SystemCB22, full)
+
+    # Height
+    if v.HeightCB1 == 0:
+        height = 'H99' if full else ''
+    else:
+        if v.HeightCB4 == 0:
+            slope = h_slope_ids[0] if full else ''
+        elif v.HeightCB4 == 1:
+            slope = h_slope_ids[1] + ':' + v.noStoreysE41
+        else:
+            slope = ''
+        height = _join([
+            _height(h_aboveground_ids, v.HeightCB1,
+                    v.noStoreysE11, v.noStoreysE12, full),
+            _height(h_belowground_ids, v.HeightCB2,
+                    v.noStoreysE21, v.noStoreysE22, full),
+            _height(h_abovegrade_ids, v.HeightCB3,
+                    v.noStoreysE31, v.noStoreysE32, full),
+            slope])
+
+    # Date (items are [unknown, exact, range, latest, approximate])
+    if v.DateCB1 == 0:
+        date = 'Y99' if full else ''
+    elif v.DateCB1 == 2:
+        date = date_type_ids[2] + ':' + v.DateE1 + ',' + v.DateE2
+    elif 0 < v.DateCB1 < len(date_type_ids):
+        date = date_type_ids[v.DateCB1] + ':' + v.DateE1
+    else:
+        date = ''
+
+    # Occupancy
+    occu = _atom(occu_type_ids, v.OccupancyCB1, full)
+    if occu and v.OccupancyCB1 > 0:
+        occu = _join([occu, _atom(occu_spec_ids[occu], v.OccupancyCB2, full)])
+
+    # Structural irregularity
+    irre = _atom(stir_type_ids, v.RegularityCB1, full)
+    if v.RegularityCB1 == 2:
+        irre = _join([
+            irre,
+            _atom(plan_irre_ids, v.RegularityCB2, full),
+            (_atom(plan_seco_ids, v.RegularityCB4, full)
+             if v.RegularityCB2 > 0 else ''),
+            _atom(vert_irre_ids, v.RegularityCB3, full),
+            (_atom(vert_seco_ids, v.RegularityCB5, full)
+             if v.RegularityCB3 > 0 else '')])
+
+    # Roof
+    roof_mat_id = _id(roof_mate_ids, v.RoofCB3)
+    roof = _join([_atom(roof_shap_ids, v.RoofCB1, full),
+                  _atom(roof_cove_ids, v.RoofCB2, full),
+                  _atom(roof_mate_ids, v.RoofCB3, full),
+                  _atom(roof_sys_ids.get(roof_mat_id, ()), v.RoofCB4, full),
+                  _atom(roof_conn_ids, v.RoofCB5, full)])
+
+    # Floor
+    floo_mat_id = _id(floo_syma_ids, v.FloorCB1)
+    floor = _join([_atom(floo_syma_ids, v.FloorCB1, full),
+                   _atom(floo_conn_ids.get(floo_mat_id, ()), v.FloorCB2, full),
+                   _atom(floo_syty_ids, v.FloorCB3, full)])
+
+    res_atoms = [dirx, matx, llrsx, diry, maty, llrsy, height, date, occu,
+                 _atom(bupo_type_ids, v.PositionCB, full),
+                 _atom(plsh_type_ids, v.PlanShapeCB, full),
+                 irre,
+                 _atom(wall_type_ids, v.WallsCB, full),
+                 roof, floor,
+                 _atom(foun_type_ids, v.FoundationsCB, full)]
+
+    if out_type != 2:
+        return '/'.join(res_atoms)
+
+    if res_atoms[1] == res_atoms[4] and res_atoms[2] == res_atoms[5]:
+        # same params case
+        res_atoms[3] = res_atoms[4] = res_atoms[5] = ''
+        res_atoms[0] = '' if v.Direction1RB == 0 else 'PF'
+    elif v.Direction1RB == 0:
+        res_atoms[0], res_atoms[3] = 'DX', 'DY'
+    else:
+        res_atoms[0], res_atoms[3] = 'DX+PF', 'DY+PO'
+
+    return '/'.join([atom for atom in res_atoms if atom])
@@ -0,0 +1,60 @@
+#!/usr/bin/env python
+import unittest
+import os
+import sys
+from openquake.taxonomy3.taxtweb_eng import (
+    Taxonomy, taxonomy_process, ENGINE_FAST)
+from openquake.taxonomy3.taxonomy_record import taxonomy_parse
+from openquake.taxonomy3.taxonomy_categorical import (
+    taxonomy_categorical, CATEGORICAL_ATTRIBUTES)
+
+
+def taxonomies_load():
+    data_path = os.path.join(os.path.dirname(
+        sys.modules[TaxonomyCategoricalTest.__module__].__file__), 'data')
+
+    with open(os.path.join(data_path, 'taxonomies.txt')) as f:
+        return [taxonomy.strip().rstrip('/') for taxonomy in f
+                if taxonomy[0] != '#']
+
+
+class TaxonomyCategoricalTest(unittest.TestCase):
+    def categorical_test(self):
+        taxonomies = taxonomies_load()
+        taxonomies += taxonomies[:20]
+        columns, atoms = taxonomy_categorical(iter(taxonomies))
+        self.assertEqual(list(columns), list(CATEGORICAL_ATTRIBUTES))
+        self.assertEqual(list(atoms), list(CATEGORICAL_ATTRIBUTES))
+        self.assertEqual(atoms['material_x'][3], 'CR')
+
+        for row, taxonomy in enumerate(taxonomies):
+            taxt_full, err = taxonomy_process(taxonomy, 0)
+            codes = [(attribute, columns[attribute][row])
+                     for attribute in CATEGORICAL_ATTRIBUTES]
+            if err is not None:
+                self.assertEqual(set(code for _, code in codes), set([-1]))
+                continue
+
+            # each atom of the record (directions aside) is coded once
+            record = taxonomy_parse(taxt_full)
+            expected = sorted(
+                (pos, atom.text) for pos, blk in enumerate(record)
+                if pos not in (Taxonomy.POS_DX, Taxonomy.POS_DY)
+                for atom in blk)
+            found = sorted(
+                (CATEGORICAL_ATTRIBUTES[attribute][0],
+                 record.atom(CATEGORICAL_ATTRIBUTES[attribute][0],
+                             atoms[attribute][code].split(':')[0]).text)
+                for attribute, code in codes if code != -1)
+            self.assertEqual(found, expected)
+
+    def categorical_engine_test(self):
+        taxonomies = ['CR/LFM/HBET:3,1', 'XX', 'W/RES+RES2']
+        columns, _ = taxonomy_categorical(taxonomies)
+        columns_fast, _ = taxonomy_categorical(taxonomies, ENGINE_FAST)
+        for attribute in CATEGORICAL_ATTRIBUTES:
+            self.assertEqual(list(columns[attribute]),
+                             list(columns_fast[attribute]))
+
+        columns, _ = taxonomy_categorical([])
+        self.assertEqual(len(columns['material_x']), 0)
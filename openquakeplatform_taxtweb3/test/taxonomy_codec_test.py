@@ -0,0 +1,189 @@
+#!/usr/bin/env python
+import unittest
+import os
+import sys
+from openquake.taxonomy3 import taxtweb_maps
+from openquake.taxonomy3.taxtweb_maps import (
+    material, h_aboveground, h_belowground, h_abovegrade, h_slope,
+    date_type, occu_type, bupo_type, plsh_type, stir_type, plan_irre,
+    plan_seco, vert_irre, vert_seco, wall_type, roof_shap, roof_cove,
+    roof_mate, roof_conn, floo_syma, floo_syty, foun_type)
+from openquake.taxonomy3.taxtweb_head import (
+    mat_tech, mat_tead, mat_prop, llrs_type, llrs_duct, occu_spec,
+    roof_sys, floo_conn)
+from openquake.taxonomy3.taxtweb_eng import Taxonomy, taxonomy_process_all
+from openquake.taxonomy3.taxonomy_record import taxonomy_parse
+from openquake.taxonomy3.taxtweb_tables import (
+    TaxtValues, build_taxonomy_string)
+from openquake.taxonomy3.taxonomy_codec import (
+    taxonomy_encode, taxonomy_decode, taxonomy_encode_many, taxonomy_key,
+    taxonomy_digest, taxonomy_digest_many, values_encode, values_decode,
+    CODE_BITS, CODE_BYTES, DIGEST_INVALID)
+
+
+def ids(items):
+    return [item['id'] for item in items]
+
+
+def params(atom, values):
+    if atom in Taxonomy.ATOM_TYPE_RANGE:
+        return atom + ':' + ','.join(values)
+    elif atom in Taxonomy.ATOM_TYPE_VALUE:
+        return atom + ':' + values[0]
+    return atom
+
+
+def taxonomies_atoms():
+    """return taxonomies that use all the atoms of taxtweb_maps"""
+    taxts = []
+    for mat in ids(material):
+        taxts.append(mat)
+        for grp in (mat_tech, mat_prop, mat_tead):
+            taxts.extend(mat + '+' + atom for atom in ids(grp[mat]))
+        for llrs in ids(llrs_type[mat]):
+            taxts.append(mat + '/' + llrs)
+            taxts.extend(mat + '/' + llrs + '+' + duct
+                         for duct in ids(llrs_duct.get(llrs, [])))
+
+    for atom in ids(h_aboveground):
+        taxts.append('CR/' + params(atom, ('1', '3')))
+    for atom in ids(h_belowground) + ids(h_abovegrade) + ids(h_slope):
+        taxts.append('CR/HEX:2+' + params(atom, ('1', '3')))
+    for atom in ids(date_type):
+        taxts.append('CR/' + params(atom, ('1980', '1990')))
+
+    for occu in ids(occu_type):
+        taxts.append('CR/' + occu)
+        taxts.extend('CR/' + occu + '+' + spec
+                     for spec in ids(occu_spec.get(occu, [])))
+
+    for items in (bupo_type, plsh_type, stir_type, wall_type, roof_shap,
+                  roof_cove, roof_conn, floo_syty, foun_type):
+        taxts.extend('CR/' + atom for atom in ids(items))
+
+    plir, veir = plan_irre[1]['id'], vert_irre[1]['id']
+    taxts.extend('CR/IRIR+' + atom for atom in ids(plan_irre))
+    taxts.extend('CR/IRIR+%s+%s' % (plir, atom) for atom in ids(plan_seco))
+    taxts.extend('CR/IRIR+%s+%s' % (plir, atom) for atom in ids(vert_irre))
+    taxts.extend('CR/IRIR+%s+%s+%s' % (plir, veir, atom)
+                 for atom in ids(vert_seco))
+
+    for mat in ids(roof_mate):
+        taxts.append('CR/' + mat)
+        taxts.extend('CR/' + mat + '+' + atom for atom in ids(roof_sys[mat]))
+    for mat in ids(floo_syma):
+        taxts.append('CR/' + mat)
+        taxts.extend('CR/' + mat + '+' + atom
+                     for atom in ids(floo_conn.get(mat, [])))
+    return taxts
+
+
+def maps_atoms():
+    """return all the atoms of taxtweb_maps"""
+    atoms = set()
+    for name in dir(taxtweb_maps):
+        items = getattr(taxtweb_maps, name)
+        if not isinstance(items, list):
+            continue
+        for item in items:
+            atoms.update(ids(item if isinstance(item, list) else [item]))
+    return atoms
+
+
+def taxonomies_load():
+    data_path = os.path.join(os.path.dirname(
+        sys.modules[TaxonomyCodecTest.__module__].__file__), 'data')
+
+    with open(os.path.join(data_path, 'taxonomies.txt')) as f:
+        return [taxonomy.strip().rstrip('/') for taxonomy in f
+                if taxonomy[0] != '#']
+
+
+class TaxonomyCodecTest(unittest.TestCase):
+    def check_round_trip(self, taxt):
+        taxts_out, err = taxonomy_process_all(taxt)
+        if err is not None:
+            with self.assertRaises(ValueError) as cm:
+                taxonomy_encode(taxt)
+            self.assertEqual(str(cm.exception), err)
+            return None
+
+        code, params = taxonomy_encode(taxt)
+        self.assertLess(code, 1 << CODE_BITS)
+        key = taxonomy_key(code)
+        self.assertEqual(len(key), CODE_BYTES)
+        for type_out, taxt_out in enumerate(taxts_out):
+            self.assertEqual(taxonomy_decode(code, params, type_out),
+                             taxt_out)
+            self.assertEqual(taxonomy_decode(key, params, type_out),
+                             taxt_out)
+        # all the normalized forms have the same code
+        self.assertEqual(taxonomy_encode(taxts_out[0]), (code, params))
+        return taxts_out[0]
+
+    def atoms_round_trip_test(self):
+        atoms = set()
+        for taxt in taxonomies_atoms():
+            taxt_full = self.check_round_trip(taxt)
+            if taxt_full is not None:
+                for blk in taxonomy_parse(taxt_full):
+                    atoms.update(atom.text for atom in blk)
+                    atoms.update(atom.name for atom in blk)
+
+        # HFBET is refused by the reference engine, the codec is checked
+        # on the dropdown values
+        v = TaxtValues()
+        v.HeightCB1, v.noStoreysE11 = 2, '2'
+        v.HeightCB3, v.noStoreysE31, v.noStoreysE32 = 1, '1.5', '3'
+        self.assertEqual(values_decode(*values_encode(v)), v)
+        taxt_full = build_taxonomy_string(v, 0)
+        self.assertIn('HFBET:1.5,3', taxt_full)
+        atoms.add('HFBET')
+
+        self.assertEqual(maps_atoms() - atoms, set())
+
+    def taxonomies_round_trip_test(self):
+        for taxt in taxonomies_load():
+            self.check_round_trip(taxt)
+
+    def encode_many_test(self):
+        taxts = ['CR/LFM/HBET:3,1', 'XX', 'CR/LFM/HBET:1,3', 'CR/LFM']
+        codes, params = taxonomy_encode_many(taxts)
+        self.assertEqual(codes[0], codes[2])
+        self.assertEqual(params[0], params[2])
+        self.assertNotEqual(codes[0], codes[3])
+        self.assertEqual((codes[1], params[1]), (None, None))
+        self.assertEqual(taxonomy_decode(codes[0], params[0], 2),
+                         'CR/LFM/HBET:1,3')
+
+    def digest_test(self):
+        digests = {}
+        for taxt in taxonomies_load():
+            taxts_out, err = taxonomy_process_all(taxt)
+            if err is not None:
+                self.assertRaises(ValueError, taxonomy_digest, taxt)
+                continue
+            digest = taxonomy_digest(taxt)
+            self.assertTrue(-(1 << 63) < digest < (1 << 63))
+            # all the forms of the same normalized taxonomy
+            for taxt_out in taxts_out:
+                self.assertEqual(taxonomy_digest(taxt_out), digest)
+            self.assertEqual(digests.setdefault(digest, taxts_out[0]),
+                             taxts_out[0])
+
+        # stable across processes and releases
+        self.assertEqual(taxonomy_digest('CR/LFM/HBET:3,1'),
+                         taxonomy_digest('CR/LFM/HBET:1,3'))
+        self.assertEqual(taxonomy_digest('CR/LFM'), -8447809187408032344)
+
+    def digest_many_test(self):
+        taxts = ['CR/LFM/HBET:3,1', 'XX', 'CR/LFM/HBET:1,3', 'CR/LFM']
+        digests = taxonomy_digest_many(taxts)
+        self.assertEqual(len(digests), 4)
+        self.assertEqual(digests[0], digests[2])
+        self.assertNotEqual(digests[0], digests[3])
+        self.assertEqual(digests[1], DIGEST_INVALID)
+        self.assertEqual(list(digests),
+                         [taxonomy_digest(taxt) if taxt != 'XX'
+                          else DIGEST_INVALID for taxt in taxts])
+        self.assertEqual(len(taxonomy_digest_many([])), 0)
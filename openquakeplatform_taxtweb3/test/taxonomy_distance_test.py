@@ -0,0 +1,84 @@
+#!/usr/bin/env python
+import unittest
+import os
+import sys
+from openquake.taxonomy3.taxtweb_eng import taxonomy_process
+from openquake.taxonomy3.taxonomy_categorical import CATEGORICAL_ATTRIBUTES
+from openquake.taxonomy3.taxonomy_distance import (
+    TaxonomyMatcher, attribute_distances, taxonomy_distance)
+
+
+def taxonomies_load():
+    data_path = os.path.join(os.path.dirname(
+        sys.modules[TaxonomyDistanceTest.__module__].__file__), 'data')
+
+    with open(os.path.join(data_path, 'taxonomies.txt')) as f:
+        return [taxonomy.strip().rstrip('/') for taxonomy in f
+                if taxonomy[0] != '#']
+
+
+def full(taxt):
+    return taxonomy_process(taxt, 0)[0]
+
+
+class TaxonomyDistanceTest(unittest.TestCase):
+    def attribute_distances_test(self):
+        atoms = CATEGORICAL_ATTRIBUTES['material_x'][1]
+        table = attribute_distances('material_x')
+
+        def dist(a, b):
+            return table[atoms.index(a) + 1][atoms.index(b) + 1]
+
+        self.assertEqual(dist('CR', 'CR'), 0)
+        self.assertEqual(dist('CR', 'SRC'), 0.5)
+        self.assertEqual(dist('CR', 'MAT99'), 0.5)
+        self.assertEqual(dist('CR', 'S'), 1)
+        self.assertEqual(table[0][0], 0)
+        self.assertEqual(table[0][atoms.index('CR') + 1], 1)
+
+    def distance_test(self):
+        cr, src, s = (full('CR/LFM/HEX:3'), full('SRC/LFM/HEX:3'),
+                      full('S/LFM/HEX:3'))
+        self.assertEqual(taxonomy_distance(cr, cr), 0)
+        self.assertEqual(taxonomy_distance(cr, src),
+                         taxonomy_distance(src, cr))
+        self.assertLess(taxonomy_distance(cr, src),
+                        taxonomy_distance(cr, s))
+        # unlisted attributes have weight 1
+        self.assertLess(taxonomy_distance(cr, s, {}),
+                        taxonomy_distance(cr, s))
+        self.assertEqual(taxonomy_distance(cr, s, dict.fromkeys(
+            CATEGORICAL_ATTRIBUTES, 0.0)), 0)
+        self.assertRaises(ValueError, taxonomy_distance, cr, 'CR/LFM')
+
+    def nearest_test(self):
+        taxonomies = taxonomies_load()
+        library = taxonomies[::7] + ['XX']
+        queries = taxonomies[3::5] + ['XX', '']
+        matcher = TaxonomyMatcher(library)
+        indexes, distances = matcher.nearest(queries)
+        self.assertEqual(len(indexes), len(queries))
+
+        library_full = [full(taxt) for taxt in library]
+        for query, index, distance in zip(queries, indexes, distances):
+            query_full, err = taxonomy_process(query, 0)
+            if err is not None:
+                self.assertEqual((index, distance), (-1, float('inf')))
+                continue
+            brute = [taxonomy_distance(query_full, taxt_full)
+                     for taxt_full in library_full if taxt_full]
+            self.assertEqual(distance, min(brute))
+            self.assertEqual(
+                taxonomy_distance(query_full, library_full[index]), distance)
+
+        dists = matcher.distances(queries[0])
+        self.assertEqual(len(dists), len(library))
+        self.assertEqual(dists[-1], float('inf'))
+        self.assertEqual(min(dists), distances[0])
+        self.assertIsNone(matcher.distances('XX'))
+
+    def nearest_empty_test(self):
+        matcher = TaxonomyMatcher(['XX'])
+        self.assertEqual(matcher.nearest(['CR', 'XX']),
+                         ([-1, -1], [float('inf'), float('inf')]))
+        self.assertEqual(TaxonomyMatcher([]).nearest([]), ([], []))
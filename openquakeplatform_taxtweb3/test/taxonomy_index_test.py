@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+import unittest
+import os
+import sys
+import tempfile
+from openquake.taxonomy3.taxtweb_eng import Taxonomy, taxonomy_process
+from openquake.taxonomy3.taxonomy_record import taxonomy_parse
+from openquake.taxonomy3.taxonomy_numeric import (
+    taxonomy_numeric, taxonomy_numeric_select)
+from openquake.taxonomy3.taxonomy_index import (
+    TaxonomyIndex, rows_intersection, rows_union, rows_pack, rows_unpack)
+
+
+def taxonomies_load():
+    data_path = os.path.join(os.path.dirname(
+        sys.modules[TaxonomyIndexTest.__module__].__file__), 'data')
+
+    with open(os.path.join(data_path, 'taxonomies.txt')) as f:
+        taxonomies = [taxonomy.strip().rstrip('/') for taxonomy in f
+                      if taxonomy[0] != '#']
+    return taxonomies + taxonomies[::3]
+
+
+class TaxonomyIndexTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.taxonomies = taxonomies_load()
+        cls.index = TaxonomyIndex(cls.taxonomies)
+        cls.taxts_full = [taxonomy_process(taxonomy, 0)[0] or ''
+                          for taxonomy in cls.taxonomies]
+
+    def scan(self, pos, atom):
+        return [row for row, taxt_full in enumerate(self.taxts_full)
+                if taxt_full and any(
+                    atom in (blk_atom.text, blk_atom.name)
+                    for blk_atom in taxonomy_parse(taxt_full)[pos])]
+
+    def rows_test(self):
+        index = self.index
+        self.assertEqual(index.size, len(self.taxonomies))
+        self.assertEqual(list(index.invalid),
+                         [row for row, taxt_full in enumerate(self.taxts_full)
+                          if not taxt_full])
+        for pos in (Taxonomy.POS_DX_LMAT, Taxonomy.POS_DX_LLRS,
+                    Taxonomy.POS_HEIGHT, Taxonomy.POS_IRREG,
+                    Taxonomy.POS_ROOF):
+            self.assertNotEqual(index.atoms(pos), [])
+            for atom in index.atoms(pos):
+                self.assertEqual(list(index.rows(pos, atom)),
+                                 self.scan(pos, atom))
+        self.assertEqual(list(index.rows(Taxonomy.POS_DX_LMAT, 'XX')), [])
+
+    def set_operations_test(self):
+        index = self.index
+        cr = index.rows(Taxonomy.POS_DX_LMAT, 'CR')
+        lfinf = index.rows(Taxonomy.POS_DX_LLRS, 'LFINF')
+        w = index.rows(Taxonomy.POS_DX_LMAT, 'W')
+        self.assertEqual(list(rows_intersection(cr, lfinf)),
+                         sorted(set(cr) & set(lfinf)))
+        self.assertEqual(list(rows_union(cr, w, lfinf)),
+                         sorted(set(cr) | set(w) | set(lfinf)))
+        self.assertEqual(list(rows_intersection()), [])
+
+        for rows in ([], [0], [0, 1, 2, 127, 128, 16384, 10 ** 9]):
+            self.assertEqual(list(rows_unpack(rows_pack(rows))), rows)
+
+    def range_test(self):
+        columns = taxonomy_numeric(self.taxts_full)
+        for attribute, lo, hi in [('storeys_above', 6, None),
+                                  ('storeys_above', 3, 7),
+                                  ('storeys_below', None, 2),
+                                  ('date', None, 1979),
+                                  ('date', 1950, 2000),
+                                  ('date', None, None)]:
+            mask = taxonomy_numeric_select(columns[attribute], lo, hi)
+            expected = [row for row, selected in enumerate(mask)
+                        if selected and (lo is not None or hi is not None or
+                                         columns[attribute].kind[row] > 0)]
+            self.assertEqual(list(self.index.range(attribute, lo, hi)),
+                             expected)
+
+    def save_load_test(self):
+        with tempfile.NamedTemporaryFile(suffix='.idx') as f:
+            self.index.save(f.name)
+            index = TaxonomyIndex.load(f.name)
+        self.assertEqual(index.size, self.index.size)
+        self.assertEqual(index.atoms(Taxonomy.POS_ROOF),
+                         self.index.atoms(Taxonomy.POS_ROOF))
+        self.assertEqual(index.rows(Taxonomy.POS_DX_LMAT, 'CR'),
+                         self.index.rows(Taxonomy.POS_DX_LMAT, 'CR'))
+        self.assertEqual(index.range('date', hi=1979),
+                         self.index.range('date', hi=1979))
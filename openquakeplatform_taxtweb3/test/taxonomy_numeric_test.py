@@ -0,0 +1,65 @@
+#!/usr/bin/env python
+import unittest
+import math
+from openquake.taxonomy3.taxtweb_eng import taxonomy_process
+from openquake.taxonomy3.taxonomy_numeric import (
+    taxonomy_numeric, taxonomy_numeric_select, NUMERIC_ATTRIBUTES)
+
+
+def bounds(column, row):
+    return tuple(None if math.isnan(v) else v
+                 for v in (column.lo[row], column.hi[row]))
+
+
+class TaxonomyNumericTest(unittest.TestCase):
+    def numeric_test(self):
+        taxonomies = ['CR/LFM/HBET:7,3+HFEX:2.5/YPRE:1975',
+                      'CR/HEX:4/YBET:1970,1990',
+                      'XX',
+                      'W/HAPP:5+HBEX:1+HD:12/YEX:1960',
+                      'CR']
+        # every output type of the same taxonomy gives the same values
+        for type_out in range(0, 3):
+            normalized = [taxonomy_process(taxonomy, type_out)[0] or taxonomy
+                          for taxonomy in taxonomies]
+            columns = taxonomy_numeric(normalized + normalized[:2])
+            self.assertEqual(list(columns), list(NUMERIC_ATTRIBUTES))
+            for column in columns.values():
+                self.assertEqual(len(column.kind), len(taxonomies) + 2)
+
+            storeys = columns['storeys_above']
+            self.assertEqual(list(storeys.kind), [1, 2, -1, 3, 0, 1, 2])
+            self.assertEqual(bounds(storeys, 0), (3, 7))
+            self.assertEqual(bounds(storeys, 1), (4, 4))
+            self.assertEqual(bounds(storeys, 2), (None, None))
+            self.assertEqual(bounds(storeys, 3), (5, 5))
+            self.assertEqual(bounds(storeys, 4), (None, None))
+            self.assertEqual(bounds(columns['storeys_below'], 3), (1, 1))
+            self.assertEqual(bounds(columns['height_grade'], 0), (2.5, 2.5))
+            self.assertEqual(bounds(columns['slope'], 3), (12, 12))
+
+            date = columns['date']
+            self.assertEqual(list(date.kind), [3, 2, -1, 1, 0, 3, 2])
+            self.assertEqual(bounds(date, 0), (None, 1975))
+            self.assertEqual(bounds(date, 1), (1970, 1990))
+            self.assertEqual(bounds(date, 3), (1960, 1960))
+
+            self.assertEqual(
+                [bool(a and b) for a, b in zip(
+                    taxonomy_numeric_select(storeys, 3, 7),
+                    taxonomy_numeric_select(date, hi=1979))],
+                [True, False, False, True, False, True, False])
+
+    def numeric_empty_test(self):
+        columns = taxonomy_numeric(iter([]))
+        for column in columns.values():
+            self.assertEqual(len(column.lo), 0)
+
+    def numeric_invalid_test(self):
+        # malformed inputs are invalid rows, the other rows are kept
+        columns = taxonomy_numeric(['/' * 18, 'CR/HEX:4', '', 'HEX:x'])
+        for column in columns.values():
+            self.assertEqual(list(column.kind)[0::2], [-1, -1])
+        self.assertEqual(list(columns['storeys_above'].kind),
+                         [-1, 2, -1, -1])
+        self.assertEqual(bounds(columns['storeys_above'], 1), (4, 4))
@@ -0,0 +1,66 @@
+#!/usr/bin/env python
+import unittest
+import os
+import sys
+from openquake.taxonomy3.taxtweb_eng import Taxonomy, taxonomy_process
+from openquake.taxonomy3.taxonomy_record import (
+    TaxonomyAtom, TaxonomyRecord, taxonomy_parse, taxonomy_record)
+
+
+def taxonomies_load():
+    data_path = os.path.join(os.path.dirname(
+        sys.modules[TaxonomyRecordTest.__module__].__file__), 'data')
+
+    with open(os.path.join(data_path, 'taxonomies.txt')) as f:
+        return [taxonomy.strip().rstrip('/') for taxonomy in f
+                if taxonomy[0] != '#']
+
+
+class TaxonomyRecordTest(unittest.TestCase):
+    def parse_test(self):
+        record, err = taxonomy_record(
+            'CR/LFM/HBET:3,1+HFEX:2.5/YBET:2000,1990/'
+            'IRIR+IRPP:TOR+IRPS:REC')
+        self.assertIsNone(err)
+        self.assertIsInstance(record, TaxonomyRecord)
+        self.assertEqual(len(record), Taxonomy.POS_FOUNDATION + 1)
+
+        self.assertEqual(record.names(Taxonomy.POS_DX_LMAT), ('CR', 'CT99'))
+        self.assertEqual(record[Taxonomy.POS_DX_LLRS],
+                         (TaxonomyAtom('LFM', 'LFM', ()),
+                          TaxonomyAtom('DU99', 'DU99', ())))
+        hbet = record.atom(Taxonomy.POS_HEIGHT, 'HBET')
+        self.assertEqual(hbet.params, ('1', '3'))
+        self.assertEqual(hbet.values, (1, 3))
+        self.assertEqual(record.atom(Taxonomy.POS_HEIGHT, 'HFEX').values,
+                         (2.5,))
+        self.assertEqual(record.atom(Taxonomy.POS_DATE, 'YBET').values,
+                         (1990, 2000))
+        irpp = record.atom(Taxonomy.POS_IRREG, 'IRPP')
+        self.assertEqual(irpp.values, ('TOR',))
+        self.assertFalse(irpp.is_unknown())
+        self.assertTrue(record[Taxonomy.POS_FOUNDATION][0].is_unknown())
+        self.assertIsNone(record.atom(Taxonomy.POS_HEIGHT, 'HEX'))
+
+        # immutable and slotted
+        with self.assertRaises(TypeError):
+            record[Taxonomy.POS_DX] = ()
+        with self.assertRaises(AttributeError):
+            record.extra = None
+        with self.assertRaises(AttributeError):
+            hbet.name = 'HEX'
+
+    def round_trip_test(self):
+        for taxonomy in taxonomies_load():
+            taxt_full, err = taxonomy_process(taxonomy, 0)
+            record, record_err = taxonomy_record(taxonomy)
+            self.assertEqual(record_err, err)
+            if err is None:
+                self.assertEqual(str(record), taxt_full)
+                self.assertEqual(taxonomy_parse(taxt_full), record)
+
+    def parse_error_test(self):
+        self.assertEqual(taxonomy_record('XX'),
+                         (None, taxonomy_process('XX', 0)[1]))
+        with self.assertRaises(ValueError):
+            taxonomy_parse('CR/LFM')
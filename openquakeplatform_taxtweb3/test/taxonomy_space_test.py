@@ -0,0 +1,68 @@
+#!/usr/bin/env python
+import unittest
+import itertools
+import random
+from openquake.taxonomy3.taxtweb_eng import taxonomy_process
+from openquake.taxonomy3.taxtweb_fast import taxonomy_values
+from openquake.taxonomy3.taxtweb_tables import (
+    build_taxonomy_string, material_ids)
+from openquake.taxonomy3.taxonomy_space import TaxonomySpace
+
+
+class TaxonomySpaceTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.space = TaxonomySpace()
+
+    def count_test(self):
+        count = 1
+        for _, options in self.space.factors:
+            count *= len(options)
+        self.assertEqual(self.space.count(), count)
+        self.assertGreater(count, 2 ** 64)
+        self.assertRaises(IndexError, self.space.get, count)
+        self.assertRaises(IndexError, self.space.get, -1)
+
+    def options_test(self):
+        # each option of each factor (with the first option of the other
+        # factors) is a distinct taxonomy accepted by the parser
+        factors = self.space.factors
+        for factor_idx, (name, options) in enumerate(factors):
+            taxonomies = set()
+            for option in options:
+                v = self.space._values(
+                    [option if idx == factor_idx else factor_options[0]
+                     for idx, (_, factor_options) in enumerate(factors)])
+                taxt = build_taxonomy_string(v, 0)
+                self.assertEqual(taxonomy_values(taxt), v, msg=name)
+                taxonomies.add(taxt)
+            self.assertEqual(len(taxonomies), len(options), msg=name)
+
+    def taxonomies_test(self):
+        taxonomies = list(itertools.islice(self.space.taxonomies(2), 200))
+        self.assertEqual(taxonomies,
+                         [self.space.get(index, 2) for index in range(200)])
+        self.assertEqual(len(set(taxonomies)), 200)
+
+    def sample_test(self):
+        rng = random.Random(42)
+        taxonomies = self.space.sample(50, 0, rng)
+        self.assertEqual(len(set(taxonomies)), 50)
+        self.assertEqual(taxonomies,
+                         self.space.sample(50, 0, random.Random(42)))
+        for taxt in taxonomies:
+            self.assertEqual(taxonomy_process(taxt, 0), (taxt, None))
+
+    def stratified_test(self):
+        rng = random.Random(42)
+        samples = self.space.stratified(3, 'MaterialCB11', 0, rng)
+        self.assertEqual(sorted(samples), list(range(len(material_ids))))
+        for mat, taxonomies in samples.items():
+            self.assertEqual(len(taxonomies), 3)
+            for taxt in taxonomies:
+                self.assertEqual(taxt.split('/')[1].split('+')[0],
+                                 material_ids[mat])
+
+        samples = self.space.stratified(2, 'Direction1RB', 2, rng)
+        self.assertEqual(sorted(samples), [0, 1])
+        self.assertRaises(ValueError, self.space.stratified, 2, 'XX')
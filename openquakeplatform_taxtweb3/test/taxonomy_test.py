@@ -0,0 +1,51 @@
+#!/usr/bin/env python
+import unittest
+import os
+import sys
+from openquake.taxonomy3.taxtweb_eng import taxonomy_process
+from openquake.taxonomy3.taxonomy import taxonomy_short2full, taxonomy_prefix
+
+TAIL = ('H99/Y99/OC99/BP99/PLF99/IR99/EW99/RSH99+RMT99+R99+RWC99/'
+        'F99+FWC99/FOS99')
+
+
+def taxonomies_load():
+    data_path = os.path.join(os.path.dirname(
+        sys.modules[TaxonomyTest.__module__].__file__), 'data')
+
+    with open(os.path.join(data_path, 'taxonomies.txt')) as f:
+        return [taxonomy.strip() for taxonomy in f if taxonomy[0] != '#']
+
+
+class TaxonomyTest(unittest.TestCase):
+    def prefix_test(self):
+        for t_el, prefix in [('CR', 'CR'), ('CR+CIP', 'CR'),
+                             ('HBET:1,3', 'HBET'), ('YEX:1980+X', 'YEX'),
+                             ('A,B:C+D', 'A'), ('', ''), ('+CR', '')]:
+            self.assertEqual(taxonomy_prefix(t_el), prefix)
+
+    def short2full_test(self):
+        for t_short, full in [
+                ('CR/LFM', 'DX+D99/CR/LFM/DY+D99/CR/LFM/'),
+                ('PF/CR/LFM/DY/S/LWAL', 'DX+D99/CR/LFM/DY+D99/S/LWAL/'),
+                ('DY/W', 'DX+D99/W/L99/DY+D99/W/L99/'),
+                ('PO/S', 'DX+D99/S/L99/DY+D99/S/L99/'),
+                ('CR+CIP//DY+OF', 'DX+PF/MAT99/L99/DY+OF/MAT99/L99/'),
+                ('/', 'DX+D99/MAT99/L99/DY+D99/MAT99/L99/'),
+                ('DX+XX/CR', 'DX+D99/CR/L99/DY+D99/CR/L99/')]:
+            ret = taxonomy_short2full(t_short)
+            self.assertEqual((ret.result, ret.s), (full + TAIL, None),
+                             msg=t_short)
+
+        ret = taxonomy_short2full('HBET:1,3/CR')
+        self.assertEqual(ret.result.split('/')[6], 'HBET:1,3')
+
+        ret = taxonomy_short2full('CR/XX+CDM')
+        self.assertEqual((ret.result, ret.s), (None, "Unknown item 'XX+CDM'"))
+        self.assertRaises(IndexError, taxonomy_short2full, '/' * 18)
+
+    def full_fixed_point_test(self):
+        for taxonomy in taxonomies_load():
+            full, err = taxonomy_process(taxonomy, 0)
+            if err is None:
+                self.assertEqual(taxonomy_short2full(full).result, full)
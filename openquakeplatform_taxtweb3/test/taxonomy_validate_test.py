@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+import unittest
+import os
+import sys
+from openquake.taxonomy3.taxtweb_eng import Taxonomy, taxonomy_process
+from openquake.taxonomy3.taxonomy_validate import (
+    taxonomy_validate, taxonomy_validate_many, taxonomy_gate, ERR_EMPTY,
+    ERR_UNKNOWN_ITEM, ERR_MATERIAL_SPEC, ERR_LLRS, ERR_HEIGHT_RANGE,
+    ERR_HEIGHT_VALUE, ERR_HEIGHT_VALUES, ERR_HEIGHT_UNSUPPORTED,
+    ERR_DATE_VALUE, ERR_OCCUPANCY_SPEC, ERR_IRREGULARITY_PAIR, ERR_ROOF,
+    ERR_FLOOR, ERR_MATERIAL, ERR_WHITESPACE, ERR_LOWERCASE, ERR_NUMBER)
+
+
+def taxonomies_load():
+    data_path = os.path.join(os.path.dirname(
+        sys.modules[TaxonomyValidateTest.__module__].__file__), 'data')
+
+    with open(os.path.join(data_path, 'taxonomies.txt')) as f:
+        return [taxonomy.strip() for taxonomy in f if taxonomy[0] != '#']
+
+
+class TaxonomyValidateTest(unittest.TestCase):
+    def engine_test(self):
+        # the same outcome of the engine, the first message is its error
+        taxonomies = taxonomies_load()
+        taxonomies += ['', '/', 'XX', 'CR/XX/LFM/YY', 'HEX:x', 'HBET:3,3',
+                       'HFBET:1,2', 'HBET:3', 'YBET:1990,1990', 'YEX:19800',
+                       'IRIR+IRVS:SOS', 'IRIR+IRVP:IRN+IRVS:SOS', 'RES+XX',
+                       'RM+RM1+RSH2', 'CR+CT99+XX', 'W/LFM+XX', 'S/LN']
+        for taxonomy in taxonomies:
+            _, err = taxonomy_process(taxonomy, 0)
+            problems = taxonomy_validate(taxonomy)
+            if err is None:
+                self.assertEqual(problems, [], msg=taxonomy)
+                continue
+            self.assertNotEqual(problems, [], msg=taxonomy)
+            if not err.startswith('EXCEPTION: '):
+                self.assertEqual(problems[0].message, err, msg=taxonomy)
+
+    def all_problems_test(self):
+        blks = ['DX+PF', 'CR+XX', 'LFM+DUC', 'DY+OF', 'S', 'LQ',
+                'HBET:3,3+HEX:x+HFBET:1,2', 'YEX:19800', 'RES+ZZ', 'BP99',
+                'PLF99', 'IRIR+IRVS:SOS', 'EW99', 'RSH1+QQ', 'F99+WW',
+                'FOS99']
+        problems = taxonomy_validate('/'.join(blks))
+        self.assertEqual(
+            [(problem.code, problem.pos, problem.atom)
+             for problem in problems],
+            [(ERR_UNKNOWN_ITEM, Taxonomy.POS_DY_LLRS, 'LQ'),
+             (ERR_MATERIAL_SPEC, Taxonomy.POS_DX_LMAT, 'XX'),
+             (ERR_HEIGHT_RANGE, Taxonomy.POS_HEIGHT, 'HBET:3,3'),
+             (ERR_HEIGHT_VALUE, Taxonomy.POS_HEIGHT, 'HEX:x'),
+             (ERR_HEIGHT_UNSUPPORTED, Taxonomy.POS_HEIGHT, 'HFBET:1,2'),
+             (ERR_DATE_VALUE, Taxonomy.POS_DATE, 'YEX:19800'),
+             (ERR_OCCUPANCY_SPEC, Taxonomy.POS_OCCUPANCY, 'ZZ'),
+             (ERR_IRREGULARITY_PAIR, Taxonomy.POS_IRREG, 'IRVS:SOS'),
+             (ERR_ROOF, Taxonomy.POS_ROOF, 'QQ'),
+             (ERR_FLOOR, Taxonomy.POS_FLOOR, 'WW')])
+
+        problems = taxonomy_validate('CR/ZZ/LQ/W/LFINF')
+        self.assertEqual(
+            [(problem.code, problem.pos, problem.atom)
+             for problem in problems],
+            [(ERR_UNKNOWN_ITEM, None, 'ZZ'), (ERR_UNKNOWN_ITEM, None, 'LQ'),
+             (ERR_LLRS, Taxonomy.POS_DX_LLRS, 'LFINF'),
+             (ERR_LLRS, Taxonomy.POS_DY_LLRS, 'LFINF')])
+        self.assertEqual([problem.code for problem in taxonomy_validate('')],
+                         [ERR_EMPTY])
+
+    def validate_many_test(self):
+        taxonomies = ['CR/LFM', 'XX', 'CR/LFM', 'HEX:x', 'XX']
+        results = list(taxonomy_validate_many(iter(taxonomies), maxsize=1))
+        self.assertEqual([taxt for taxt, _ in results], taxonomies)
+        self.assertEqual([len(problems) for _, problems in results],
+                         [0, 1, 0, 1, 1])
+
+    def gate_test(self):
+        # a taxonomy is rejected only if the engine fails, the message is
+        # the error of the engine
+        taxonomies = taxonomies_load()
+        garbage = ['', ' CR/LFM', 'CR/LFM ', 'cr/lfm', 'CR/LFM/3', 'CRX',
+                   'PF+X', 'CR/HEX:x', 'CR/HEX', 'HBET:3,3', 'YEX:19800',
+                   'HFBET:1,2', 'HEX:x/HEX:3', 'HEX:3/HEX:x', 'HEX:3:x',
+                   'RES+RES1+xx', 'CR+xx/S', 'DX+xx/CR', 'HEX:x//',
+                   'CR/HEX:1+HFBET:1,2',
+                   # the blocks before height and date are checked first
+                   'CR+CR/LFM+DUC/HBET:1,3+FW99:45/IRRE',
+                   '//YBET:1964,1987+YBET:1964,1987//CR:1990/',
+                   'HBET:,19/S,RC/LFM', 'XX/HEX:x', '/' * 18 + 'XX']
+        for taxonomy in taxonomies + garbage:
+            problem = taxonomy_gate(taxonomy)
+            if problem is not None:
+                _, err = taxonomy_process(taxonomy, 0)
+                self.assertIsNotNone(err, msg=taxonomy)
+                if not err.startswith('EXCEPTION: '):
+                    self.assertEqual(problem.message, err, msg=taxonomy)
+
+        self.assertEqual(
+            [(problem.code, problem.atom) if problem else None
+             for problem in map(taxonomy_gate, garbage)],
+            [(ERR_EMPTY, ''), (ERR_WHITESPACE, ' CR'),
+             (ERR_WHITESPACE, 'LFM '), (ERR_LOWERCASE, 'cr'),
+             (ERR_NUMBER, '3'), (ERR_UNKNOWN_ITEM, 'CRX'),
+             (ERR_UNKNOWN_ITEM, 'PF+X'), (ERR_HEIGHT_VALUE, 'HEX:x'),
+             (ERR_HEIGHT_VALUES, 'HEX'), (ERR_HEIGHT_RANGE, 'HBET:3,3'),
+             (ERR_DATE_VALUE, 'YEX:19800'),
+             (ERR_UNKNOWN_ITEM, 'HFBET:1,2'),
+             # the last item of a position is the one processed
+             None, (ERR_HEIGHT_VALUE, 'HEX:x'),
+             # ignored by the engine
+             None, None, None, None,
+             (ERR_HEIGHT_VALUE, 'HEX:x'),
+             (ERR_HEIGHT_UNSUPPORTED, 'HFBET:1,2'),
+             (ERR_MATERIAL_SPEC, 'CR'), (ERR_MATERIAL, 'CR:1990'),
+             (ERR_MATERIAL, 'S,RC'), (ERR_UNKNOWN_ITEM, 'XX'),
+             (ERR_UNKNOWN_ITEM, 'XX')])
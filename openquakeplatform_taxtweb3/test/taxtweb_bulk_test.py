@@ -0,0 +1,238 @@
+#!/usr/bin/env python
+import unittest
+import os
+import sys
+import collections
+import contextlib
+import io
+from openquake.taxonomy3.taxonomy import taxonomy_short2full
+from openquake.taxonomy3.taxtweb_eng import (
+    Taxonomy, taxonomy_new, taxonomy_process, taxonomy_process_all,
+    taxonomy_process_many, taxonomy_footprint, ENGINE_SIMDOM, ENGINE_QUIET,
+    ENGINE_FAST)
+from openquake.taxonomy3.taxonomy_bulk import (
+    taxonomy_process_parallel, taxonomy_process_distinct,
+    taxonomy_expand_many, taxonomy_expand_rows, taxonomy_process_cmd)
+from openquake.taxonomy3.taxonomy_validate import taxonomy_gate
+
+
+def taxonomies_load():
+    data_path = os.path.join(os.path.dirname(
+        sys.modules[TaxtwebBulkTest.__module__].__file__), 'data')
+
+    taxonomies = []
+    with open(os.path.join(data_path, 'taxonomies.txt')) as f:
+        for taxonomy in f:
+            if taxonomy[0] == '#':
+                continue
+            taxonomies.append(taxonomy.strip().rstrip('/'))
+    # failures that leave the engine in an inconsistent state
+    taxonomies[10:10] = ['CR/HEX:1+HFBET:1,2', 'CR',
+                         'CR/HEX:1+HFBET:1,2', 'XX']
+    return taxonomies
+
+
+class TaxtwebBulkTest(unittest.TestCase):
+    def process_many_test(self):
+        taxonomies = taxonomies_load()
+        for engine in [ENGINE_SIMDOM, ENGINE_QUIET, ENGINE_FAST]:
+            for type_out in range(0, 3):
+                results = list(taxonomy_process_many(
+                    iter(taxonomies), type_out, engine))
+                self.assertEqual(len(results), len(taxonomies))
+                for taxonomy, result in zip(taxonomies, results):
+                    self.assertEqual(
+                        result, (taxonomy,) + taxonomy_process(
+                            taxonomy, type_out))
+
+    def process_many_lazy_test(self):
+        consumed = []
+
+        def taxonomies_gen():
+            for taxonomy in ['CR', 'S', 'W']:
+                consumed.append(taxonomy)
+                yield taxonomy
+
+        results = taxonomy_process_many(taxonomies_gen(), 2)
+        self.assertEqual(consumed, [])
+        self.assertEqual(next(results), ('CR', 'CR', None))
+        self.assertEqual(consumed, ['CR'])
+
+    def process_all_test(self):
+        taxonomies = taxonomies_load()
+        for engine in [ENGINE_SIMDOM, ENGINE_FAST]:
+            for taxonomy in taxonomies:
+                results = [taxonomy_process(taxonomy, type_out)
+                           for type_out in range(0, 3)]
+                if results[0][1] is None:
+                    expected = (tuple(r[0] for r in results), None)
+                else:
+                    expected = (None, results[0][1])
+                self.assertEqual(
+                    taxonomy_process_all(taxonomy, engine), expected)
+
+    def process_parallel_test(self):
+        taxonomies = taxonomies_load()
+        expected = list(taxonomy_process_many(taxonomies, 2))
+        for jobs, chunksize in [(1, 10), (2, 1), (3, 7), (2, 1000)]:
+            self.assertEqual(list(taxonomy_process_parallel(
+                iter(taxonomies), 2, jobs=jobs, chunksize=chunksize)),
+                expected)
+
+    def process_distinct_test(self):
+        taxonomies = taxonomies_load()
+        rows = taxonomies * 5
+        expected = list(taxonomy_process_many(rows, 2))
+        for jobs in [1, 2]:
+            index, results, stats = taxonomy_process_distinct(
+                iter(rows), 2, jobs=jobs)
+            self.assertEqual([results[code] for code in index], expected)
+            self.assertEqual([taxt_in for taxt_in, _, _ in results],
+                             list(collections.OrderedDict.fromkeys(rows)))
+            self.assertEqual(stats.rows, len(rows))
+            self.assertEqual(stats.distinct, len(results))
+            self.assertAlmostEqual(stats.ratio,
+                                   float(len(results)) / len(rows))
+            self.assertGreater(stats.saved, stats.seconds)
+
+        index, results, stats = taxonomy_process_distinct([], 0)
+        self.assertEqual((len(index), results), (0, []))
+        self.assertEqual(stats.saved, 0)
+
+    def process_gated_test(self):
+        taxonomies = taxonomies_load() + ['', ' CR', 'cr', 'CR/HEX:x']
+        expected = []
+        for taxt_in, taxt_out, error in taxonomy_process_many(
+                taxonomies, 2):
+            problem = taxonomy_gate(taxt_in)
+            if problem is not None:
+                self.assertIsNotNone(error)
+                taxt_out, error = None, problem.message
+            expected.append((taxt_in, taxt_out, error))
+
+        for engine in (ENGINE_SIMDOM, ENGINE_FAST):
+            self.assertEqual(list(taxonomy_process_many(
+                iter(taxonomies), 2, engine, gate=True)), expected)
+        for jobs in [1, 2]:
+            self.assertEqual(list(taxonomy_process_parallel(
+                iter(taxonomies), 2, jobs=jobs, chunksize=7, gate=True)),
+                expected)
+        index, results, _ = taxonomy_process_distinct(
+            taxonomies, 2, gate=True)
+        self.assertEqual([results[code] for code in index], expected)
+
+    def process_cmd_jobs_test(self):
+        for opts in (['-j', '0'], ['--jobs=-2'], ['-j', 'x'], ['-c', '0']):
+            stderr = io.StringIO()
+            with contextlib.redirect_stderr(stderr):
+                with self.assertRaises(SystemExit) as cm:
+                    taxonomy_process_cmd(opts + ['-'])
+            self.assertEqual(cm.exception.code, 2)
+            self.assertIn('invalid positive integer value', stderr.getvalue())
+
+    def expand_many_test(self):
+        taxonomies = taxonomies_load() + ['', '/' * 18]
+        results = list(taxonomy_expand_many(iter(taxonomies)))
+        self.assertEqual([taxt_in for taxt_in, _, _ in results], taxonomies)
+        for taxt_in, taxt_full, error in results:
+            if error is not None and error.startswith('EXCEPTION: '):
+                self.assertRaises(Exception, taxonomy_short2full, taxt_in)
+                continue
+            ret = taxonomy_short2full(taxt_in)
+            self.assertEqual((taxt_full, error), (ret.result, ret.s))
+
+        consumed = []
+
+        def taxonomies_gen():
+            for taxonomy in ['CR', 'S']:
+                consumed.append(taxonomy)
+                yield taxonomy
+
+        results = taxonomy_expand_many(taxonomies_gen())
+        self.assertEqual(next(results)[0], 'CR')
+        self.assertEqual(consumed, ['CR'])
+
+    def expand_rows_test(self):
+        rows = [['id', 'taxonomy'], ['1', 'CR/LFM'], ['2', 'XX'], ['3']]
+        results = list(taxonomy_expand_rows(iter(rows), 1, header=True))
+        self.assertEqual(results[0], ['id', 'taxonomy', 'error'])
+        self.assertEqual(results[1], [
+            '1', taxonomy_short2full('CR/LFM').result, ''])
+        self.assertEqual(results[2], ['2', 'XX', "Unknown item 'XX'"])
+        # the error is in the 'error' field also for the short rows
+        self.assertEqual(results[3], ['3', '', 'Missing column 1'])
+        self.assertEqual(list(taxonomy_expand_rows(
+            [['id', 'tax'], ['1', 'CR'], ['3']], 1, header=True))[2],
+            ['3', '', 'Missing column 1'])
+        self.assertEqual(list(taxonomy_expand_rows([[]], 2)),
+                         [['', '', '', 'Missing column 2']])
+        self.assertEqual(list(taxonomy_expand_rows(rows[:1], 1)),
+                         [['id', 'taxonomy', "Unknown item 'taxonomy'"]])
+
+    def clone_reset_test(self):
+        taxonomies = taxonomies_load()
+        clone = taxonomy_new('clone')
+        reused = taxonomy_new('reused')
+        for taxonomy in taxonomies:
+            expected = Taxonomy('taxonomy', True).process(taxonomy, 0)
+            self.assertEqual(clone.clone().process(taxonomy, 0), expected)
+            reused.reset()
+            self.assertEqual(reused.process(taxonomy, 0), expected)
+        self.assertEqual(str(reused), str(reused.clone()))
+        reused.reset()
+        self.assertEqual(str(reused), str(Taxonomy('reused', True)))
+
+    def exception_reset_test(self):
+        # the engine restores its initial state after an exception
+        for quiet in (False, True):
+            taxonomy = taxonomy_new('taxonomy', quiet=quiet)
+            for taxt_in in ['HBET:1', 'YBET:1', '/' * 18]:
+                self.assertTrue(taxonomy.process(taxt_in, 0)[1].startswith(
+                    'EXCEPTION: '))
+                self.assertEqual(str(taxonomy),
+                                 str(taxonomy_new('taxonomy', quiet=quiet)))
+            self.assertTrue(taxonomy.process_all('HBET:1')[1].startswith(
+                'EXCEPTION: '))
+            self.assertEqual(taxonomy.process('CR/LFM/HBET:3,1', 2),
+                             ('CR/LFM/HBET:1,3', None))
+
+    def quiet_test(self):
+        taxonomies = taxonomies_load()
+        quiet = taxonomy_new('taxonomy', quiet=True)
+        loud = taxonomy_new('taxonomy')
+        for taxonomy in taxonomies:
+            for type_out in range(0, 3):
+                result = quiet.process(taxonomy, type_out)
+                self.assertEqual(result, loud.process(taxonomy, type_out))
+                self.assertEqual(str(quiet), str(loud))
+
+        quiet.calls.clear()
+        loud.calls.clear()
+        quiet.process('CR/LFM/HBET:3,1/YBET:2000,1990', 0)
+        loud.process('CR/LFM/HBET:3,1/YBET:2000,1990', 0)
+        # one build for the output type selection, one deferred
+        self.assertEqual(quiet.calls['taxt_BuildTaxonomyNow'], 2)
+        self.assertGreater(loud.calls['taxt_BuildTaxonomyNow'], 2)
+        self.assertLess(quiet.calls['taxt_ValidateMaterial1'],
+                        loud.calls['taxt_ValidateMaterial1'])
+
+    def footprint_test(self):
+        first = taxonomy_new('first')
+        second = Taxonomy('second', True)
+        self.assertFalse(hasattr(first.MaterialCB11, '__dict__'))
+        # same labels are shared, also between not cloned engines
+        self.assertIs(first.MaterialCB11.items(),
+                      second.MaterialCB11.items())
+
+        first.process('CR/LFM+CDM/HBET:3,1', 0)
+        self.assertIsNot(first.MaterialCB21.items(),
+                         second.MaterialCB21.items())
+        second.process('CR/LFM+CDM/HBET:3,1', 0)
+        self.assertIs(first.MaterialCB21.items(),
+                      second.MaterialCB21.items())
+
+        first.calls.clear()
+        size = taxonomy_footprint(first)
+        self.assertGreater(size, 0)
+        self.assertGreater(taxonomy_footprint(first, shared=True), size)
+        self.assertEqual(taxonomy_footprint(first.clone()), size)
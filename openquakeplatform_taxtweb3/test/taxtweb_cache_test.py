@@ -0,0 +1,50 @@
+#!/usr/bin/env python
+import unittest
+from openquake.taxonomy3.taxtweb_eng import (
+    taxonomy_process, ENGINE_QUIET, ENGINE_FAST)
+from openquake.taxonomy3.taxtweb_cache import TaxonomyCache
+
+
+class TaxtwebCacheTest(unittest.TestCase):
+    def results_test(self):
+        cache = TaxonomyCache()
+        for taxonomy in ['CR', 'XX', 'CR/HEX:1+HFBET:1,2', 'S', 'CR', 'XX']:
+            for type_out in range(0, 3):
+                self.assertEqual(
+                    taxonomy_process(taxonomy, type_out, cache=cache),
+                    taxonomy_process(taxonomy, type_out))
+        info = cache.info()
+        self.assertEqual((info.hits, info.misses, info.currsize),
+                         (6, 12, 12))
+
+    def lru_test(self):
+        cache = TaxonomyCache(maxsize=2)
+        cache.process('CR', 2)
+        cache.process('XX', 2)
+        # 'CR' becomes the most recently used
+        cache.process('CR', 2)
+        # 'XX' is evicted
+        cache.process('S', 2)
+        self.assertEqual(cache.info(), (1, 3, 1, 2, 2))
+        self.assertEqual(cache.process('CR', 2), ('CR', None))
+        self.assertEqual(cache.process('XX', 2),
+                         (None, "Unknown item 'XX'"))
+        self.assertEqual(cache.info(), (2, 4, 2, 2, 2))
+
+        cache.clear()
+        self.assertEqual(cache.info(), (0, 0, 0, 2, 0))
+
+    def maxsize_test(self):
+        with self.assertRaises(ValueError):
+            TaxonomyCache(maxsize=0)
+
+    def engine_test(self):
+        cache = TaxonomyCache(engine=ENGINE_QUIET)
+        self.assertEqual(taxonomy_process('CR', 2, cache=cache),
+                         ('CR', None))
+        self.assertEqual(
+            taxonomy_process('CR', 2, engine=ENGINE_QUIET, cache=cache),
+            ('CR', None))
+        with self.assertRaises(ValueError):
+            taxonomy_process('CR', 2, engine=ENGINE_FAST, cache=cache)
+        self.assertEqual(cache.info().misses, 1)
@@ -2,11 +2,45 @@
 import unittest
 import os
 import sys
-from openquake.taxonomy.taxtweb_eng import taxonomy_process
+from openquake.taxonomy3.taxtweb_eng import (
+    Taxonomy, taxonomy_process, taxonomy_process_all, ENGINE_SIMDOM,
+    ENGINE_QUIET, ENGINE_FAST)
+
+
+def golden_load():
+    """return the rows (taxonomy, full, without unknown, short, error) of
+the forms computed by the original BuildTaxonomyString emitter"""
+    data_path = os.path.join(os.path.dirname(
+        sys.modules[TaxtwebEngTest.__module__].__file__), 'data')
+
+    with open(os.path.join(data_path, 'taxonomies_normalized.tsv')) as f:
+        return [line.rstrip('\n').split('\t') for line in f
+                if line[0] != '#']
 
 
 class TaxtwebEngTest(unittest.TestCase):
-    pass
+    def golden_test(self):
+        rows = golden_load()
+        self.assertGreater(len(rows), 200)
+        taxonomy = Taxonomy('taxonomy', True)
+        for row in rows:
+            taxts_out = tuple(row[1:4])
+            error = row[4] or None
+            for taxt_in in row[:4]:
+                if not taxt_in:
+                    continue
+                for type_out, taxt_out in enumerate(taxts_out):
+                    expected = (taxt_out or None, error)
+                    self.assertEqual(taxonomy.process(taxt_in, type_out),
+                                     expected, msg=taxt_in)
+                    for engine in (ENGINE_SIMDOM, ENGINE_QUIET, ENGINE_FAST):
+                        self.assertEqual(
+                            taxonomy_process(taxt_in, type_out, engine),
+                            expected, msg=taxt_in)
+                self.assertEqual(
+                    taxonomy_process_all(taxt_in, ENGINE_FAST),
+                    (taxts_out, None) if error is None else (None, error),
+                    msg=taxt_in)
 
 
 def make_function(func_name, taxonomy, run_slow):
@@ -0,0 +1,135 @@
+#!/usr/bin/env python
+import unittest
+import os
+import sys
+from openquake.taxonomy3.taxtweb_eng import (
+    Taxonomy, taxonomy_process, taxonomy_new, ENGINE_SIMDOM, ENGINE_FAST)
+from openquake.taxonomy3.taxtweb_fast import (
+    taxonomy_edit, taxonomy_full2short, taxonomy_values, values_edit)
+from openquake.taxonomy3.taxonomy_record import taxonomy_parse
+
+
+class TaxtwebFastTest(unittest.TestCase):
+    def errors_test(self):
+        for taxonomy in ['', 'XX', 'CR/XX', 'DX/CR/DY/S', 'HEX:x',
+                         'HBET:3,3', 'HFBET:1,2', 'YBET:1990,1990',
+                         'IRIR+IRVS:SOS', 'RES+XX', 'RM+RM1+RSH2']:
+            for type_out in range(0, 3):
+                self.assertEqual(
+                    taxonomy_process(taxonomy, type_out, ENGINE_FAST),
+                    taxonomy_process(taxonomy, type_out, ENGINE_SIMDOM))
+
+    def edit_test(self):
+        taxt_full, _ = taxonomy_process(
+            'DX/CR+CIP/LFM/DY/S/LFBR/HBET:3,1/RES/RSH1+RMT2/FOSN', 0)
+        edits = [
+            (Taxonomy.POS_DX, 'DX+PF'), (Taxonomy.POS_DY, 'DY+OF'),
+            (Taxonomy.POS_DX_LMAT, 'CR+PC'), (Taxonomy.POS_DX_LMAT, 'W'),
+            (Taxonomy.POS_DY_LMAT, 'MUR'), (Taxonomy.POS_DY_LLRS, 'LWAL'),
+            (Taxonomy.POS_DX_LLRS, 'LFINF+DUC'),
+            (Taxonomy.POS_HEIGHT, 'HEX:4'), (Taxonomy.POS_HEIGHT, 'HBET:5,2'),
+            (Taxonomy.POS_HEIGHT, 'HEX:4+HEX:5'),
+            (Taxonomy.POS_HEIGHT, 'HFBET:1,2'),
+            (Taxonomy.POS_DATE, 'YBET:1990,1980'),
+            (Taxonomy.POS_OCCUPANCY, 'COM+COM2'),
+            (Taxonomy.POS_POSITION, 'BP1'), (Taxonomy.POS_PLAN, 'XX'),
+            (Taxonomy.POS_IRREG, 'IRIR+IRPP:TOR'),
+            (Taxonomy.POS_IRREG, 'IRIR+IRVS:SOS'),
+            (Taxonomy.POS_EXTWALL, 'EWMA'),
+            (Taxonomy.POS_ROOF, 'RMT99'), (Taxonomy.POS_ROOF, 'RWO+RWO2'),
+            (Taxonomy.POS_FLOOR, 'FC+FC4'), (Taxonomy.POS_FOUNDATION, '')]
+
+        for pos, blk in edits:
+            blks = taxt_full.split('/')
+            blks[pos] = blk
+            for type_out in range(0, 3):
+                expected = taxonomy_process('/'.join(blks), type_out)
+                self.assertEqual(
+                    taxonomy_edit(taxt_full, pos, blk, type_out), expected)
+                self.assertEqual(taxonomy_edit(
+                    taxonomy_parse(taxt_full), pos, blk, type_out), expected)
+
+        # from the state of an engine or from a short taxonomy
+        taxonomy = taxonomy_new('taxonomy')
+        taxonomy.process(taxt_full, 0)
+        self.assertEqual(
+            taxonomy_edit(taxonomy.taxt_values(), Taxonomy.POS_HEIGHT,
+                          'HEX:4', 2),
+            ('DX/CR+CIP/LFM/DY/S/LFBR/HEX:4/RES/RSH1+RMT2/FOSN', None))
+        self.assertEqual(
+            taxonomy_edit('CR/LFM', Taxonomy.POS_ROOF, 'RSH1', 2),
+            ('CR/LFM/RSH1', None))
+        self.assertEqual(taxonomy_edit('XX', Taxonomy.POS_ROOF, 'RSH1', 2),
+                         taxonomy_process('XX', 2))
+
+        v = taxonomy_values(taxt_full)
+        self.assertIsNone(values_edit(v, Taxonomy.POS_DATE, 'YEX:19800'))
+        self.assertEqual(v, taxonomy_values(taxt_full))
+
+    def full2short_test(self):
+        data_path = os.path.join(os.path.dirname(
+            sys.modules[TaxtwebFastTest.__module__].__file__), 'data')
+        with open(os.path.join(data_path, 'taxonomies.txt')) as f:
+            taxonomies = [taxonomy.strip() for taxonomy in f
+                          if taxonomy[0] != '#']
+
+        for taxonomy in taxonomies + ['DX+PF/CR/LFM/DY+OF/S/LWAL',
+                                      'PF/IRIR+IRVP:CRW', 'RSH1+RMT99']:
+            taxt_full, err = taxonomy_process(taxonomy, 0, ENGINE_SIMDOM)
+            if err is not None:
+                continue
+            for type_out in range(0, 3):
+                self.assertEqual(
+                    taxonomy_full2short(taxt_full, type_out),
+                    taxonomy_process(taxonomy, type_out, ENGINE_SIMDOM)[0],
+                    msg=taxonomy)
+
+        self.assertRaises(ValueError, taxonomy_full2short, 'CR/LFM')
+        self.assertRaises(ValueError, taxonomy_full2short,
+                          'DX+PF' + '/MAT99/L99/DY+D99' + '/' * 12)
+
+    def unknown_engine_test(self):
+        with self.assertRaises(ValueError):
+            taxonomy_process('CR', 0, 'unknown')
+
+
+def make_function(func_name, taxonomy):
+    """function to generate tests that compare the results of the
+table-driven engine with the ones of the simulated-dom engine for each
+type of output"""
+
+    def generated(self):
+        taxonomy_loc = taxonomy
+        if taxonomy_loc[-1] == '/':
+            taxonomy_loc = taxonomy_loc[0:-1]
+
+        for type_in in range(0, 3):
+            taxt_in, _ = taxonomy_process(taxonomy_loc, type_in)
+            if taxt_in is None:
+                taxt_in = taxonomy_loc
+            for type_out in range(0, 3):
+                self.assertEqual(
+                    taxonomy_process(taxt_in, type_out, ENGINE_FAST),
+                    taxonomy_process(taxt_in, type_out, ENGINE_SIMDOM))
+
+    generated.__name__ = func_name
+    return generated
+
+
+def generator():
+    data_path = os.path.join(os.path.dirname(
+        sys.modules[TaxtwebFastTest.__module__].__file__), 'data')
+
+    with open(os.path.join(data_path, 'taxonomies.txt')) as f:
+        r = 1
+        for taxonomy in f:
+            if taxonomy[0] == '#':
+                r += 1
+                continue
+            taxonomy = taxonomy.strip()
+            func_name = "r%04d_%s_test" % (r, taxonomy.replace('.', '~'))
+            test_func = make_function(func_name, taxonomy)
+            setattr(TaxtwebFastTest, func_name, test_func)
+            r += 1
+
+generator()
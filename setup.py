@@ -98,7 +98,7 @@ elif pybuild_name == 'oq-taxonomy3':
     url = "https://github.com/gem/oq-platform-taxtweb3"
 
     install_requires = []
-    extras_require = {}
+    extras_require = {'numpy': ['numpy']}
 
     setup(
         name="openquake.taxonomy3",
@@ -133,7 +133,11 @@ elif pybuild_name == 'oq-taxonomy3':
         entry_points={
             'console_scripts': [
                 'taxonomy2human = openquake.taxonomy3.'
-                'taxonomy2human:taxonomy2human_cmd'],
+                'taxonomy2human:taxonomy2human_cmd',
+                'taxonomy_process = openquake.taxonomy3.'
+                'taxonomy_bulk:taxonomy_process_cmd',
+                'taxonomy_expand = openquake.taxonomy3.'
+                'taxonomy_bulk:taxonomy_expand_cmd'],
         },
         #test_loader='openquake.baselib.runtests:TestLoader',
         #test_suite='openquake.risklib,openquake.commonlib,openquake.calculators',